@@ -0,0 +1,289 @@
+# =============================================================================
+# 공유 집계 서비스
+# - 여러 대시보드 프로세스가 같은 누적 데이터셋(DatasetStore)을 볼 때
+#   섹션 집계를 별도 프로세스의 워커 풀에서 실행
+# - 대시보드는 필터 조건(spec)만 보내고 집계 결과(pandas 객체)를 받음
+# - 결과는 (데이터셋 버전, 필터, 섹션) 단위로 서비스 안에서 공유 캐시
+#   (같은 필터를 보는 사용자가 여럿이어도 한 번만 계산)
+# - 표준 라이브러리(multiprocessing.connection)만 사용하므로 로컬에서 바로 실행 가능
+# - 인증 키: multiprocessing.connection 은 받은 요청을 unpickle 하므로 키를 아는 쪽만 접속해야 함
+#   DASHBOARD_AGG_AUTHKEY 가 없으면 서비스가 시작할 때 무작위 키를 만들어 저장소 폴더의
+#   agg_service.key(소유자만 읽기)에 쓰고, 같은 저장소를 쓰는 대시보드가 그 파일을 읽음
+#   localhost 이외의 주소로 열 때는 DASHBOARD_AGG_AUTHKEY 를 반드시 지정
+#
+# 사용법:
+#   python agg_service.py serve --port 8765 --workers 4
+#   DASHBOARD_AGG_SERVICE=localhost:8765 streamlit run app.py
+#   python agg_service.py stats
+# =============================================================================
+import argparse
+import functools
+import multiprocessing
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+import pandas as pd
+
+from engine import section_aggregate
+from store import DEFAULT_ROOT, DatasetStore, PartitionedFrame
+
+SERVICE_ADDRESS = os.environ.get("DASHBOARD_AGG_SERVICE", "")
+AUTHKEY_ENV = "DASHBOARD_AGG_AUTHKEY"
+AUTHKEY_FILE = "agg_service.key"
+LOOPBACK_HOSTS = ('localhost', '127.0.0.1', '::1')
+DEFAULT_PORT = 8765
+
+FILTER_FIELDS = ('sources', 'countries', 'services', 'months')
+
+
+class StaleVersionError(RuntimeError):
+    """요청한 데이터셋 버전이 저장소의 현재 버전과 다름 (대시보드는 자기 데이터로 직접 계산)"""
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return (host or "localhost", int(port or DEFAULT_PORT))
+
+
+def load_authkey(root=DEFAULT_ROOT, create=False):
+    """
+    접속 키 (bytes): DASHBOARD_AGG_AUTHKEY, 없으면 저장소 폴더의 키 파일.
+    파일도 없으면 create 일 때만 무작위 키로 새로 만들고(권한 0600), 아니면 None
+    """
+    if os.environ.get(AUTHKEY_ENV):
+        return os.environ[AUTHKEY_ENV].encode("utf-8")
+    path = os.path.join(root, AUTHKEY_FILE)
+    try:
+        with open(path, "rb") as f:
+            key = f.read().strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    if not create:
+        return None
+    os.makedirs(root, exist_ok=True)
+    key = secrets.token_hex(32).encode("ascii")
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # 다른 프로세스가 방금 만들었으면 그 키를 사용
+        return load_authkey(root)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def make_spec(sources=None, countries=None, services=None, months=None):
+    """필터 조건 -> 해시 가능한 spec (값 순서와 무관하게 같은 키)"""
+    values = (sources, countries, services, months)
+    return tuple(
+        (field, None if v is None else tuple(sorted(v)))
+        for field, v in zip(FILTER_FIELDS, values)
+    )
+
+
+# =============================================================================
+# 워커 프로세스
+# - 프로세스마다 저장소 목록과 읽은 파티션을 보관하고, 데이터셋 버전이 바뀌면 다시 읽음
+# - 요청한 버전과 저장소의 현재 버전이 다르면 계산하지 않고 거절 (다른 버전 데이터로 계산한 결과가
+#   요청 버전의 캐시에 들어가지 않도록). 워커 캐시는 요청 버전 기준이라 같은 버전이면 다시 만들지 않음
+# - 파티션 경로에는 파일 내용 해시가 들어 있어 경로 기준으로 캐시해도 안전
+# =============================================================================
+_worker_datasets = {}
+
+
+@functools.lru_cache(maxsize=int(os.environ.get("DASHBOARD_AGG_PARTITIONS", 512)))
+def _read_partition(path):
+    return pd.read_parquet(path)
+
+
+def _worker_dataset(root, version):
+    cached = _worker_datasets.get(root)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    store = DatasetStore(root)
+    if store.version != version:
+        raise StaleVersionError(f"요청 버전 v{version}, 저장소 버전 v{store.version}")
+    dataset = PartitionedFrame(
+        {name: store.file_partitions(name) for name in store.file_names()},
+        loader=_read_partition,
+        file_rows={name: store.file_info(name)['rows'] for name in store.file_names()}
+    )
+    _worker_datasets[root] = (version, dataset)
+    return dataset
+
+
+def _run_section(root, version, spec, name):
+    dataset = _worker_dataset(root, version)
+    if not dataset.file_names():
+        return None
+    return section_aggregate(name, dataset.query(**dict(spec)))
+
+
+# =============================================================================
+# 서비스
+# =============================================================================
+class AggregateService:
+    def __init__(self, root=DEFAULT_ROOT, workers=None, cache_entries=512):
+        self.root = root
+        # fork 는 부모의 pyarrow 스레드 풀 상태를 물려받아 멈출 수 있으므로 spawn 사용
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def aggregate(self, version, spec, name):
+        key = (version, spec, name)
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            else:
+                # 계산 중인 결과도 캐시에 넣어 두어 같은 요청이 동시에 와도 한 번만 계산
+                self.misses += 1
+                future = self.pool.submit(_run_section, self.root, version, spec, name)
+                self._cache[key] = future
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'root': self.root,
+                'workers': self.pool._max_workers,
+                'entries': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if request[0] == 'aggregate':
+                        reply = ('ok', self.aggregate(*request[1:]))
+                    elif request[0] == 'stats':
+                        reply = ('ok', self.stats())
+                    else:
+                        reply = ('error', f"알 수 없는 요청: {request[0]}")
+                except StaleVersionError as e:
+                    reply = ('stale', str(e))
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                conn.send(reply)
+
+    def serve(self, address, authkey, ready=None):
+        # 연결(대시보드 프로세스의 작업 스레드)마다 스레드 하나, 계산은 워커 풀에서
+        # 여러 프로세스가 동시에 연결하므로 대기열을 넉넉하게 (기본값 1은 연결이 유실됨)
+        with Listener(address, backlog=128, authkey=authkey) as listener:
+            self.address = listener.address
+            if ready is not None:
+                ready.set()
+            while True:
+                try:
+                    conn = listener.accept()
+                except (multiprocessing.AuthenticationError, OSError):
+                    # 키가 틀렸거나 인증 중에 끊긴 연결은 버리고 계속 받음
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+
+# =============================================================================
+# 클라이언트
+# - 대시보드의 섹션 작업 스레드마다 연결을 하나씩 유지
+# =============================================================================
+class AggregateClient:
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _request(self, *request):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send(request)
+            status, result = conn.recv()
+        except (EOFError, OSError):
+            # 서비스가 재시작되었으면 다음 요청에서 다시 연결
+            self._local.conn = None
+            conn.close()
+            raise
+        if status == 'stale':
+            raise StaleVersionError(result)
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def aggregate(self, version, spec, name):
+        return self._request('aggregate', version, spec, name)
+
+    def stats(self):
+        return self._request('stats')
+
+
+def client_from_env():
+    # 접속 키가 없으면(서비스가 아직 한 번도 시작되지 않음) 서비스 없이 직접 계산
+    authkey = load_authkey() if SERVICE_ADDRESS else None
+    if authkey is None:
+        return None
+    return AggregateClient(parse_address(SERVICE_ADDRESS), authkey)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대시보드 공유 집계 서비스")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="집계 서비스 실행")
+    p_serve.add_argument("--store", default=DEFAULT_ROOT)
+    p_serve.add_argument("--host", default="localhost")
+    p_serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_serve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p_serve.add_argument("--cache-entries", type=int, default=512)
+
+    p_stats = sub.add_parser("stats", help="실행 중인 서비스의 캐시 현황")
+    p_stats.add_argument("--address", default=SERVICE_ADDRESS or f"localhost:{DEFAULT_PORT}")
+    p_stats.add_argument("--store", default=DEFAULT_ROOT)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        # 다른 호스트에서 접속할 수 있으면 키 파일을 공유하지 않으므로 직접 정한 키만 허용
+        if args.host not in LOOPBACK_HOSTS and not os.environ.get(AUTHKEY_ENV):
+            parser.error(f"localhost 이외의 주소({args.host})로 열려면 {AUTHKEY_ENV} 로 접속 키를 지정하세요")
+        authkey = load_authkey(args.store, create=True)
+        service = AggregateService(args.store, args.workers, args.cache_entries)
+        print(f"집계 서비스 시작: {args.host}:{args.port} (저장소: {args.store}, 워커 {args.workers}개)")
+        service.serve((args.host, args.port), authkey)
+    else:
+        authkey = load_authkey(args.store)
+        if authkey is None:
+            parser.error(f"접속 키가 없습니다 ({AUTHKEY_ENV} 또는 {os.path.join(args.store, AUTHKEY_FILE)})")
+        for key, value in AggregateClient(parse_address(args.address), authkey).stats().items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# =============================================================================
+# 이상 징후 탐지
+# - 리프 큐브를 (계열 x 거래월) 행렬로 펼쳐 모든 계열을 한 번에 점수화
+#   (계열 = 국가 x 서비스, 국가, 서비스 등 keys 조합)
+# - 점수: 강건 z-점수 0.6745 * (값 - 중앙값) / MAD  (|점수| >= 3.5 이면 이상)
+# - 24개월 이상이면 전체 계열 공통의 달별 계절 지수로 나눈 값(계절 조정값)으로 점수화
+# - 계열의 첫 거래월 ~ 마지막 거래월 사이에 거래가 없는 달은 0 으로 봄 (급감 탐지)
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+from engine import month_index
+
+ANOMALY_THRESHOLD = 3.5
+MIN_POINTS = 6
+SEASONAL_MIN_MONTHS = 24
+
+# 화면의 이상 징후 계열 단위
+ANOMALY_LEVELS = {
+    'country_service': ['country', 'PAYMENT_SERVICE_DIV'],
+    'country': ['country'],
+    'service': ['PAYMENT_SERVICE_DIV'],
+}
+
+
+def _robust_z(values):
+    # 행(계열)별 중앙값/MAD. MAD 가 0 이면 평균 절대편차로 대체
+    center = np.nanmedian(values, axis=1, keepdims=True)
+    deviation = np.abs(values - center)
+    mad = np.nanmedian(deviation, axis=1, keepdims=True)
+    mean_ad = np.nanmean(deviation, axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(mad > 0, mad / 0.6745, mean_ad * 1.2533)
+        z = np.where(scale > 0, (values - center) / scale, 0.0)
+    return np.where(np.isnan(values), np.nan, z), center
+
+
+def _seasonal_profile(values, calendar_month):
+    # 모든 계열을 모아 구한 달별(1~12월) 계절 지수 (계열 중앙값 대비 비율의 중앙값, 평균 1)
+    # 계열 하나의 급증/급감이 자기 기준값을 끌어올리지 않도록 계열별이 아니라 공통으로 추정
+    center = np.nanmedian(values, axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(center > 0, values / center, np.nan)
+    profile = np.ones(12)
+    for month in range(12):
+        month_ratio = ratio[:, calendar_month == month]
+        if np.isfinite(month_ratio).any():
+            profile[month] = np.nanmedian(month_ratio)
+    if not np.all(profile > 0):
+        return np.ones(12)
+    return profile / profile.mean()
+
+
+def series_matrix(cube, keys, measure='VOLUMN', month_col='TRANSACTION_APPROVED_MONTH'):
+    """큐브 -> (계열 목록 DataFrame, 거래월 라벨, 정수 기간, 값 행렬). 활동 구간 밖은 NaN"""
+    period = month_index(cube[month_col])
+    leaf = cube[period >= 0]
+    period = period[period >= 0]
+    series_codes = leaf.groupby(list(keys), sort=True).ngroup().to_numpy()
+    keep = series_codes >= 0
+    series = leaf.loc[keep, list(keys)].drop_duplicates().sort_values(list(keys)).reset_index(drop=True)
+    period_codes, periods = pd.factorize(period[keep], sort=True)
+    labels = pd.Series(leaf.loc[keep, month_col].to_numpy()).groupby(period_codes).first()
+
+    shape = (len(series), len(periods))
+    cell = series_codes[keep] * shape[1] + period_codes
+    values = np.bincount(cell, weights=np.nan_to_num(leaf.loc[keep, measure].to_numpy(dtype='float64')),
+                         minlength=shape[0] * shape[1]).reshape(shape)
+    seen = np.bincount(cell, minlength=shape[0] * shape[1]).reshape(shape) > 0
+
+    # 첫 거래월 이전 / 마지막 거래월 이후는 점수 대상에서 제외
+    position = np.arange(shape[1])
+    first = np.where(seen.any(axis=1), seen.argmax(axis=1), shape[1])
+    last = shape[1] - 1 - seen[:, ::-1].argmax(axis=1)
+    active = (position >= first[:, None]) & (position <= last[:, None])
+    return series, labels.to_numpy(), np.asarray(periods), np.where(active, values, np.nan)
+
+
+def detect_anomalies(cube, keys, measure='VOLUMN', threshold=ANOMALY_THRESHOLD, min_points=MIN_POINTS):
+    """
+    이상 월 목록 [keys..., 월, 값, 기준값, 점수, 유형] (|점수| 내림차순)
+    기준값은 계열 중앙값 x 계절 지수
+    """
+    columns = list(keys) + ['월', '값', '기준값', '점수', '유형']
+    if cube is None or cube.empty or 'TRANSACTION_APPROVED_MONTH' not in cube.columns:
+        return pd.DataFrame(columns=columns)
+    series, labels, periods, values = series_matrix(cube, keys, measure)
+    enough = (~np.isnan(values)).sum(axis=1) >= min_points
+    if not enough.any():
+        return pd.DataFrame(columns=columns)
+    series, values = series[enough].reset_index(drop=True), values[enough]
+
+    seasonal = np.ones(values.shape[1])
+    if periods[-1] - periods[0] + 1 >= SEASONAL_MIN_MONTHS:
+        seasonal = _seasonal_profile(values, periods % 12)[periods % 12]
+    z, center = _robust_z(values / seasonal)
+
+    rows, cols = np.nonzero(np.abs(np.nan_to_num(z)) >= threshold)
+    result = series.iloc[rows].reset_index(drop=True)
+    result['월'] = labels[cols]
+    result['값'] = values[rows, cols]
+    result['기준값'] = center[rows, 0] * seasonal[cols]
+    result['점수'] = z[rows, cols]
+    result['유형'] = np.where(result['점수'] > 0, '급증', '급감')
+    return result.reindex(result['점수'].abs().sort_values(ascending=False).index).reset_index(drop=True)[columns]
@@ -1,9 +1,11 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import io
+import hashlib
+from concurrent.futures import Future
+
+# 업로드 화면까지는 streamlit 과 스타일만 필요
+# pandas / numpy / plotly 와 분석 모듈은 데이터가 있을 때 아래(5. 분석 모듈 로드)에서 import
+from style import PAGE_STYLE
 
 # 1. 페이지 설정
 st.set_page_config(
@@ -12,117 +14,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# 2. 커스텀 CSS
-st.markdown("""
-<style>
-    /* 사이드바 전체 스타일 */
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #1e3a5f 0%, #2d5a87 100%);
-    }
-
-    [data-testid="stSidebar"] * {
-        color: white !important;
-    }
-
-    /* 사이드바 헤더 스타일 */
-    [data-testid="stSidebar"] h1,
-    [data-testid="stSidebar"] h2,
-    [data-testid="stSidebar"] h3 {
-        color: white !important;
-        padding: 0.5rem 0;
-    }
-
-    /* 필터 카드 스타일 */
-    .filter-card {
-        background: rgba(255, 255, 255, 0.1);
-        border-radius: 10px;
-        padding: 1rem;
-        margin-bottom: 1rem;
-        border: 1px solid rgba(255, 255, 255, 0.2);
-    }
-
-    .filter-title {
-        font-size: 0.9rem;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-    }
-
-    .filter-desc {
-        font-size: 0.75rem;
-        opacity: 0.8;
-        margin-bottom: 0.5rem;
-    }
-
-    /* 선택 요약 박스 */
-    .summary-box {
-        background: rgba(76, 175, 80, 0.3);
-        border-radius: 8px;
-        padding: 0.8rem;
-        margin: 0.5rem 0;
-        border-left: 4px solid #4CAF50;
-    }
-
-    .summary-item {
-        font-size: 0.8rem;
-        margin: 0.3rem 0;
-    }
-
-    /* 프리셋 버튼 스타일 */
-    .stButton > button {
-        background: rgba(255, 255, 255, 0.15) !important;
-        border: 1px solid rgba(255, 255, 255, 0.3) !important;
-        color: white !important;
-        font-size: 0.8rem !important;
-        padding: 0.3rem 0.8rem !important;
-        border-radius: 20px !important;
-        transition: all 0.3s ease !important;
-    }
-
-    .stButton > button:hover {
-        background: rgba(255, 255, 255, 0.25) !important;
-        border-color: rgba(255, 255, 255, 0.5) !important;
-    }
-
-    /* 리셋 버튼 특별 스타일 */
-    [data-testid="stSidebar"] .reset-btn button {
-        background: rgba(244, 67, 54, 0.3) !important;
-        border-color: #f44336 !important;
-        width: 100%;
-    }
-
-    /* Expander 스타일 */
-    [data-testid="stSidebar"] .streamlit-expanderHeader {
-        background: rgba(255, 255, 255, 0.1) !important;
-        border-radius: 8px !important;
-    }
-
-    /* 멀티셀렉트 스타일 */
-    [data-testid="stSidebar"] .stMultiSelect {
-        background: rgba(255, 255, 255, 0.05);
-        border-radius: 8px;
-        padding: 0.5rem;
-    }
-
-    /* 메인 KPI 카드 스타일 */
-    [data-testid="metric-container"] {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        border-radius: 10px;
-        padding: 1rem;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-
-    [data-testid="metric-container"] label {
-        color: rgba(255, 255, 255, 0.8) !important;
-    }
-
-    [data-testid="metric-container"] [data-testid="stMetricValue"] {
-        color: white !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# 2. 커스텀 CSS (style.py 에서 프로세스당 한 번 만든 문자열)
+st.markdown(PAGE_STYLE, unsafe_allow_html=True)
 
 # 3. 타이틀
 st.title("📊 거래 내역 분석 대시보드")
@@ -130,54 +23,333 @@ st.title("📊 거래 내역 분석 대시보드")
 # 4. 파일 업로드 (다중 파일 지원)
 st.markdown("### 📁 데이터 파일 업로드")
 st.caption("여러 파일을 동시에 업로드하면 데이터가 자동으로 병합됩니다.")
+data_mode = st.radio(
+    "데이터 관리 방식",
+    ["이번 세션만 분석", "저장된 데이터셋에 누적"],
+    horizontal=True,
+    help="'저장된 데이터셋에 누적'을 선택하면 업로드한 파일이 서버에 보관되어, 다음부터는 새 파일만 추가하면 됩니다."
+)
+use_store = data_mode == "저장된 데이터셋에 누적"
+
 uploaded_files = st.file_uploader(
     "Excel(.xlsx) 또는 CSV 파일을 업로드하세요",
     type=["xlsx", "csv"],
     accept_multiple_files=True
 )
 
-if not uploaded_files:
+if not uploaded_files and not use_store:
     st.warning("⚠️ 분석할 데이터 파일이 아직 업로드되지 않았습니다.")
     st.info("👆 위 영역에 파일을 업로드하면 대시보드가 자동으로 열립니다.")
     st.stop()
 
-# 데이터 로드 함수 (단일 파일)
-@st.cache_data
+# 5. 분석 모듈 로드 (처음 데이터가 들어온 세션에서만 실제 import 비용이 듦)
+import uuid
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from engine import (
+    group_sum, nunique, build_cube, merge_cubes, dimension_values,
+    COHORT_METRICS, filter_cube, available_sections, section_aggregate, section_from_cube
+)
+from store import DatasetStore, PartitionedFrame, split_by_month
+from customers import CustomerTable
+from rfm import RFM_SEGMENTS, RfmTable
+from presets import PresetStore, PresetViews, make_preset, resolve_preset, describe_preset
+from jobs import SectionJobs, create_executor
+from agg_service import StaleVersionError, client_from_env, make_spec
+from result_cache import ResultCache
+from ranking import RankingIndex
+from trends import TrendEngine, TREND_METRICS
+from anomalies import ANOMALY_LEVELS, detect_anomalies
+from validation import SchemaError, validate_frame, cross_file_duplicates, quality_table
+from dedupe import DEDUPE_POLICIES, DEFAULT_POLICY, DEDUPE_KEYS, key_hashes, find_duplicates, drop_duplicates, dedupe_table
+from sketch import build_sketch_cube, sketch_from_cube, sketches_by
+from sampling import StratifiedSample
+from ingest import WATCH_DIR, DirectoryWatcher, load_file
+from currency import load_fx_table, rescale
+from memory_budget import DatasetTracker, MemoryBudget
+from tables import (AMOUNT_FORMAT, ESTIMATE_FORMAT, ERROR_FORMAT, PERCENT_FORMAT, SCORE_FORMAT,
+                    SIGNED_SCORE_FORMAT, number_columns, csv_bytes)
+from reconcile import RECONCILE_KEYS, RECONCILE_MEASURES, reconcile, reconcile_summary
+
+# 통화 환산용 환율표 (DASHBOARD_FX_RATES, 없으면 환산하지 않음). 표가 바뀌면 파일을 다시 읽도록 캐시 키에 포함
+fx_table = load_fx_table()
+fx_key = fx_table.digest if fx_table is not None else None
+
+dedupe_policy = st.selectbox(
+    "파일 간 중복 행 처리",
+    list(DEDUPE_POLICIES),
+    index=list(DEDUPE_POLICIES).index(DEFAULT_POLICY),
+    format_func=DEDUPE_POLICIES.get,
+    help="기간이 겹치는 파일을 함께 올리면 같은 행이 두 번 합산됩니다. 같은 행이 여러 파일에 있으면 우선순위가 높은 파일의 행만 반영합니다."
+)
+
+# 데이터 로드 함수 (단일 파일, 폴더 감시와 같은 경로: ingest.load_file)
+# 읽은 뒤 컬럼 단위로 검증 + 기준 통화 환산: (정상 행, 격리 행, 품질 리포트, 정상 행 해시)
+# 읽기 실패/필수 컬럼 없음이면 (None, None, {'error': 사유}, None)
+# 결과 행 데이터는 캐시하지 않음 (파티션으로 나눠 메모리 예산에 넣은 사본 하나만 유지)
+# 환율표는 현재 표(fx_table)를 그대로 씀. 환율표 digest(fx_key)는 호출하는 쪽의 캐시 키에만 사용
 def load_single_file(file_name, file_data):
-    try:
-        if file_name.endswith('.csv'):
-            df = pd.read_csv(file_data)
+    return load_file(file_name, file_data, fx_table)
+
+# 행 데이터 파티션/내보내기 파일의 메모리 예산 (프로세스당 1개, memory_budget.py)
+@st.cache_resource
+def get_memory_budget():
+    return MemoryBudget()
+
+memory_budget = get_memory_budget()
+
+# 세션별로 쓰는 데이터셋 (데이터셋이 바뀌면 어느 세션도 쓰지 않는 이전 항목을 예산에서 지움)
+@st.cache_resource
+def get_dataset_tracker():
+    return DatasetTracker()
+
+def in_budget(partitions):
+    """{거래월: 예산 키} 가 모두 예산에 있는지 (지워진 뒤 캐시 결과만 남은 경우 False -> 다시 계산)"""
+    return all(memory_budget.contains(key) for key in partitions.values())
+
+# 업로드 파일 준비: 거래월 파티션 + 집계 큐브 + 분위수 스케치 (같은 파일이면 다시 계산하지 않음)
+# 파티션은 메모리 예산에 넣고 키만 보관 (예산을 넘으면 디스크로 내려감)
+@st.cache_resource(max_entries=64)
+def prepare_uploaded_file(file_name, digest, fx_key, _file_data):
+    df_single, quarantine, report, hashes = load_single_file(file_name, _file_data)
+    if df_single is None:
+        return None, quarantine, report, hashes
+    # 중복 키가 전체 컬럼이면 검증에서 만든 행 해시를 그대로 사용
+    dedupe_keys = hashes if DEDUPE_KEYS is None else key_hashes(df_single)
+    partitions = {
+        month: memory_budget.put(f"upload/{digest}/{fx_key}/{month}", part)
+        for month, part in split_by_month(df_single).items()
+    }
+    prepared = partitions, build_cube(df_single), build_sketch_cube(df_single), dedupe_keys
+    return prepared, quarantine, report, hashes
+
+# 누적 데이터셋 저장소 (프로세스당 1개)
+@st.cache_resource
+def get_dataset_store():
+    return DatasetStore()
+
+# 폴더 감시 자동 수집 (DASHBOARD_WATCH_DIR 지정 시, 프로세스당 1개의 백그라운드 감시)
+@st.cache_resource
+def get_directory_watcher(_store):
+    return DirectoryWatcher(WATCH_DIR, _store).start()
+
+# 다른 세션/폴더 감시/다른 프로세스가 데이터셋을 바꾸면 알림 (화면 갱신은 사용자가 선택)
+@st.fragment(run_every=5)
+def watch_store_version(version):
+    store.refresh()
+    if store.version == version:
+        return
+    if st.session_state.get('store_notified') != store.version:
+        st.session_state.store_notified = store.version
+        st.toast(f"🆕 누적 데이터셋이 v{store.version} 으로 갱신되었습니다.")
+    info_col, btn_col = st.columns([5, 1])
+    info_col.info(f"🆕 새 데이터가 반영되었습니다 (v{version} → v{store.version}). 지금 화면은 v{version} 기준입니다.")
+    if btn_col.button("새로 불러오기", key="store_reload"):
+        st.rerun()
+
+# 여러 파일 로드 및 파티션 구성
+failed_files = []  # (파일 이름, 사유)
+quality_reports = {}
+quarantines = {}
+file_hashes = {}
+dedupe_hashes = {}  # 파일 간 중복 제거용 키 해시 (추가 순서)
+budget_prefixes = []  # 이 세션이 쓰는 행 데이터 파티션의 예산 키 접두사
+
+if use_store:
+    store = get_dataset_store()
+    store.refresh()
+    watcher = get_directory_watcher(store) if WATCH_DIR else None
+    removed_files = st.session_state.setdefault('store_removed', set())
+    # 읽지 못한 업로드 파일은 같은 내용이면 다시 읽지 않음
+    failed_uploads = st.session_state.setdefault('store_failed', {})
+
+    # 새 파일(또는 내용이 바뀐 파일)만 저장소에 추가
+    for uploaded_file in uploaded_files or []:
+        digest = hashlib.sha1(uploaded_file.getvalue()).hexdigest()
+        if store.contains(uploaded_file.name, digest) or (uploaded_file.name, digest) in removed_files:
+            continue
+        if (uploaded_file.name, digest, fx_key) in failed_uploads:
+            failed_files.append((uploaded_file.name, failed_uploads[(uploaded_file.name, digest, fx_key)]))
+            continue
+        df_single, quarantine, report, hashes = load_single_file(uploaded_file.name, uploaded_file)
+        if df_single is not None:
+            try:
+                store.add_file(uploaded_file.name, df_single, digest,
+                               quality=report, quarantine=quarantine, row_hashes=hashes)
+            except Exception as e:
+                # 파티션을 쓸 수 없는 파일은 다른 읽기 오류처럼 실패 목록으로
+                report = {'error': f"파일을 저장할 수 없음 ({type(e).__name__})"}
+                failed_uploads[(uploaded_file.name, digest, fx_key)] = report['error']
+                failed_files.append((uploaded_file.name, report['error']))
         else:
-            df = pd.read_excel(file_data)
-        df['_source_file'] = file_name  # 소스 파일 추적용
-        return df
-    except Exception as e:
-        return None
-
-# 여러 파일 로드 및 병합
-dataframes = []
-failed_files = []
-
-for uploaded_file in uploaded_files:
-    df_single = load_single_file(uploaded_file.name, uploaded_file)
-    if df_single is not None:
-        dataframes.append(df_single)
-    else:
-        failed_files.append(uploaded_file.name)
+            failed_uploads[(uploaded_file.name, digest, fx_key)] = report['error']
+            failed_files.append((uploaded_file.name, report['error']))
+
+    # 목록/집계는 한 버전으로 한 번에 가져감 (폴더 감시의 반영과 섞이지 않도록 저장소 잠금 안에서)
+    with store.lock:
+        if not store.file_names():
+            st.warning("⚠️ 저장된 데이터셋이 비어 있습니다.")
+            if watcher is not None:
+                st.info(f"👆 위 영역에 파일을 업로드하거나 감시 폴더({watcher.directory})에 파일을 넣으면 데이터셋에 추가됩니다.")
+            else:
+                st.info("👆 위 영역에 파일을 업로드하면 데이터셋에 추가되고 대시보드가 열립니다.")
+            st.stop()
+
+        # 저장소 관리 (파일 삭제 시 해당 파일 몫만 집계에서 제외)
+        with st.expander(f"🗄️ 저장된 데이터셋 관리 (v{store.version})"):
+            st.caption(f"저장 위치: {store.root}")
+            if watcher is not None:
+                status = watcher.status()
+                st.caption(f"📂 폴더 감시: {status['directory']} ({status['interval']:g}초 주기, 마지막 확인: {status['last_scan'] or '-'})")
+                for name, rows, at in status['ingested'][:5]:
+                    st.caption(f"· {at} 자동 추가: {name} ({rows:,}행)")
+                if status['pending']:
+                    st.caption(f"· 처리 중: {', '.join(status['pending'])}")
+                for name, error in status['errors'].items():
+                    st.caption(f"· ⚠️ {name}: {error}")
+                if status['last_error']:
+                    st.caption(f"· ⚠️ 폴더 확인 실패: {status['last_error']}")
+            for name in store.file_names():
+                info = store.file_info(name)
+                name_col, btn_col = st.columns([5, 1])
+                name_col.text(f"{name} ({info['rows']:,}행, 추가: {info['added_at']})")
+                if btn_col.button("삭제", key=f"store_remove_{info['id']}"):
+                    removed_files.add((name, info['digest']))
+                    store.remove_file(name)
+                    st.rerun()
+
+        budget_prefixes = [path for name in store.file_names() for path in store.file_partitions(name).values()]
+        dataset = PartitionedFrame(
+            {name: store.file_partitions(name) for name in store.file_names()},
+            loader=memory_budget.load,
+            file_rows={name: store.file_info(name)['rows'] for name in store.file_names()}
+        )
+        cube = store.cube()
+        sketch_cube = store.sketch_cube()
+        store_version = store.version
+        dataset_key = f"store:{store.root}:v{store_version}"
+        for name in store.file_names():
+            if store.quality(name) is not None:
+                quality_reports[name] = store.quality(name)
+            file_hashes[name] = store.row_hashes(name)
+        for name in store.file_order():
+            dedupe_hashes[name] = file_hashes[name] if DEDUPE_KEYS is None else store.row_hashes(name, DEDUPE_KEYS)
+    watch_store_version(store_version)
+else:
+    file_partitions = {}
+    file_cubes = []
+    file_sketches = []
+    file_digests = []
+    for uploaded_file in uploaded_files:
+        digest = hashlib.sha1(uploaded_file.getvalue()).hexdigest()
+        prepared, quarantine, report, hashes = prepare_uploaded_file(uploaded_file.name, digest, fx_key, uploaded_file)
+        if prepared is not None and not in_budget(prepared[0]):
+            prepare_uploaded_file.clear()
+            prepared, quarantine, report, hashes = prepare_uploaded_file(uploaded_file.name, digest, fx_key, uploaded_file)
+        if prepared is None:
+            failed_files.append((uploaded_file.name, report['error']))
+            continue
+        budget_prefixes.append(f"upload/{digest}/{fx_key}/")
+        partitions, file_cube, file_sketch, keys = prepared
+        quality_reports[uploaded_file.name] = report
+        if len(quarantine):
+            quarantines.setdefault(uploaded_file.name, []).append(quarantine)
+        file_hashes[uploaded_file.name] = (
+            np.concatenate([file_hashes[uploaded_file.name], hashes]) if uploaded_file.name in file_hashes else hashes
+        )
+        dedupe_hashes[uploaded_file.name] = (
+            np.concatenate([dedupe_hashes[uploaded_file.name], keys]) if uploaded_file.name in dedupe_hashes else keys
+        )
+        file_digests.append(f"{uploaded_file.name}:{digest}")
+        # 같은 이름의 파일이 여러 개면 월 파티션끼리 합침 (합친 파티션도 국가/서비스 순으로 정렬해 예산에 넣음)
+        merged = file_partitions.setdefault(uploaded_file.name, {})
+        for month, part in partitions.items():
+            if month in merged:
+                key = f"{merged[month]}+{digest}"
+                if not memory_budget.contains(key):
+                    combined = pd.concat([memory_budget.get(merged[month]), memory_budget.get(part)], ignore_index=True)
+                    memory_budget.put(key, split_by_month(combined)[month])
+                part = key
+            merged[month] = part
+        file_cubes.append(file_cube)
+        file_sketches.append(file_sketch)
+
+    if not file_partitions:
+        st.error("❌ 모든 파일을 읽는 데 실패했습니다. 올바른 형식의 파일인지 확인해주세요.")
+        st.stop()
+
+    cube = merge_cubes(file_cubes)
+    # 파일별 행 수는 큐브에서 (디스크로 내려간 파티션을 다시 읽지 않도록)
+    cube_rows = cube.groupby('_source_file')['_rows'].sum()
+    dataset = PartitionedFrame(file_partitions, loader=memory_budget.load,
+                               file_rows={name: int(cube_rows.get(name, 0)) for name in file_partitions})
+    sketch_cube = merge_cubes(file_sketches)
+    dataset_key = hashlib.sha1("|".join(sorted(file_digests) + [str(fx_key)]).encode("utf-8")).hexdigest()
+
+# 데이터셋이 바뀌면 어느 세션도 쓰지 않게 된 이전 데이터셋의 파티션(중복 제거/세그먼트 포함)과
+# 내보내기 파일을 예산에서 지움 (spill 파일도 삭제)
+budget_prefixes += [f"dedupe/{dataset_key}/", f"rfm/{dataset_key}/", f"rfm/{dataset_key}:", ('export', dataset_key)]
+budget_session = st.session_state.setdefault('budget_session', uuid.uuid4().hex)
+for prefix in get_dataset_tracker().switch(budget_session, budget_prefixes):
+    memory_budget.discard_prefix(prefix)
 
-if not dataframes:
-    st.error("❌ 모든 파일을 읽는 데 실패했습니다. 올바른 형식의 파일인지 확인해주세요.")
-    st.stop()
+# =============================================================================
+# 파일 간 중복 제거 (dedupe.py)
+# - 중복 행이 빠지는 파일만 행 데이터/큐브/스케치를 다시 만들고, 나머지 파일은 그대로 사용
+# =============================================================================
+@st.cache_data(max_entries=8)
+def compute_duplicates(dataset_key, policy, _hashes):
+    return find_duplicates(_hashes, list(_hashes), policy)
+
+@st.cache_resource(max_entries=16)
+def dedupe_file(dataset_key, policy, name, _dataset, _drop_hashes):
+    frame = drop_duplicates(_dataset.select([name]), _drop_hashes)
+    # 모든 행이 다른 파일과 겹치면 빈 파티션 하나로 유지 (파일 목록/필터에는 남김)
+    partitions = split_by_month(frame) if len(frame) else {None: frame}
+    partitions = {
+        month: memory_budget.put(f"dedupe/{dataset_key}/{policy}/{name}/{month}", part)
+        for month, part in partitions.items()
+    }
+    return partitions, build_cube(frame), build_sketch_cube(frame), len(frame)
+
+# 파일 비교(대사)는 중복 제거 전의 원본 파일 기준
+source_dataset, source_cube, source_key = dataset, cube, dataset_key
+source_rows = dataset.file_rows()
+duplicates = compute_duplicates(dataset_key, dedupe_policy, dedupe_hashes)
+deduped_files = [name for name, dup in duplicates.items() if dup['dropped']]
+if deduped_files:
+    deduped = {
+        name: dedupe_file(dataset_key, dedupe_policy, name, dataset, duplicates[name]['hashes'])
+        for name in deduped_files
+    }
+    if not all(in_budget(result[0]) for result in deduped.values()):
+        dedupe_file.clear()
+        deduped = {
+            name: dedupe_file(dataset_key, dedupe_policy, name, dataset, duplicates[name]['hashes'])
+            for name in deduped_files
+        }
+    dataset = PartitionedFrame(
+        {name: deduped[name][0] if name in deduped else parts for name, parts in dataset.files.items()},
+        loader=dataset.loader,
+        file_rows={name: deduped[name][3] if name in deduped else rows for name, rows in source_rows.items()}
+    )
+    cube = merge_cubes([cube[~cube['_source_file'].isin(deduped_files)]] + [deduped[name][1] for name in deduped_files])
+    sketch_cube = merge_cubes([sketch_cube[~sketch_cube['_source_file'].isin(deduped_files)]]
+                              + [deduped[name][2] for name in deduped_files])
+    dataset_key = f"{dataset_key}:dedupe-{dedupe_policy}"
 
-# 데이터 병합
-df = pd.concat(dataframes, ignore_index=True)
+file_rows = dataset.file_rows()
+total_rows = len(dataset)
 
 # 업로드 결과 표시
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("업로드된 파일", f"{len(dataframes)}개")
+    st.metric("업로드된 파일", f"{len(file_rows)}개")
 with col2:
-    st.metric("총 데이터 행", f"{len(df):,}개")
+    st.metric("총 데이터 행", f"{total_rows:,}개")
 with col3:
     if failed_files:
         st.metric("실패한 파일", f"{len(failed_files)}개", delta="오류", delta_color="inverse")
@@ -187,32 +359,171 @@ with col3:
 # 실패한 파일 목록 표시
 if failed_files:
     with st.expander("⚠️ 로드 실패한 파일 보기"):
-        for f in failed_files:
-            st.text(f"- {f}")
+        for f, reason in failed_files:
+            st.text(f"- {f}: {reason}")
 
 # 업로드된 파일 목록
 with st.expander("📂 업로드된 파일 목록 보기"):
-    for i, f in enumerate(dataframes):
-        file_name = f['_source_file'].iloc[0]
-        st.text(f"{i+1}. {file_name} ({len(f):,}행)")
+    for i, (file_name, rows) in enumerate(file_rows.items()):
+        st.text(f"{i+1}. {file_name} ({rows:,}행)")
+    if len(source_rows) > 1:
+        # 파일별 기여 행 수 (우선순위가 낮은 파일에서 중복 행이 빠짐)
+        dropped_rows = sum(dup['dropped'] for dup in duplicates.values())
+        st.caption(f"파일 간 중복 처리: {DEDUPE_POLICIES[dedupe_policy]} · 제외된 중복 행 {dropped_rows:,}개")
+        st.dataframe(
+            dedupe_table(source_rows, duplicates, list(dedupe_hashes), dedupe_policy),
+            use_container_width=True, hide_index=True
+        )
+
+# 파일 간 중복 행 수 (데이터셋 버전별 1회 계산)
+@st.cache_data(max_entries=4)
+def count_cross_file_duplicates(dataset_key, _file_hashes):
+    return cross_file_duplicates(_file_hashes)
+
+# 데이터 품질 리포트 (검증에서 격리된 행은 대시보드 집계에서 제외됨)
+if quality_reports:
+    quality_df = quality_table(quality_reports, count_cross_file_duplicates(dataset_key, file_hashes))
+    total_quarantined = int(quality_df['격리 행'].sum())
+    label = f"🧪 데이터 품질 리포트 (격리 {total_quarantined:,}행)" if total_quarantined else "🧪 데이터 품질 리포트"
+    with st.expander(label):
+        st.caption("필수 컬럼: country, PAYMENT_SERVICE_DIV, VOLUMN, TRX_COUNT · 격리된 행은 분석에서 제외됩니다")
+        st.dataframe(quality_df, use_container_width=True, hide_index=True)
+        if total_quarantined:
+            if use_store:
+                quarantine_parts = [
+                    part.assign(_source_file=name)
+                    for name in quality_reports for part in [store.quarantine(name)] if part is not None
+                ]
+            else:
+                quarantine_parts = [
+                    part.assign(_source_file=name) for name, parts in quarantines.items() for part in parts
+                ]
+            if quarantine_parts:
+                quarantine_csv = csv_bytes(pd.concat(quarantine_parts, ignore_index=True))
+                st.download_button(
+                    label="📥 격리된 행 다운로드 (CSV)",
+                    data=quarantine_csv,
+                    file_name="quarantined_rows.csv",
+                    mime="text/csv",
+                    key="download_quarantine"
+                )
+
+# =============================================================================
+# 파일 비교 (대사, reconcile.py)
+# - 두 원본 파일을 국가 x 서비스 x 거래월(선택 시 + 고객 ID)로 맞춰 금액/건수 차이와 한쪽에만 있는 키 확인
+# - 고객 ID 없이 비교하면 파일별 집계 큐브만 사용 (행 데이터를 읽지 않음)
+# =============================================================================
+@st.cache_data(max_entries=4)
+def compare_files(dataset_key, file_a, file_b, with_customer, _dataset, _cube):
+    if with_customer:
+        keys = [c for c in RECONCILE_KEYS + ['CUSTOMERID'] if c in _dataset.columns]
+        columns = keys + [m for m in RECONCILE_MEASURES if m in _dataset.columns]
+        left, right = _dataset.select([file_a])[columns], _dataset.select([file_b])[columns]
+    else:
+        keys = [c for c in RECONCILE_KEYS if c in _cube.columns]
+        left, right = _cube[_cube['_source_file'] == file_a], _cube[_cube['_source_file'] == file_b]
+    return reconcile(left, right, keys)
+
+if len(source_rows) > 1:
+    with st.expander("🔀 파일 비교 (대사)"):
+        source_names = list(source_rows)
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            reconcile_a = st.selectbox("파일 A", source_names, index=0, key="reconcile_a")
+        with col2:
+            reconcile_b = st.selectbox("파일 B", source_names, index=1, key="reconcile_b")
+        with col3:
+            reconcile_customer = st.checkbox(
+                "고객 ID 포함", value=False, key="reconcile_customer",
+                disabled='CUSTOMERID' not in source_dataset.columns,
+                help="국가 x 서비스 x 거래월에 고객 ID까지 맞춰 비교합니다 (행 데이터를 읽음)"
+            )
+        if reconcile_a == reconcile_b:
+            st.info("서로 다른 두 파일을 선택하세요.")
+        else:
+            diff = compare_files(source_key, reconcile_a, reconcile_b, reconcile_customer, source_dataset, source_cube)
+            summary = reconcile_summary(diff)
+            volume_a, volume_b = diff['VOLUMN_A'].sum(), diff['VOLUMN_B'].sum()
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("A 거래금액", f"{volume_a:,.0f}")
+            with col2:
+                st.metric("B 거래금액", f"{volume_b:,.0f}")
+            with col3:
+                st.metric("금액 차이 (B - A)", f"{volume_b - volume_a:,.0f}")
+            with col4:
+                mismatched = int((diff['상태'] != '일치').sum())
+                st.metric("불일치 키", f"{mismatched:,}개", delta=f"전체 {len(diff):,}개", delta_color="off")
+
+            amount_columns = [c for c in diff.columns if c.startswith(('VOLUMN_', 'TRX_COUNT_'))]
+            reconcile_formats = number_columns({c: AMOUNT_FORMAT for c in ['키'] + amount_columns})
+            st.dataframe(summary[['상태', '키'] + amount_columns], use_container_width=True, hide_index=True,
+                         column_config=reconcile_formats)
+
+            mismatches = diff[diff['상태'] != '일치']
+            if len(mismatches):
+                st.markdown("**금액 차이가 큰 키 (상위 20개)**")
+                top_mismatches = mismatches.loc[mismatches['VOLUMN_차이'].abs().nlargest(20).index]
+                top_mismatches = top_mismatches.drop(columns=[c for c in top_mismatches.columns if c.startswith('_rows')])
+                st.dataframe(top_mismatches, use_container_width=True, hide_index=True, column_config=reconcile_formats)
+                st.download_button(
+                    label="📥 불일치 키 전체 다운로드 (CSV)",
+                    data=memory_budget.get_or_put(
+                        ('export', source_key, 'reconcile', reconcile_a, reconcile_b, reconcile_customer),
+                        lambda: csv_bytes(mismatches), kind='export'
+                    ),
+                    file_name="reconcile_mismatches.csv",
+                    mime="text/csv",
+                    key="download_reconcile"
+                )
+            else:
+                st.success("✅ 두 파일의 금액/건수가 모든 키에서 일치합니다.")
+
+# 통화 환산 현황 (환율표 적용 전에 저장된 파일은 현지 통화 금액 그대로 합산됨)
+if fx_table is not None:
+    unconverted = [name for name in file_rows if not quality_reports.get(name, {}).get('currency')]
+    if unconverted:
+        st.warning(f"⚠️ 기준 통화({fx_table.base})로 환산되지 않은 파일: {', '.join(unconverted)} · 저장소에서 삭제한 뒤 다시 추가하면 환산됩니다.")
 
-st.success(f"✅ {len(dataframes)}개 파일 업로드 완료! 총 {len(df):,}개 행")
+st.success(f"✅ {len(file_rows)}개 파일 업로드 완료! 총 {total_rows:,}개 행")
 st.divider()
 
-# 데이터 전처리
-if 'TRANSACTION_APPROVED_MONTH' in df.columns:
-    df['TRANSACTION_APPROVED_MONTH'] = df['TRANSACTION_APPROVED_MONTH'].astype(str)
-if 'CUSTOMER_CREATEDDATE_MONTH' in df.columns:
-    df['CUSTOMER_CREATEDDATE_MONTH'] = df['CUSTOMER_CREATEDDATE_MONTH'].astype(str)
+# 기본 리스트 준비 (행 데이터 대신 집계 큐브에서 계산)
+country_list = dimension_values(cube, 'country')
+service_list = dimension_values(cube, 'PAYMENT_SERVICE_DIV')
+month_list = dimension_values(cube, 'TRANSACTION_APPROVED_MONTH')
+source_file_list = dimension_values(cube, '_source_file')
 
-# 기본 리스트 준비
-country_list = sorted(df['country'].unique())
-service_list = sorted(df['PAYMENT_SERVICE_DIV'].unique())
-month_list = sorted(df['TRANSACTION_APPROVED_MONTH'].unique()) if 'TRANSACTION_APPROVED_MONTH' in df.columns else []
-source_file_list = sorted(df['_source_file'].unique()) if '_source_file' in df.columns else []
+# 거래금액 순위 인덱스 (데이터셋 버전별 1회 생성, Top-N 목록은 모두 여기서 조회)
+@st.cache_resource(max_entries=4)
+def build_ranking_index(dataset_key, column, _cube):
+    return RankingIndex(_cube, column)
+
+country_ranking = build_ranking_index(dataset_key, 'country', cube)
+service_ranking = build_ranking_index(dataset_key, 'PAYMENT_SERVICE_DIV', cube)
 
 # Top 10 국가 계산
-top_10_countries = df.groupby('country')['VOLUMN'].sum().nlargest(10).index.tolist()
+top_10_countries = country_ranking.overall.top(10)
+
+# =============================================================================
+# 고객 차원 테이블 + RFM 세그먼트 (데이터셋 버전별 1회 생성, 세그먼트 필터와 무관하게 전체 고객 기준)
+# =============================================================================
+CUSTOMER_TABLE_COLUMNS = ['CUSTOMERID', 'TRANSACTION_APPROVED_MONTH', 'country', 'PAYMENT_SERVICE_DIV', 'VOLUMN', 'TRX_COUNT']
+
+@st.cache_resource(max_entries=2)
+def build_customer_table(dataset_key, _dataset):
+    return CustomerTable(_dataset.select())
+
+@st.cache_resource(max_entries=2)
+def build_rfm_table(dataset_key, _customer_table):
+    return RfmTable(_customer_table)
+
+customer_table = None
+rfm_table = None
+if set(CUSTOMER_TABLE_COLUMNS) <= set(dataset.columns):
+    customer_table = build_customer_table(dataset_key, dataset)
+    rfm_table = build_rfm_table(dataset_key, customer_table)
+    memory_budget.watch('고객 테이블', customer_table)
 
 # =============================================================================
 # 사이드바 - 리디자인
@@ -228,6 +539,100 @@ def reset_filters():
     st.session_state.month_select = month_list.copy()
     if source_file_list:
         st.session_state.source_file_select = source_file_list.copy()
+    st.session_state.segment_select = []
+    st.session_state.drill = {}
+    clear_active_preset()
+
+# =============================================================================
+# 필터 프리셋 (presets.py)
+# - 이름 붙인 필터 조합을 저장해 두고 버튼 한 번으로 사이드바 선택을 바꿈 (모든 사용자 공용)
+# - 연 프리셋은 주소의 ?preset=이름 으로 남아 링크로 공유 가능. 선택을 직접 바꾸면 주소에서 빠짐
+# =============================================================================
+@st.cache_resource
+def get_preset_store():
+    return PresetStore()
+
+preset_store = get_preset_store()
+presets = preset_store.load()
+preset_choices = {
+    'sources': source_file_list, 'countries': country_list, 'services': service_list,
+    'months': month_list, 'segments': RFM_SEGMENTS,
+}
+
+
+def preset_selection(name):
+    return resolve_preset(presets[name], preset_choices, country_ranking.overall.top)
+
+
+def normalized_selection(selection):
+    # 빈 선택은 전체 (필터 적용과 같은 규칙. 세그먼트는 비우면 세그먼트 필터 없음)
+    return {field: frozenset(values or ([] if field == 'segments' else preset_choices[field]))
+            for field, values in selection.items()}
+
+
+def apply_preset(name):
+    selection = preset_selection(name)
+    if source_file_list:
+        st.session_state.source_file_select = selection['sources']
+    st.session_state.country_select = selection['countries']
+    st.session_state.service_select = selection['services']
+    st.session_state.month_select = selection['months']
+    st.session_state.segment_select = selection['segments']
+    st.session_state.drill = {}
+    st.session_state.active_preset = name
+    st.query_params['preset'] = name
+
+
+def clear_active_preset():
+    st.session_state.active_preset = None
+    if 'preset' in st.query_params:
+        del st.query_params['preset']
+
+
+def save_preset():
+    name = st.session_state.get('preset_name', '').strip()
+    if not name:
+        st.session_state.preset_message = ('warning', "프리셋 이름을 입력하세요")
+        return
+    selection = {
+        'sources': st.session_state.get('source_file_select', source_file_list),
+        'countries': st.session_state.get('country_select', top_10_countries),
+        'services': st.session_state.get('service_select', service_list),
+        'months': st.session_state.get('month_select', month_list),
+        'segments': st.session_state.get('segment_select', []),
+    }
+    try:
+        preset_store.save(name, make_preset(selection, preset_choices, country_ranking.overall.top))
+    except OSError as e:
+        st.session_state.preset_message = ('error', f"프리셋을 저장할 수 없습니다 ({e})")
+        return
+    st.session_state.preset_name = ""
+    st.session_state.active_preset = name
+    st.query_params['preset'] = name
+    st.session_state.preset_message = ('success', f"'{name}' 프리셋을 저장했습니다")
+
+
+def delete_preset():
+    name = st.session_state.get('preset_delete_name')
+    try:
+        preset_store.delete(name)
+    except OSError as e:
+        st.session_state.preset_message = ('error', f"프리셋을 삭제할 수 없습니다 ({e})")
+        return
+    if st.session_state.get('active_preset') == name:
+        clear_active_preset()
+
+
+# 공유 링크로 들어오면 (세션에서 처음 본 ?preset= 값일 때만) 그 프리셋을 적용
+shared_preset = st.query_params.get('preset')
+if shared_preset and st.session_state.get('shared_preset') != shared_preset:
+    st.session_state.shared_preset = shared_preset
+    if shared_preset in presets:
+        apply_preset(shared_preset)
+    else:
+        st.sidebar.warning(f"⚠️ 공유된 프리셋 '{shared_preset}'을(를) 찾을 수 없습니다")
+        clear_active_preset()
+active_preset = st.session_state.get('active_preset')
 
 # --- 소스 파일 필터 섹션 (여러 파일 업로드 시에만 표시) ---
 if len(source_file_list) > 1:
@@ -277,6 +682,18 @@ with preset_col3:
         st.session_state.country_select = []
         st.rerun()
 
+# 저장된 필터 프리셋 (국가뿐 아니라 파일/서비스/기간/세그먼트 선택을 한 번에 바꿈)
+if presets:
+    st.sidebar.caption("⭐ 저장된 필터 프리셋")
+    preset_names = list(presets)
+    for i in range(0, len(preset_names), 2):
+        for col, name in zip(st.sidebar.columns(2), preset_names[i:i + 2]):
+            col.button(
+                name, key=f"preset_apply_{name}", on_click=apply_preset, args=(name,),
+                type="primary" if name == active_preset else "secondary",
+                help=describe_preset(presets[name]), use_container_width=True
+            )
+
 # 국가 멀티셀렉트
 selected_countries = st.sidebar.multiselect(
     "국가 선택",
@@ -339,12 +756,57 @@ if month_list:
 else:
     selected_months = None
 
+# --- RFM 고객 세그먼트 필터 (고객 ID 가 있을 때만) ---
+selected_segments = []
+if rfm_table is not None:
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 👥 고객 세그먼트 (RFM)")
+    st.sidebar.caption("선택한 세그먼트 고객의 거래만 분석합니다 (비우면 전체)")
+    selected_segments = st.sidebar.multiselect(
+        "고객 세그먼트 선택",
+        RFM_SEGMENTS,
+        default=[],
+        key="segment_select",
+        label_visibility="collapsed"
+    )
+
 # --- 전체 초기화 버튼 ---
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 🔄 필터 관리")
 
 st.sidebar.button("🔄 모든 필터 초기화", key="reset_all", use_container_width=True, on_click=reset_filters)
 
+with st.sidebar.expander("⭐ 필터 프리셋 저장 / 삭제"):
+    st.text_input("프리셋 이름", key="preset_name", placeholder="예: APAC Top 10")
+    st.button("💾 현재 필터를 프리셋으로 저장", key="preset_save", on_click=save_preset, use_container_width=True)
+    if presets:
+        st.selectbox("삭제할 프리셋", list(presets), key="preset_delete_name")
+        st.button("🗑️ 프리셋 삭제", key="preset_delete", on_click=delete_preset, use_container_width=True)
+    preset_message = st.session_state.pop('preset_message', None)
+    if preset_message:
+        getattr(st, preset_message[0])(preset_message[1])
+    st.caption("Top N 국가 / 최근 N개월 선택은 규칙으로 저장되어 데이터가 바뀌면 다시 계산됩니다. 프리셋을 열면 주소(?preset=이름)로 공유할 수 있습니다.")
+
+# 탐색 모드: KPI / Top 5 / 최근 트렌드를 층화 표본 추정값으로 먼저 보여주고 정확한 값은 백그라운드에서 계산
+exploration_mode = st.sidebar.toggle(
+    "🔍 탐색 모드 (표본 근사)",
+    key="exploration_mode",
+    help="필터를 자주 바꾸며 살펴볼 때 사용합니다. 국가 x 거래월 층화 표본으로 추정값(± 95% 신뢰구간)을 바로 보여주고, 정확한 값이 준비되면 자동으로 바꿔 표시합니다."
+)
+
+# 표시 통화: 집계는 기준 통화로 해 두고 화면에 그릴 때 배수 하나만 곱함 (다시 읽거나 집계하지 않음)
+display_currency = None
+display_factor = 1.0
+if fx_table is not None:
+    display_currency = st.sidebar.selectbox(
+        "💱 표시 통화",
+        fx_table.display_currencies(),
+        key="display_currency",
+        help=f"거래금액은 거래월 환율로 {fx_table.base} 환산해 합산합니다. 다른 통화는 해당 통화의 최근 환율로 바꿔 표시합니다."
+    )
+    display_factor = fx_table.display_factor(display_currency)
+currency_label = f" ({display_currency})" if display_currency else ""
+
 # --- 선택 현황 요약 표시 ---
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📋 현재 선택 요약")
@@ -393,56 +855,169 @@ if not selected_services:
 if not selected_sources:
     selected_sources = source_file_list
 
-filtered_df = df[
-    (df['country'].isin(selected_countries)) &
-    (df['PAYMENT_SERVICE_DIV'].isin(selected_services))
-]
+# 프리셋을 연 뒤 사이드바 선택을 직접 바꾸면 프리셋 표시/공유 주소를 해제
+if active_preset:
+    if active_preset not in presets:
+        clear_active_preset()
+    else:
+        current = {'sources': selected_sources, 'countries': selected_countries, 'services': selected_services,
+                   'months': selected_months, 'segments': selected_segments}
+        if normalized_selection(preset_selection(active_preset)) != normalized_selection(current):
+            clear_active_preset()
 
-# 소스 파일 필터 적용
-if selected_sources and '_source_file' in df.columns:
-    filtered_df = filtered_df[filtered_df['_source_file'].isin(selected_sources)]
+# 차트 드릴다운: 막대를 클릭하면 그 국가/서비스로 사이드바 선택 안에서 범위를 더 좁힘
+# 좁힌 선택은 아래 사이드바 필터와 같은 경로(큐브 필터, 순위 색인, 파티션 색인)로 처리되므로
+# 드릴다운할 때마다 행 데이터를 다시 훑지 않음
+DRILL_LABELS = {'country': '국가', 'PAYMENT_SERVICE_DIV': '서비스'}
 
-if selected_months and 'TRANSACTION_APPROVED_MONTH' in df.columns:
-    filtered_df = filtered_df[filtered_df['TRANSACTION_APPROVED_MONTH'].isin(selected_months)]
 
-# =============================================================================
-# 탭 구성
-# =============================================================================
-tab1, tab2, tab3, tab4 = st.tabs(["📈 Overview", "📊 상세분석", "📉 트렌드", "📥 데이터"])
+def drill_on_select(key, columns):
+    # 차트 선택 콜백: 선택한 막대의 customdata(columns 순서) 값으로 드릴다운. 선택 해제는 무시
+    points = st.session_state[key]['selection']['points']
+    for i, column in enumerate(columns):
+        values = sorted({p['customdata'][i] for p in points if len(p.get('customdata') or []) > i})
+        if values:
+            drill_to(column, values)
 
-# =============================================================================
-# Tab 1: Overview (Enhanced)
-# =============================================================================
-with tab1:
-    # =========================================================================
-    # Section 1: 핵심 KPI (8개 - 2행 4열)
-    # =========================================================================
-    st.markdown("### 📌 핵심 성과 지표 (KPI)")
 
-    # KPI 계산
-    total_vol = filtered_df['VOLUMN'].sum()
-    total_trx = filtered_df['TRX_COUNT'].sum()
-    avg_vol = total_vol / len(filtered_df) if len(filtered_df) > 0 else 0
-    per_trx_avg = total_vol / total_trx if total_trx > 0 else 0
-    top_country = filtered_df.groupby('country')['VOLUMN'].sum().idxmax() if not filtered_df.empty else "-"
-    unique_customers = filtered_df['CUSTOMERID'].nunique() if 'CUSTOMERID' in filtered_df.columns else 0
-    top_service = filtered_df.groupby('PAYMENT_SERVICE_DIV')['VOLUMN'].sum().idxmax() if not filtered_df.empty else "-"
-    unique_countries = filtered_df['country'].nunique() if not filtered_df.empty else 0
+def drill_chart(fig, key, columns):
+    """드릴다운 가능한 막대 차트 (막대의 customdata 가 columns 값)"""
+    st.plotly_chart(fig, use_container_width=True, key=key, selection_mode="points",
+                    on_select=lambda: drill_on_select(key, columns))
 
-    # 증감율 계산
-    vol_delta = None
-    trx_delta = None
-    customer_delta = None
-    mom_growth = None
 
-    if 'TRANSACTION_APPROVED_MONTH' in filtered_df.columns and len(filtered_df) > 0:
-        months = sorted(filtered_df['TRANSACTION_APPROVED_MONTH'].unique())
+def drill_to(column, values):
+    st.session_state.drill = {**st.session_state.get('drill', {}), column: list(values)}
+
+
+def clear_drill(column=None):
+    drill = dict(st.session_state.get('drill', {}))
+    if column is None:
+        drill.clear()
+    else:
+        drill.pop(column, None)
+    st.session_state.drill = drill
+
+
+drill = st.session_state.get('drill', {})
+for column, values in list(drill.items()):
+    current = selected_countries if column == 'country' else selected_services
+    narrowed = [v for v in current if v in set(values)]
+    if not narrowed:
+        # 사이드바에서 빠진 값으로 드릴다운한 상태면 해제
+        clear_drill(column)
+    elif column == 'country':
+        selected_countries = narrowed
+    else:
+        selected_services = narrowed
+drill = st.session_state.get('drill', {})
+
+data_columns = dataset.columns
+
+# RFM 세그먼트 필터: 세그먼트 고객의 행만 남긴 파티션/큐브/스케치 (세그먼트 조합별로 한 번 만들어 캐시)
+# 이후 필터/섹션/순위는 이 데이터셋을 전체 데이터처럼 사용 (캐시 키도 세그먼트별로 분리)
+@st.cache_resource(max_entries=4)
+def restrict_to_segments(dataset_key, segments, _dataset, _rfm_table):
+    files, cubes, sketches, rows = {}, [], [], {}
+    for name, parts in _dataset.files.items():
+        files[name], rows[name] = {}, 0
+        for month, part in parts.items():
+            frame = _dataset.select([name], [month])
+            frame = frame[_rfm_table.row_mask(frame, segments)].reset_index(drop=True)
+            files[name][month] = memory_budget.put(f"rfm/{dataset_key}/{'+'.join(segments)}/{name}/{month}", frame)
+            cubes.append(build_cube(frame))
+            sketches.append(build_sketch_cube(frame))
+            rows[name] += len(frame)
+    return PartitionedFrame(files, loader=memory_budget.load, file_rows=rows), merge_cubes(cubes), merge_cubes(sketches)
+
+# 세그먼트 필터 전 데이터셋 (프리셋 뷰 계산용)
+base_dataset, base_cube, base_key = dataset, cube, dataset_key
+
+segment_scope = None  # RFM 세그먼트 고객 마스크 (고객 테이블 조회 조건)
+if selected_segments:
+    segments = tuple(seg for seg in RFM_SEGMENTS if seg in selected_segments)
+    with st.spinner("세그먼트 데이터 준비 중..."):
+        restricted = restrict_to_segments(dataset_key, segments, dataset, rfm_table)
+        if not all(in_budget(parts) for parts in restricted[0].files.values()):
+            restrict_to_segments.clear()
+            restricted = restrict_to_segments(dataset_key, segments, dataset, rfm_table)
+        dataset, cube, sketch_cube = restricted
+    dataset_key = f"{dataset_key}:rfm-{'+'.join(segments)}"
+    country_ranking = build_ranking_index(dataset_key, 'country', cube)
+    service_ranking = build_ranking_index(dataset_key, 'PAYMENT_SERVICE_DIV', cube)
+    segment_scope = rfm_table.mask(segments)
+
+# 같은 필터를 큐브/스케치에도 적용 (행 데이터를 다시 보지 않는 집계용)
+month_filter = list(selected_months) if selected_months else None
+filtered_cube = filter_cube(cube, selected_sources, selected_countries, selected_services, month_filter)
+filtered_sketch_cube = filter_cube(sketch_cube, selected_sources, selected_countries, selected_services, month_filter)
+filtered_empty = filtered_cube.empty
+
+# 현재 필터의 국가/서비스 순위 (탭별 Top 5/9/10/15 목록이 같은 뷰를 공유)
+country_rank = country_ranking.view(
+    selected_countries, _source_file=selected_sources,
+    PAYMENT_SERVICE_DIV=selected_services, TRANSACTION_APPROVED_MONTH=month_filter
+)
+service_rank = service_ranking.view(
+    selected_services, _source_file=selected_sources,
+    country=selected_countries, TRANSACTION_APPROVED_MONTH=month_filter
+)
+
+# 데이터셋 버전 + 필터 조합 (분석 결과 캐시 키)
+def make_filter_signature(key, sources, countries, services, months):
+    return (
+        key,
+        tuple(sorted(sources)),
+        tuple(sorted(countries)),
+        tuple(sorted(services)),
+        tuple(sorted(months or []))
+    )
+
+filter_signature = make_filter_signature(dataset_key, selected_sources, selected_countries, selected_services, selected_months)
+
+# 제한되지 않은 차원은 None (고객 테이블 조회 조건)
+month_scope = list(selected_months) if selected_months and set(selected_months) != set(month_list) else None
+country_scope = list(selected_countries) if set(selected_countries) != set(country_list) else None
+service_scope = list(selected_services) if set(selected_services) != set(service_list) else None
+all_sources_selected = set(selected_sources) == set(source_file_list)
+
+
+def table_customer_count(months=month_scope):
+    # 고객 테이블로 정확히 답할 수 있으면 고유 고객 수, 아니면 None
+    if customer_table is not None and all_sources_selected:
+        return customer_table.count_active(months=months, countries=country_scope, services=service_scope,
+                                           within=segment_scope)
+    return None
+
+
+def count_unique_customers(frame, months=month_scope):
+    # 고객 테이블로 정확히 답할 수 있으면 행 데이터를 다시 세지 않음
+    count = table_customer_count(months)
+    if count is not None:
+        return count
+    return nunique(frame, 'CUSTOMERID')
+
+
+def kpi_values(frame, count_customers=count_unique_customers):
+    """핵심 KPI (행 데이터 기준 정확한 값). count_customers(행, months=...) 는 고유 고객 수"""
+    kpis = {
+        'total_vol': frame['VOLUMN'].sum(),
+        'total_trx': frame['TRX_COUNT'].sum(),
+        'unique_customers': count_customers(frame) if 'CUSTOMERID' in frame.columns else 0,
+        'unique_countries': nunique(frame, 'country') if not frame.empty else 0,
+        'vol_delta': None, 'trx_delta': None, 'customer_delta': None, 'mom_growth': None,
+    }
+    kpis['per_trx_avg'] = kpis['total_vol'] / kpis['total_trx'] if kpis['total_trx'] > 0 else 0
+
+    # 증감율 계산
+    if 'TRANSACTION_APPROVED_MONTH' in frame.columns and len(frame) > 0:
+        months = sorted(frame['TRANSACTION_APPROVED_MONTH'].unique())
         if len(months) >= 2:
             latest_month = months[-1]
             prev_month = months[-2]
 
-            current_data = filtered_df[filtered_df['TRANSACTION_APPROVED_MONTH'] == latest_month]
-            prev_data = filtered_df[filtered_df['TRANSACTION_APPROVED_MONTH'] == prev_month]
+            current_data = frame[frame['TRANSACTION_APPROVED_MONTH'] == latest_month]
+            prev_data = frame[frame['TRANSACTION_APPROVED_MONTH'] == prev_month]
 
             current_vol = current_data['VOLUMN'].sum()
             prev_vol = prev_data['VOLUMN'].sum()
@@ -450,24 +1025,267 @@ with tab1:
             prev_trx = prev_data['TRX_COUNT'].sum()
 
             if prev_vol > 0:
-                vol_delta = f"{((current_vol - prev_vol) / prev_vol) * 100:.1f}%"
-                mom_growth = ((current_vol - prev_vol) / prev_vol) * 100
+                kpis['vol_delta'] = f"{((current_vol - prev_vol) / prev_vol) * 100:.1f}%"
+                kpis['mom_growth'] = ((current_vol - prev_vol) / prev_vol) * 100
             if prev_trx > 0:
-                trx_delta = f"{((current_trx - prev_trx) / prev_trx) * 100:.1f}%"
+                kpis['trx_delta'] = f"{((current_trx - prev_trx) / prev_trx) * 100:.1f}%"
 
             # 고객 증감율
-            if 'CUSTOMERID' in filtered_df.columns:
-                current_customers = current_data['CUSTOMERID'].nunique()
-                prev_customers = prev_data['CUSTOMERID'].nunique()
+            if 'CUSTOMERID' in frame.columns:
+                current_customers = count_customers(current_data, months=[latest_month])
+                prev_customers = count_customers(prev_data, months=[prev_month])
                 if prev_customers > 0:
-                    customer_delta = f"{((current_customers - prev_customers) / prev_customers) * 100:.1f}%"
+                    kpis['customer_delta'] = f"{((current_customers - prev_customers) / prev_customers) * 100:.1f}%"
+    return kpis
+
+
+# =============================================================================
+# 백그라운드 섹션 계산
+# - 필터가 정해지면 무거운 집계를 작업 풀에 먼저 제출하고 KPI 부터 그림
+# - 각 섹션은 자기 결과가 준비되는 대로 채워짐
+# - 필터가 바뀌면 이전 필터의 작업 중 아직 시작하지 않은 것은 취소
+# =============================================================================
+@st.cache_resource
+def get_section_executor():
+    return create_executor()
+
+# 섹션 결과 캐시 (프로세스 공용, 용량 한도 초과 시 오래된 결과부터 제거)
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+result_cache = get_result_cache()
+memory_budget.watch('섹션 결과 캐시', result_cache)
+
+def compute_section(signature, name, _frame, _cube):
+    # 합계형 섹션은 필터된 리프 큐브를 롤업 (행 데이터 재집계 없음)
+    # 탐색 모드에서는 _frame 이 행 데이터 작업(Future)이므로 그 결과를 사용
+    source = _cube if section_from_cube(name) else (_frame.result() if isinstance(_frame, Future) else _frame)
+    return result_cache.get_or_compute((signature, name), section_aggregate, name, source)
+
+# =============================================================================
+# 프리셋 뷰 (presets.py)
+# - 저장된 프리셋마다 섹션 결과/이상 징후/KPI 를 데이터셋 버전별로 미리 계산 (전용 워커, 데이터셋이 바뀌면 다시 계산)
+# - 지금 필터가 프리셋과 같으면 미리 계산한 결과를 결과 캐시에 넣어 두므로 아래 섹션 작업이 바로 끝남
+#   KPI 도 뷰에 보관한 값을 그대로 씀 (필터된 행으로 다시 계산하지 않음)
+# - 세그먼트 필터가 있는 프리셋은 데이터셋 자체가 달라지므로 미리 계산하지 않음
+# =============================================================================
+@st.cache_resource
+def get_preset_views():
+    return PresetViews()
+
+preset_views = get_preset_views()
+memory_budget.watch('프리셋 뷰', preset_views)
+
+def materialize_preset(signature, sources, countries, services, months, _dataset, _cube):
+    view_cube = filter_cube(_cube, sources, countries, services, months or None)
+    frame = _dataset.query(sources, countries, services, months)
+    results = {}
+    for name in available_sections(_dataset.columns):
+        results[(signature, name)] = section_aggregate(name, view_cube if section_from_cube(name) else frame)
+    # 고객 테이블 조회 조건은 지금 화면의 필터이므로 고객 수는 프리셋 필터의 행으로 셈
+    results[(signature, 'kpi')] = kpi_values(frame, lambda rows, months=None: nunique(rows, 'CUSTOMERID'))
+    if 'TRANSACTION_APPROVED_MONTH' in view_cube.columns and not view_cube.empty:
+        for level, keys in ANOMALY_LEVELS.items():
+            results[(signature, 'anomalies', level)] = detect_anomalies(view_cube, keys)
+    return results
+
+preset_requests = {}
+for name in presets:
+    selection = preset_selection(name)
+    if selection['segments']:
+        continue
+    # 빈 선택은 전체 (필터 적용과 같은 규칙)
+    args = (selection['sources'] or source_file_list, selection['countries'] or country_list,
+            selection['services'] or service_list, selection['months'] if month_list else None)
+    preset_requests[make_filter_signature(base_key, *args)] = args + (base_dataset, base_cube)
+preset_views.refresh(base_key, preset_requests, materialize_preset)
+preset_view_used = preset_views.seed(filter_signature, result_cache)
+
+section_jobs = st.session_state.get('section_jobs')
+if section_jobs is None or section_jobs.signature != filter_signature:
+    if section_jobs is not None:
+        section_jobs.cancel()
+    section_jobs = SectionJobs(get_section_executor(), filter_signature)
+    st.session_state.section_jobs = section_jobs
+
+# 필터된 행 데이터. 파티션 단위로 먼저 고르고(선택되지 않은 파티션은 건드리지 않음) 국가/서비스 마스크 적용
+# 탐색 모드에서는 화면을 막지 않도록 백그라운드 작업으로 만들고, 준비되기 전까지 filtered_df 는 None
+if exploration_mode:
+    rows_job = section_jobs.submit('rows', dataset.query, selected_sources, selected_countries, selected_services, selected_months)
+    filtered_df = rows_job.result() if rows_job.done() else None
+else:
+    rows_job = None
+    filtered_df = dataset.query(selected_sources, selected_countries, selected_services, selected_months)
+
+# 공유 집계 서비스 (DASHBOARD_AGG_SERVICE 지정 시, 누적 데이터셋 모드에서만 사용)
+@st.cache_resource
+def get_aggregate_client():
+    return client_from_env()
+
+# 서비스는 저장소 파일을 그대로 읽으므로 파일 간 중복 행이 빠졌거나 세그먼트 필터가 있으면 이 프로세스에서 계산
+aggregate_client = get_aggregate_client() if use_store and not deduped_files and not selected_segments else None
+filter_spec = make_spec(selected_sources, selected_countries, selected_services, selected_months or None)
+
+def compute_section_shared(signature, name, version, spec, _frame, _cube):
+    # 서비스에 연결할 수 없거나 서비스의 저장소가 다른 버전이면 이 프로세스에서 직접 계산
+    try:
+        return result_cache.get_or_compute((signature, name), aggregate_client.aggregate, version, spec, name)
+    except (OSError, EOFError, StaleVersionError):
+        return compute_section(signature, name, _frame, _cube)
+
+for section_name in available_sections(data_columns):
+    # 큐브 롤업은 이 프로세스에서 바로 끝나므로 행 데이터가 필요한 섹션만 서비스로 보냄
+    if aggregate_client is not None and not section_from_cube(section_name):
+        section_jobs.submit(section_name, compute_section_shared, filter_signature, section_name,
+                            store_version, filter_spec, rows_job or filtered_df, filtered_cube)
+    else:
+        section_jobs.submit(section_name, compute_section, filter_signature, section_name,
+                            rows_job or filtered_df, filtered_cube)
+
+def section_result(name):
+    # 결과가 아직 없으면 해당 섹션 자리에서만 대기. 금액은 표시 통화로 (결과 캐시는 기준 통화 그대로)
+    if not section_jobs.done(name):
+        with st.spinner("계산 중..."):
+            return rescale(section_jobs.result(name), display_factor)
+    return rescale(section_jobs.result(name), display_factor)
+
+# =============================================================================
+# 이상 징후 (필터된 큐브에서 계열 단위로 일괄 점수화, 필터 조합별 캐시)
+# =============================================================================
+def anomaly_result(level):
+    result = result_cache.get_or_compute(
+        (filter_signature, 'anomalies', level), detect_anomalies, filtered_cube, ANOMALY_LEVELS[level]
+    )
+    return rescale(result, display_factor, ('값', '기준값'))
+
+# =============================================================================
+# 탐색 모드 (sampling.py)
+# - 층화 표본은 데이터셋 버전별 1회 생성, 필터 변경 시에는 표본 안에서만 추정
+# - KPI 의 정확한 값은 행 데이터 작업이 끝난 뒤 백그라운드에서 계산해 두고 다음 실행에서 교체
+# =============================================================================
+@st.cache_resource(max_entries=2)
+def build_sample(dataset_key, _dataset, _cube):
+    parts = (_dataset.select([name], [month]) for name, months in _dataset.files.items() for month in months)
+    return StratifiedSample(parts, _cube)
+
+
+def kpi_estimates(view):
+    """탐색 모드 KPI (표본 추정값, *_ci 는 95% 신뢰구간 반폭). 고객 수는 고객 테이블로 정확히 셀 수 있을 때만"""
+    kpis = {'vol_delta': None, 'trx_delta': None, 'customer_delta': None, 'mom_growth': None}
+    kpis['total_vol'], kpis['total_vol_ci'] = view.total('VOLUMN')
+    kpis['total_trx'], kpis['total_trx_ci'] = view.total('TRX_COUNT')
+    kpis['per_trx_avg'], kpis['per_trx_avg_ci'] = view.ratio('VOLUMN', 'TRX_COUNT')
+    kpis['unique_customers'] = table_customer_count()
+    # 필터 안의 국가/거래월 목록은 큐브로 정확히 구함
+    kpis['unique_countries'] = filtered_cube['country'].nunique()
+
+    months = dimension_values(filtered_cube, 'TRANSACTION_APPROVED_MONTH')
+    if len(months) >= 2:
+        latest_month, prev_month = months[-1], months[-2]
+        latest_rows = view.where('TRANSACTION_APPROVED_MONTH', latest_month)
+        prev_rows = view.where('TRANSACTION_APPROVED_MONTH', prev_month)
+        vol_ratio, vol_ratio_ci = view.ratio(('VOLUMN', latest_rows), ('VOLUMN', prev_rows))
+        trx_ratio, trx_ratio_ci = view.ratio(('TRX_COUNT', latest_rows), ('TRX_COUNT', prev_rows))
+        if not np.isnan(vol_ratio):
+            kpis['mom_growth'], kpis['mom_growth_ci'] = (vol_ratio - 1) * 100, vol_ratio_ci * 100
+            kpis['vol_delta'] = f"{kpis['mom_growth']:.1f}% ±{kpis['mom_growth_ci']:.1f}%p"
+        if not np.isnan(trx_ratio):
+            kpis['trx_delta'] = f"{(trx_ratio - 1) * 100:.1f}% ±{trx_ratio_ci * 100:.1f}%p"
+        current_customers = table_customer_count([latest_month])
+        prev_customers = table_customer_count([prev_month])
+        if current_customers is not None and prev_customers:
+            kpis['customer_delta'] = f"{((current_customers - prev_customers) / prev_customers) * 100:.1f}%"
+    return kpis
+
+
+def exact_kpis(rows_job):
+    return kpi_values(rows_job.result())
+
+
+sample_view = None
+if exploration_mode:
+    section_jobs.submit('kpi', exact_kpis, rows_job)
+    with st.spinner("탐색용 표본 준비 중..."):
+        sample = build_sample(dataset_key, dataset, cube)
+    memory_budget.watch('탐색 표본', sample)
+    sample_view = sample.view(selected_sources, selected_countries, selected_services, selected_months)
+
+
+def estimating(name):
+    # 탐색 모드에서 정확한 결과가 아직 없으면 표본 추정값을 표시
+    return exploration_mode and not section_jobs.done(name)
+
+
+# 정확한 값이 준비되면 전체 화면을 다시 그려 추정값을 교체 (1초 간격 확인)
+@st.fragment(run_every=1)
+def watch_exact_results(names):
+    pending = [name for name in names if not section_jobs.done(name)]
+    if not pending:
+        st.rerun()
+    st.caption(f"🔍 탐색 모드: 표본 {len(sample):,}행 기준 추정값 (± 95% 신뢰구간) · 정확한 값 계산 중...")
+
+# 드릴다운 경로 (해제 버튼)
+if drill:
+    crumbs = " › ".join(f"{DRILL_LABELS[c]} {', '.join(map(str, v))}" for c, v in drill.items())
+    crumb_col, *clear_cols = st.columns([6] + [1] * (len(drill) + 1))
+    crumb_col.info(f"🔎 드릴다운: {crumbs}")
+    for clear_col, column in zip(clear_cols, drill):
+        clear_col.button(f"{DRILL_LABELS[column]} 해제", key=f"drill_clear_{column}",
+                         on_click=clear_drill, args=(column,), use_container_width=True)
+    clear_cols[-1].button("전체 해제", key="drill_clear_all", on_click=clear_drill, use_container_width=True)
+
+# =============================================================================
+# 탭 구성
+# =============================================================================
+tab1, tab2, tab3, tab4 = st.tabs(["📈 Overview", "📊 상세분석", "📉 트렌드", "📥 데이터"])
+
+# =============================================================================
+# Tab 1: Overview (Enhanced)
+# =============================================================================
+with tab1:
+    # =========================================================================
+    # Section 1: 핵심 KPI (8개 - 2행 4열)
+    # =========================================================================
+    st.markdown("### 📌 핵심 성과 지표 (KPI)")
+
+    # KPI 계산 (프리셋 뷰가 있으면 뷰의 값, 탐색 모드에서 정확한 값이 아직 없으면 표본 추정값)
+    preset_kpis = preset_views.result(filter_signature, 'kpi') if preset_view_used else None
+    kpi_estimated = preset_kpis is None and estimating('kpi')
+    if preset_kpis is not None:
+        kpis = preset_kpis
+    elif kpi_estimated:
+        kpis = kpi_estimates(sample_view)
+    else:
+        kpis = section_jobs.result('kpi') if exploration_mode else kpi_values(filtered_df)
+    kpis = rescale(kpis, display_factor, ('total_vol', 'total_vol_ci', 'per_trx_avg', 'per_trx_avg_ci'))
+    total_vol = kpis['total_vol']
+    total_trx = kpis['total_trx']
+    per_trx_avg = kpis['per_trx_avg']
+    top_country = country_rank.top(1)[0] if not filtered_empty else "-"
+    unique_customers = kpis['unique_customers']
+    top_service = service_rank.top(1)[0] if not filtered_empty else "-"
+    unique_countries = kpis['unique_countries']
+    vol_delta = kpis['vol_delta']
+    trx_delta = kpis['trx_delta']
+    customer_delta = kpis['customer_delta']
+    mom_growth = kpis['mom_growth']
+
+    if exploration_mode and any(estimating(name) for name in ['kpi', 'country_totals', 'service_totals', 'month_totals']):
+        watch_exact_results(['kpi', 'country_totals', 'service_totals', 'month_totals'])
+
+    def with_ci(value, name, fmt="{:,.0f}"):
+        # 추정값이면 95% 신뢰구간 반폭을 함께 표시
+        text = fmt.format(value)
+        return f"{text} ±{fmt.format(kpis[name + '_ci'])}" if kpi_estimated else text
 
     # KPI 카드 표시 - Row 1
     kpi_row1 = st.columns(4)
-    kpi_row1[0].metric("💰 총 거래 금액", f"{total_vol:,.0f}", delta=vol_delta)
-    kpi_row1[1].metric("📊 총 거래 건수", f"{total_trx:,.0f}건", delta=trx_delta)
-    kpi_row1[2].metric("💵 건당 평균 거래액", f"{per_trx_avg:,.0f}")
-    kpi_row1[3].metric("👥 고유 고객 수", f"{unique_customers:,}명", delta=customer_delta)
+    kpi_row1[0].metric(f"💰 총 거래 금액{currency_label}", with_ci(total_vol, 'total_vol'), delta=vol_delta)
+    kpi_row1[1].metric("📊 총 거래 건수", with_ci(total_trx, 'total_trx', "{:,.0f}건"), delta=trx_delta)
+    kpi_row1[2].metric(f"💵 건당 평균 거래액{currency_label}", with_ci(per_trx_avg, 'per_trx_avg'))
+    kpi_row1[3].metric("👥 고유 고객 수", f"{unique_customers:,}명" if unique_customers is not None else "계산 중",
+                       delta=customer_delta)
 
     # KPI 카드 표시 - Row 2
     kpi_row2 = st.columns(4)
@@ -476,10 +1294,31 @@ with tab1:
     kpi_row2[2].metric("🌍 활성 국가 수", f"{unique_countries}개국")
     if mom_growth is not None:
         growth_emoji = "📈" if mom_growth >= 0 else "📉"
-        kpi_row2[3].metric(f"{growth_emoji} MoM 성장률", f"{mom_growth:.1f}%")
+        kpi_row2[3].metric(f"{growth_emoji} MoM 성장률", with_ci(mom_growth, 'mom_growth', "{:.1f}%"))
     else:
         kpi_row2[3].metric("📈 MoM 성장률", "-")
 
+    # 고객 현황 (고객 차원 테이블에서 계산)
+    if customer_table is not None:
+        st.markdown("#### 👥 고객 현황")
+        segment = customer_table.segment(countries=country_scope, services=service_scope)
+        segment &= customer_table.active_in(months=month_scope)
+        if segment_scope is not None:
+            segment &= segment_scope
+        scope_months = sorted(selected_months) if selected_months else month_list
+        customer_summary = customer_table.summary(
+            segment,
+            latest_month=scope_months[-1] if scope_months else None,
+            prev_month=scope_months[-2] if len(scope_months) >= 2 else None
+        )
+        cust_cols = st.columns(5)
+        cust_cols[0].metric("세그먼트 고객 수", f"{customer_summary['customers']:,}명")
+        cust_cols[1].metric("신규 고객 (최근월 첫 거래)", f"{customer_summary.get('new', 0):,}명")
+        cust_cols[2].metric("재방문 고객 (전월·최근월)", f"{customer_summary.get('retained', 0):,}명")
+        cust_cols[3].metric(f"고객당 누적 거래금액{currency_label}", f"{customer_summary['avg_volume'] * display_factor:,.0f}")
+        cust_cols[4].metric("고객당 평균 활동 개월", f"{customer_summary['avg_active_months']:.1f}개월")
+        st.caption("💡 주 이용 국가/서비스(거래금액 기준)가 현재 필터에 속하고 선택 기간에 거래한 고객 기준입니다")
+
     st.divider()
 
     # =========================================================================
@@ -492,39 +1331,52 @@ with tab1:
     # Top 5 국가
     with rank_col1:
         st.markdown("#### 🌍 국가별 거래금액 Top 5")
-        if not filtered_df.empty:
-            top5_countries = filtered_df.groupby('country').agg({
-                'VOLUMN': 'sum',
-                'TRX_COUNT': 'sum'
-            }).sort_values('VOLUMN', ascending=False).head(5).reset_index()
+        if not filtered_empty and estimating('country_totals'):
+            # 표본 추정 순위 (오차 = 95% 신뢰구간 반폭)
+            top5_countries = rescale(sample_view.group_total('VOLUMN', 'country'), display_factor, ('VOLUMN', '오차')).head(5)
+            top5_countries['순위'] = range(1, len(top5_countries) + 1)
+            display_df = top5_countries[['순위', 'country', 'VOLUMN', '오차']].rename(columns={'country': '국가', 'VOLUMN': '거래금액'})
+            st.dataframe(display_df, use_container_width=True, hide_index=True, height=220,
+                         column_config=number_columns({'거래금액': ESTIMATE_FORMAT, '오차': ERROR_FORMAT}))
+        elif not filtered_empty:
+            top5_countries = section_result('country_totals').loc[country_rank.top(5)].reset_index()
             top5_countries['순위'] = range(1, len(top5_countries) + 1)
-            top5_countries['거래금액'] = top5_countries['VOLUMN'].apply(lambda x: f"{x:,.0f}")
-            top5_countries['거래건수'] = top5_countries['TRX_COUNT'].apply(lambda x: f"{x:,.0f}")
 
-            # 스타일링된 테이블
-            display_df = top5_countries[['순위', 'country', '거래금액', '거래건수']].rename(columns={'country': '국가'})
-            st.dataframe(display_df, use_container_width=True, hide_index=True, height=220)
+            # 숫자는 숫자 그대로 넘기고 표시 형식만 지정
+            display_df = top5_countries[['순위', 'country', 'VOLUMN', 'TRX_COUNT']].rename(
+                columns={'country': '국가', 'VOLUMN': '거래금액', 'TRX_COUNT': '거래건수'})
+            st.dataframe(display_df, use_container_width=True, hide_index=True, height=220,
+                         column_config=number_columns({'거래금액': AMOUNT_FORMAT, '거래건수': AMOUNT_FORMAT}))
 
     # Top 5 서비스
     with rank_col2:
         st.markdown("#### 💳 서비스별 거래금액 Top 5")
-        if not filtered_df.empty:
-            top5_services = filtered_df.groupby('PAYMENT_SERVICE_DIV').agg({
-                'VOLUMN': 'sum',
-                'TRX_COUNT': 'sum'
-            }).sort_values('VOLUMN', ascending=False).head(5).reset_index()
+        if not filtered_empty and estimating('service_totals'):
+            top5_services = rescale(sample_view.group_total('VOLUMN', 'PAYMENT_SERVICE_DIV'), display_factor, ('VOLUMN', '오차')).head(5)
+            top5_services['순위'] = range(1, len(top5_services) + 1)
+            top5_services['점유율'] = top5_services['VOLUMN'] / total_vol * 100
+            display_svc = top5_services[['순위', 'PAYMENT_SERVICE_DIV', 'VOLUMN', '오차', '점유율']].rename(
+                columns={'PAYMENT_SERVICE_DIV': '서비스', 'VOLUMN': '거래금액'})
+            st.dataframe(display_svc, use_container_width=True, hide_index=True, height=220,
+                         column_config=number_columns({'거래금액': ESTIMATE_FORMAT, '오차': ERROR_FORMAT, '점유율': PERCENT_FORMAT}))
+        elif not filtered_empty:
+            top5_services = section_result('service_totals').loc[service_rank.top(5)].reset_index()
             top5_services['순위'] = range(1, len(top5_services) + 1)
-            top5_services['거래금액'] = top5_services['VOLUMN'].apply(lambda x: f"{x:,.0f}")
-            top5_services['점유율'] = (top5_services['VOLUMN'] / total_vol * 100).apply(lambda x: f"{x:.1f}%")
+            top5_services['점유율'] = top5_services['VOLUMN'] / total_vol * 100
 
-            display_svc = top5_services[['순위', 'PAYMENT_SERVICE_DIV', '거래금액', '점유율']].rename(columns={'PAYMENT_SERVICE_DIV': '서비스'})
-            st.dataframe(display_svc, use_container_width=True, hide_index=True, height=220)
+            display_svc = top5_services[['순위', 'PAYMENT_SERVICE_DIV', 'VOLUMN', '점유율']].rename(
+                columns={'PAYMENT_SERVICE_DIV': '서비스', 'VOLUMN': '거래금액'})
+            st.dataframe(display_svc, use_container_width=True, hide_index=True, height=220,
+                         column_config=number_columns({'거래금액': AMOUNT_FORMAT, '점유율': PERCENT_FORMAT}))
 
     # 미니 트렌드 스파크라인
     with rank_col3:
         st.markdown("#### 📈 최근 거래 트렌드")
-        if 'TRANSACTION_APPROVED_MONTH' in filtered_df.columns and not filtered_df.empty:
-            monthly_trend = filtered_df.groupby('TRANSACTION_APPROVED_MONTH')['VOLUMN'].sum().reset_index()
+        if 'TRANSACTION_APPROVED_MONTH' in data_columns and not filtered_empty:
+            if estimating('month_totals'):
+                monthly_trend = rescale(sample_view.group_total('VOLUMN', 'TRANSACTION_APPROVED_MONTH'), display_factor, ('VOLUMN', '오차'))
+            else:
+                monthly_trend = section_result('month_totals')['VOLUMN'].reset_index()
             monthly_trend = monthly_trend.sort_values('TRANSACTION_APPROVED_MONTH').tail(6)
 
             if len(monthly_trend) >= 2:
@@ -539,7 +1391,9 @@ with tab1:
                     marker=dict(size=8, color='#667eea'),
                     text=[f"{v/1e6:.1f}M" if v >= 1e6 else f"{v/1e3:.0f}K" for v in monthly_trend['VOLUMN']],
                     textposition='top center',
-                    textfont=dict(size=10)
+                    textfont=dict(size=10),
+                    # 표본 추정값이면 95% 신뢰구간 오차 막대
+                    error_y=dict(type='data', array=monthly_trend['오차'], color='#764ba2') if '오차' in monthly_trend else None
                 ))
                 fig.update_layout(
                     height=200,
@@ -562,23 +1416,21 @@ with tab1:
     # =========================================================================
     st.markdown("### 📊 전월 대비 상세 비교")
 
-    if 'TRANSACTION_APPROVED_MONTH' in filtered_df.columns and len(filtered_df) > 0:
-        months = sorted(filtered_df['TRANSACTION_APPROVED_MONTH'].unique())
+    if 'TRANSACTION_APPROVED_MONTH' in data_columns and not filtered_empty:
+        months = dimension_values(filtered_cube, 'TRANSACTION_APPROVED_MONTH')
         if len(months) >= 2:
             latest_month = months[-1]
             prev_month = months[-2]
 
-            current_data = filtered_df[filtered_df['TRANSACTION_APPROVED_MONTH'] == latest_month]
-            prev_data = filtered_df[filtered_df['TRANSACTION_APPROVED_MONTH'] == prev_month]
-
             compare_col1, compare_col2 = st.columns(2)
 
             # 국가별 성장률 Top 5
             with compare_col1:
                 st.markdown(f"#### 🚀 국가별 성장률 Top 5 ({prev_month} → {latest_month})")
 
-                current_by_country = current_data.groupby('country')['VOLUMN'].sum()
-                prev_by_country = prev_data.groupby('country')['VOLUMN'].sum()
+                country_month = section_result('country_month')['VOLUMN']
+                current_by_country = country_month.xs(latest_month, level='TRANSACTION_APPROVED_MONTH')
+                prev_by_country = country_month.xs(prev_month, level='TRANSACTION_APPROVED_MONTH')
 
                 # 공통 국가만 비교
                 common_countries = set(current_by_country.index) & set(prev_by_country.index)
@@ -605,7 +1457,8 @@ with tab1:
                         orientation='h',
                         color='성장률',
                         color_continuous_scale=['#ff6b6b', '#feca57', '#48dbfb', '#1dd1a1'],
-                        text=growth_df['성장률'].apply(lambda x: f"{x:+.1f}%")
+                        text=growth_df['성장률'].apply(lambda x: f"{x:+.1f}%"),
+                        custom_data=['국가']
                     )
                     fig.update_layout(
                         height=250,
@@ -616,7 +1469,7 @@ with tab1:
                         yaxis_title=""
                     )
                     fig.update_traces(textposition='outside')
-                    st.plotly_chart(fig, use_container_width=True)
+                    drill_chart(fig, "drill_growth", ['country'])
                 else:
                     st.info("비교할 수 있는 데이터가 없습니다")
 
@@ -624,9 +1477,10 @@ with tab1:
             with compare_col2:
                 st.markdown(f"#### 💳 서비스별 전월 대비 ({prev_month} → {latest_month})")
 
-                current_by_svc = current_data.groupby('PAYMENT_SERVICE_DIV')['VOLUMN'].sum().reset_index()
+                service_month = section_result('service_month')
+                current_by_svc = service_month.xs(latest_month, level='TRANSACTION_APPROVED_MONTH').reset_index()
                 current_by_svc.columns = ['서비스', '현재']
-                prev_by_svc = prev_data.groupby('PAYMENT_SERVICE_DIV')['VOLUMN'].sum().reset_index()
+                prev_by_svc = service_month.xs(prev_month, level='TRANSACTION_APPROVED_MONTH').reset_index()
                 prev_by_svc.columns = ['서비스', '이전']
 
                 compare_svc = pd.merge(current_by_svc, prev_by_svc, on='서비스', how='outer').fillna(0)
@@ -638,12 +1492,14 @@ with tab1:
                     name='이전',
                     x=compare_svc['서비스'],
                     y=compare_svc['이전'],
+                    customdata=compare_svc[['서비스']],
                     marker_color='#a4b0be'
                 ))
                 fig.add_trace(go.Bar(
                     name='현재',
                     x=compare_svc['서비스'],
                     y=compare_svc['현재'],
+                    customdata=compare_svc[['서비스']],
                     marker_color='#667eea'
                 ))
                 fig.update_layout(
@@ -654,7 +1510,7 @@ with tab1:
                     xaxis_title="",
                     yaxis_title=""
                 )
-                st.plotly_chart(fig, use_container_width=True)
+                drill_chart(fig, "drill_service_compare", ['PAYMENT_SERVICE_DIV'])
         else:
             st.info("전월 대비 비교를 위해 최소 2개월 이상의 데이터가 필요합니다")
     else:
@@ -662,35 +1518,64 @@ with tab1:
 
     st.divider()
 
+    # =========================================================================
+    # Section 3-1: 이상 징후 탐지 (국가 x 서비스 x 월)
+    # =========================================================================
+    st.markdown("### 🚨 이상 징후 탐지")
+
+    if 'TRANSACTION_APPROVED_MONTH' in filtered_cube.columns and not filtered_empty:
+        anomalies = anomaly_result('country_service')
+        if anomalies.empty:
+            st.success("✅ 현재 필터에서 평소와 크게 다른 월이 발견되지 않았습니다")
+        else:
+            anomaly_col1, anomaly_col2, anomaly_col3 = st.columns(3)
+            anomaly_col1.metric("탐지된 이상 월", f"{len(anomalies):,}건")
+            anomaly_col2.metric("📈 급증", f"{(anomalies['유형'] == '급증').sum():,}건")
+            anomaly_col3.metric("📉 급감", f"{(anomalies['유형'] == '급감').sum():,}건")
+
+            display_anomalies = anomalies.rename(columns={'country': '국가', 'PAYMENT_SERVICE_DIV': '서비스'})
+            display_anomalies = display_anomalies.rename(columns={'값': '거래금액', '기준값': '평소 수준'})
+            anomaly_formats = number_columns({'거래금액': AMOUNT_FORMAT, '평소 수준': AMOUNT_FORMAT, '점수': SIGNED_SCORE_FORMAT})
+
+            st.dataframe(display_anomalies.head(10), use_container_width=True, hide_index=True, column_config=anomaly_formats)
+            if len(display_anomalies) > 10:
+                with st.expander(f"📋 전체 이상 월 목록 보기 ({len(display_anomalies):,}건)"):
+                    st.dataframe(display_anomalies, use_container_width=True, hide_index=True, column_config=anomaly_formats)
+        st.caption("💡 국가 x 서비스별 월 거래금액을 강건 z-점수(중앙값·MAD 기준, |점수| ≥ 3.5)로 평가합니다. 24개월 이상이면 계절 조정 후 평가합니다")
+    else:
+        st.info("시계열 데이터가 없어 이상 징후를 탐지할 수 없습니다")
+
+    st.divider()
+
     # =========================================================================
     # Section 4: 거래금액 분포 분석
+    # - 국가별 합계는 큐브에서. Tier 경계는 국가 합계(국가 수만큼의 작은 배열)의 정확한 분위수,
+    #   거래 단위 백분위는 파티션별 분위수 스케치를 병합해서 계산
     # =========================================================================
     st.markdown("### 📊 거래 분포 분석")
 
+    country_volumes = group_sum(filtered_cube, 'country', 'VOLUMN').sort_values(ascending=False) * display_factor
+
     dist_col1, dist_col2 = st.columns(2)
 
     # 국가별 거래금액 분포 (히스토그램)
     with dist_col1:
         st.markdown("#### 📈 국가별 거래금액 분포")
-        if not filtered_df.empty:
-            country_volumes = filtered_df.groupby('country')['VOLUMN'].sum().reset_index()
-            country_volumes = country_volumes.sort_values('VOLUMN', ascending=False)
-
-            # 구간 분류 (5구간)
-            max_vol = country_volumes['VOLUMN'].max()
-            min_vol = country_volumes['VOLUMN'].min()
-
-            # 로그 스케일로 구간 나누기 (더 의미있는 분포)
-            bins = [0, max_vol * 0.01, max_vol * 0.05, max_vol * 0.2, max_vol * 0.5, max_vol * 1.1]
-            labels = ['하위', '중하위', '중위', '중상위', '상위']
-            country_volumes['구간'] = pd.cut(country_volumes['VOLUMN'], bins=bins, labels=labels, include_lowest=True)
+        if not filtered_empty:
+            # 구간 분류 (최대값 대비 비율, 5구간)
+            max_vol = country_volumes.max()
+            bins = np.array([max_vol * 0.01, max_vol * 0.05, max_vol * 0.2, max_vol * 0.5])
+            labels = np.array(['하위', '중하위', '중위', '중상위', '상위'])
+            band_codes = np.searchsorted(bins, country_volumes.to_numpy(), side='left')
+            country_band = pd.Series(labels[band_codes], index=country_volumes.index)
 
             # 구간별 국가 수 집계
-            dist_summary = country_volumes.groupby('구간', observed=True).agg({
-                'country': 'count',
-                'VOLUMN': 'sum'
-            }).reset_index()
-            dist_summary.columns = ['구간', '국가수', '거래금액']
+            dist_summary = pd.DataFrame({
+                '구간': labels,
+                '국가수': np.bincount(band_codes, minlength=len(labels)),
+                '거래금액': np.bincount(band_codes, weights=country_volumes.to_numpy(), minlength=len(labels))
+            })
+            dist_summary = dist_summary[dist_summary['국가수'] > 0]
 
             # 가로 바 차트
             colors = ['#95a5a6', '#3498db', '#2ecc71', '#f39c12', '#e74c3c']
@@ -716,7 +1601,7 @@ with tab1:
             # 구간별 국가 목록
             with st.expander("📋 구간별 국가 목록 보기"):
                 for label in ['상위', '중상위', '중위', '중하위', '하위']:
-                    countries_in_range = country_volumes[country_volumes['구간'] == label]['country'].tolist()
+                    countries_in_range = country_band.index[country_band == label].tolist()
                     if countries_in_range:
                         emoji = {'상위': '🔴', '중상위': '🟠', '중위': '🟢', '중하위': '🔵', '하위': '⚪'}
                         st.markdown(f"**{emoji.get(label, '')} {label}** ({len(countries_in_range)}개국)")
@@ -725,25 +1610,18 @@ with tab1:
     # 국가 Tier 분류 (가로 바 차트)
     with dist_col2:
         st.markdown("#### 🏅 국가 Tier 분류")
-        if not filtered_df.empty:
-            country_volumes = filtered_df.groupby('country')['VOLUMN'].sum().sort_values(ascending=False)
-
-            # Tier 분류: 상위 10%, 중상위 25%, 중위 35%, 하위 30%
+        if not filtered_empty:
+            # Tier 분류: 거래금액 순위로 국가 수를 나눔 (상위 10%, 다음 25%, 다음 35%, 나머지)
+            # 국가가 적으면 앞 Tier 부터 1개국씩 채우고 남는 국가가 없으면 뒤 Tier 는 0개국
             total_countries = len(country_volumes)
-            tier1_n = max(1, int(total_countries * 0.10))
-            tier2_n = max(1, int(total_countries * 0.25))
-            tier3_n = max(1, int(total_countries * 0.35))
-            tier4_n = total_countries - tier1_n - tier2_n - tier3_n
+            tier_sizes = [max(1, int(total_countries * share)) for share in (0.10, 0.25, 0.35)]
+            tier_bounds = np.append(np.minimum(np.cumsum([0] + tier_sizes), total_countries), total_countries)
+            volume_cumsum = np.concatenate([[0.0], np.cumsum(country_volumes.to_numpy())])
 
             tier_data = {
                 'Tier': ['Tier 1 (상위 10%)', 'Tier 2 (상위 25%)', 'Tier 3 (중위 35%)', 'Tier 4 (하위 30%)'],
-                '국가수': [tier1_n, tier2_n, tier3_n, tier4_n],
-                '거래금액': [
-                    country_volumes.head(tier1_n).sum(),
-                    country_volumes.iloc[tier1_n:tier1_n+tier2_n].sum(),
-                    country_volumes.iloc[tier1_n+tier2_n:tier1_n+tier2_n+tier3_n].sum(),
-                    country_volumes.tail(tier4_n).sum() if tier4_n > 0 else 0
-                ]
+                '국가수': np.diff(tier_bounds),
+                '거래금액': np.diff(volume_cumsum[tier_bounds])
             }
             tier_df = pd.DataFrame(tier_data)
             tier_df['점유율'] = (tier_df['거래금액'] / tier_df['거래금액'].sum() * 100).round(1)
@@ -757,7 +1635,7 @@ with tab1:
                 x=tier_df['거래금액'],
                 orientation='h',
                 marker_color=colors,
-                text=tier_df.apply(lambda row: f"{row['국가수']}개국 | {row['점유율']:.1f}%", axis=1),
+                text=tier_df.apply(lambda row: f"{row['국가수']:.0f}개국 | {row['점유율']:.1f}%", axis=1),
                 textposition='inside',
                 textfont=dict(color='white', size=12, family='Arial Black'),
                 hovertemplate="<b>%{y}</b><br>거래금액: %{x:,.0f}<br>국가수: %{customdata[0]}개<br>점유율: %{customdata[1]:.1f}%<extra></extra>",
@@ -777,19 +1655,61 @@ with tab1:
 
             # Tier별 국가 목록 표시
             with st.expander("📋 Tier별 국가 목록 보기"):
-                tier_countries = {
-                    '🥇 Tier 1': country_volumes.head(tier1_n).index.tolist(),
-                    '🥈 Tier 2': country_volumes.iloc[tier1_n:tier1_n+tier2_n].index.tolist(),
-                    '🥉 Tier 3': country_volumes.iloc[tier1_n+tier2_n:tier1_n+tier2_n+tier3_n].index.tolist(),
-                    '📊 Tier 4': country_volumes.tail(tier4_n).index.tolist() if tier4_n > 0 else []
-                }
-
-                for tier_name, countries in tier_countries.items():
+                tier_names = ['🥇 Tier 1', '🥈 Tier 2', '🥉 Tier 3', '📊 Tier 4']
+                for code, tier_name in enumerate(tier_names):
+                    countries = country_volumes.index[tier_bounds[code]:tier_bounds[code + 1]].tolist()
                     if countries:
                         st.markdown(f"**{tier_name}** ({len(countries)}개국)")
                         st.caption(", ".join(countries))
 
-            st.caption(f"💡 총 {total_countries}개 국가를 거래금액 기준으로 4개 Tier로 분류")
+            st.caption(f"💡 총 {total_countries}개 국가를 거래금액 순위 기준으로 4개 Tier로 분류")
+
+    # 거래 레코드당 금액 백분위 (리프별 스케치 병합)
+    st.markdown("#### 💵 거래 레코드당 금액 백분위")
+    record_sketch = sketch_from_cube(filtered_sketch_cube)
+    if record_sketch.count > 0:
+        percentiles = [0.10, 0.25, 0.50, 0.75, 0.90, 0.99]
+        percentile_values = record_sketch.quantile(percentiles) * display_factor
+        pct_cols = st.columns(len(percentiles))
+        for col, q, value in zip(pct_cols, percentiles, percentile_values):
+            col.metric(f"P{q * 100:.0f}", f"{value:,.0f}")
+
+        # 거래금액 상위 10개국의 백분위 밴드 (P25~P75 막대, P50/P90 표시)
+        country_sketches = sketches_by(filtered_sketch_cube, 'country')
+        band_rows = []
+        for country in country_volumes.head(10).index:
+            if country in country_sketches:
+                p25, p50, p75, p90 = country_sketches[country].quantile([0.25, 0.50, 0.75, 0.90]) * display_factor
+                band_rows.append({'국가': country, 'P25': p25, 'P50': p50, 'P75': p75, 'P90': p90})
+        if band_rows:
+            band_df = pd.DataFrame(band_rows)
+            fig = go.Figure()
+            fig.add_trace(go.Bar(
+                y=band_df['국가'],
+                x=band_df['P75'] - band_df['P25'],
+                base=band_df['P25'],
+                orientation='h',
+                name='P25~P75',
+                marker_color='rgba(102, 126, 234, 0.5)'
+            ))
+            fig.add_trace(go.Scatter(
+                y=band_df['국가'], x=band_df['P50'], mode='markers', name='중앙값 (P50)',
+                marker=dict(color='#667eea', size=10, symbol='line-ns-open', line=dict(width=3))
+            ))
+            fig.add_trace(go.Scatter(
+                y=band_df['국가'], x=band_df['P90'], mode='markers', name='P90',
+                marker=dict(color='#e74c3c', size=8, symbol='diamond')
+            ))
+            fig.update_layout(
+                height=320,
+                margin=dict(l=10, r=10, t=10, b=10),
+                yaxis=dict(categoryorder='array', categoryarray=band_df['국가'].tolist()[::-1]),
+                legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+                xaxis_title="거래 레코드당 금액"
+            )
+            fig.update_xaxes(tickformat=",")
+            st.plotly_chart(fig, use_container_width=True)
+        st.caption("💡 파일·국가·서비스·월별로 미리 만든 분위수 스케치를 합쳐 계산한 근사값입니다 (상대오차 약 1%)")
 
     st.divider()
 
@@ -802,8 +1722,8 @@ with tab1:
 
     with col1:
         st.subheader("🌍 국가별 거래 금액 (Top 10)")
-        if not filtered_df.empty:
-            country_vol = filtered_df.groupby('country')['VOLUMN'].sum().sort_values(ascending=False).head(10).reset_index()
+        if not filtered_empty:
+            country_vol = section_result('country_totals')['VOLUMN'].loc[country_rank.top(10)].reset_index()
             fig = px.bar(
                 country_vol,
                 x='country',
@@ -811,16 +1731,18 @@ with tab1:
                 color='VOLUMN',
                 color_continuous_scale='Blues',
                 template='plotly_white',
-                text=country_vol['VOLUMN'].apply(lambda x: f"{x/1e6:.1f}M" if x >= 1e6 else f"{x/1e3:.0f}K")
+                text=country_vol['VOLUMN'].apply(lambda x: f"{x/1e6:.1f}M" if x >= 1e6 else f"{x/1e3:.0f}K"),
+                custom_data=['country']
             )
             fig.update_layout(showlegend=False, coloraxis_showscale=False, height=350)
             fig.update_traces(textposition='outside')
-            st.plotly_chart(fig, use_container_width=True)
+            drill_chart(fig, "drill_country_top10", ['country'])
+            st.caption("💡 막대를 클릭하면 해당 국가로 드릴다운합니다")
 
     with col2:
         st.subheader("💳 서비스 점유율")
-        if not filtered_df.empty:
-            service_vol = filtered_df.groupby('PAYMENT_SERVICE_DIV')['VOLUMN'].sum().reset_index()
+        if not filtered_empty:
+            service_vol = section_result('service_totals')['VOLUMN'].reset_index()
             fig = px.pie(
                 service_vol,
                 values='VOLUMN',
@@ -838,12 +1760,14 @@ with tab1:
 with tab2:
     st.markdown("### 🔥 서비스별 국가 거래 현황")
 
-    if not filtered_df.empty:
-        top_countries_chart = filtered_df.groupby('country')['VOLUMN'].sum().nlargest(15).index.tolist()
-        heatmap_df = filtered_df[filtered_df['country'].isin(top_countries_chart)]
+    if not filtered_empty:
+        # 국가 x 서비스 합계 하나로 이 탭의 모든 차트를 그림
+        country_service = section_result('country_service')
+        top_countries_chart = country_rank.top(15)
+        heatmap_cs = country_service[country_service.index.get_level_values('country').isin(top_countries_chart)]
 
         # 서비스 타입 목록
-        service_types = sorted(heatmap_df['PAYMENT_SERVICE_DIV'].unique())
+        service_types = sorted(heatmap_cs.index.get_level_values('PAYMENT_SERVICE_DIV').unique())
 
         # 색상 팔레트
         colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8']
@@ -862,8 +1786,8 @@ with tab2:
 
                     with cols[col_idx]:
                         # 해당 서비스 데이터 필터링
-                        svc_data = heatmap_df[heatmap_df['PAYMENT_SERVICE_DIV'] == service]
-                        svc_by_country = svc_data.groupby('country')['VOLUMN'].sum().sort_values(ascending=True).tail(10).reset_index()
+                        svc_by_country = heatmap_cs.xs(service, level='PAYMENT_SERVICE_DIV').sort_values(ascending=True).tail(10).reset_index()
+                        svc_by_country['PAYMENT_SERVICE_DIV'] = service
 
                         # 서비스별 바차트
                         fig = px.bar(
@@ -872,7 +1796,8 @@ with tab2:
                             y='country',
                             orientation='h',
                             title=f"💳 {service}",
-                            color_discrete_sequence=[color]
+                            color_discrete_sequence=[color],
+                            custom_data=['country', 'PAYMENT_SERVICE_DIV']
                         )
                         fig.update_layout(
                             height=300,
@@ -883,19 +1808,13 @@ with tab2:
                             title_font_size=14
                         )
                         fig.update_xaxes(tickformat=",")
-                        st.plotly_chart(fig, use_container_width=True)
+                        drill_chart(fig, f"drill_service_{svc_idx}", ['country', 'PAYMENT_SERVICE_DIV'])
 
-        st.caption("💡 각 서비스별 Top 10 국가의 거래금액을 표시합니다")
+        st.caption("💡 각 서비스별 Top 10 국가의 거래금액을 표시합니다 (막대를 클릭하면 해당 국가 x 서비스로 드릴다운)")
 
         # 전체 히트맵 (접기)
         with st.expander("📊 전체 히트맵 보기"):
-            pivot = heatmap_df.pivot_table(
-                values='VOLUMN',
-                index='country',
-                columns='PAYMENT_SERVICE_DIV',
-                aggfunc='sum',
-                fill_value=0
-            )
+            pivot = heatmap_cs.unstack(fill_value=0)
 
             # 로그 스케일 적용
             pivot_log = np.log1p(pivot)
@@ -923,9 +1842,9 @@ with tab2:
     # --- 국가별 개별 트리맵 ---
     st.markdown("### 🌳 국가별 서비스 구성 트리맵")
 
-    if not filtered_df.empty:
+    if not filtered_empty:
         # Top 9 국가 선택 (3x3 그리드)
-        top_9_countries = filtered_df.groupby('country')['VOLUMN'].sum().nlargest(9).index.tolist()
+        top_9_countries = country_rank.top(9)
 
         # 색상 팔레트
         treemap_colors = ['Blues', 'Greens', 'Oranges', 'Purples', 'Reds', 'YlOrBr', 'BuGn', 'PuRd', 'YlGn']
@@ -944,8 +1863,7 @@ with tab2:
 
                     with cols[col_idx]:
                         # 해당 국가 데이터 필터링
-                        country_data = filtered_df[filtered_df['country'] == country]
-                        country_svc = country_data.groupby('PAYMENT_SERVICE_DIV')['VOLUMN'].sum().reset_index()
+                        country_svc = country_service.xs(country, level='country').reset_index()
 
                         if not country_svc.empty:
                             # 국가별 트리맵 (서비스 구성)
@@ -968,12 +1886,15 @@ with tab2:
                                 hovertemplate="<b>%{label}</b><br>거래금액: %{value:,.0f}<br>비율: %{percentRoot:.1%}<extra></extra>"
                             )
                             st.plotly_chart(fig, use_container_width=True)
+                            # 트리맵은 차트 선택 이벤트가 없어 버튼으로 드릴다운
+                            st.button(f"🔎 {country} 드릴다운", key=f"drill_treemap_{country_idx}",
+                                      on_click=drill_to, args=('country', [country]), use_container_width=True)
 
         st.caption("💡 각 국가별 서비스 구성 비율을 트리맵으로 표시합니다 (Top 9 국가)")
 
         # 전체 트리맵 (접기)
         with st.expander("🌳 전체 통합 트리맵 보기"):
-            treemap_data = filtered_df.groupby(['country', 'PAYMENT_SERVICE_DIV'])['VOLUMN'].sum().reset_index()
+            treemap_data = country_service.reset_index()
             treemap_data = treemap_data[treemap_data['country'].isin(top_countries_chart)]
 
             fig = px.treemap(
@@ -990,9 +1911,9 @@ with tab2:
 
     # --- 국가별 서비스 분포 바차트 ---
     st.markdown("### 📊 국가별 서비스 분포")
-    if not filtered_df.empty:
-        stack_data = filtered_df[filtered_df['country'].isin(top_countries_chart[:10])]
-        stack_agg = stack_data.groupby(['country', 'PAYMENT_SERVICE_DIV'])['VOLUMN'].sum().reset_index()
+    if not filtered_empty:
+        stack_agg = country_service.reset_index()
+        stack_agg = stack_agg[stack_agg['country'].isin(top_countries_chart[:10])]
 
         fig = px.bar(
             stack_agg,
@@ -1000,25 +1921,119 @@ with tab2:
             y='VOLUMN',
             color='PAYMENT_SERVICE_DIV',
             template='plotly_white',
-            color_discrete_sequence=px.colors.qualitative.Set2
+            color_discrete_sequence=px.colors.qualitative.Set2,
+            custom_data=['country', 'PAYMENT_SERVICE_DIV']
         )
         fig.update_layout(height=450, legend_title="서비스 타입")
-        st.plotly_chart(fig, use_container_width=True)
+        drill_chart(fig, "drill_country_service", ['country', 'PAYMENT_SERVICE_DIV'])
+
+    # --- RFM 고객 세그먼트 (고객 차원 테이블의 고객별 배열로 계산) ---
+    if rfm_table is not None:
+        st.divider()
+        st.markdown("### 👥 RFM 고객 세그먼트")
+
+        # 고객 현황과 같은 고객 범위: 주 이용 국가/서비스가 필터에 속하고 선택 기간에 거래한 고객
+        rfm_scope = customer_table.segment(countries=country_scope, services=service_scope)
+        rfm_scope &= customer_table.active_in(months=month_scope)
+        if segment_scope is not None:
+            rfm_scope &= segment_scope
+        rfm_summary = rescale(rfm_table.summary(rfm_scope), display_factor, ('거래금액',))
+
+        if rfm_summary.empty:
+            st.info("현재 필터에 해당하는 고객이 없습니다")
+        else:
+            seg_col1, seg_col2 = st.columns(2)
+            with seg_col1:
+                fig = px.bar(
+                    rfm_summary,
+                    x='세그먼트',
+                    y='고객 수',
+                    color='세그먼트',
+                    category_orders={'세그먼트': RFM_SEGMENTS},
+                    color_discrete_sequence=px.colors.qualitative.Set2,
+                    text=rfm_summary['고객 비중'].apply(lambda x: f"{x:.1%}"),
+                    title="세그먼트별 고객 수"
+                )
+                fig.update_layout(height=350, showlegend=False, xaxis_title="", yaxis_title="")
+                fig.update_traces(textposition='outside')
+                st.plotly_chart(fig, use_container_width=True)
+            with seg_col2:
+                fig = px.bar(
+                    rfm_summary,
+                    x='세그먼트',
+                    y='금액 비중',
+                    color='세그먼트',
+                    category_orders={'세그먼트': RFM_SEGMENTS},
+                    color_discrete_sequence=px.colors.qualitative.Set2,
+                    text=rfm_summary['금액 비중'].apply(lambda x: f"{x:.1%}"),
+                    title="세그먼트별 거래금액 비중"
+                )
+                fig.update_layout(height=350, showlegend=False, xaxis_title="", yaxis_title="")
+                fig.update_yaxes(tickformat=".0%")
+                fig.update_traces(textposition='outside')
+                st.plotly_chart(fig, use_container_width=True)
+
+            rfm_display = rfm_summary.assign(**{'고객 비중': rfm_summary['고객 비중'] * 100, '금액 비중': rfm_summary['금액 비중'] * 100})
+            rfm_formats = {'고객 수': AMOUNT_FORMAT, '고객 비중': PERCENT_FORMAT, f"거래금액{currency_label}": AMOUNT_FORMAT,
+                           '금액 비중': PERCENT_FORMAT, '평균 R': SCORE_FORMAT, '평균 F': SCORE_FORMAT, '평균 M': SCORE_FORMAT}
+            st.dataframe(rfm_display.rename(columns={'거래금액': f"거래금액{currency_label}"}),
+                         use_container_width=True, hide_index=True, column_config=number_columns(rfm_formats))
+
+            # 주 이용 국가 / 서비스별 세그먼트 구성 (거래금액 비율)
+            mix_col1, mix_col2 = st.columns(2)
+            for mix_col, by, label, allowed in [
+                (mix_col1, 'country', '국가', country_rank.top(10)),
+                (mix_col2, 'PAYMENT_SERVICE_DIV', '서비스', service_rank.top(10)),
+            ]:
+                with mix_col:
+                    mix = rfm_table.breakdown(rfm_scope, by)
+                    mix = mix[mix[by].isin(allowed)]
+                    fig = px.bar(
+                        mix,
+                        x=by,
+                        y='VOLUMN',
+                        color='세그먼트',
+                        category_orders={'세그먼트': RFM_SEGMENTS, by: allowed},
+                        color_discrete_sequence=px.colors.qualitative.Set2,
+                        title=f"주 이용 {label}별 세그먼트 구성"
+                    )
+                    fig.update_layout(height=400, barnorm='percent', xaxis_title="", yaxis_title="거래금액 비율 (%)")
+                    st.plotly_chart(fig, use_container_width=True)
+
+            st.caption(
+                "💡 R=마지막 거래월의 최근성, F=누적 거래건수, M=누적 거래금액을 전체 고객 5분위로 1~5점 매긴 뒤 "
+                "R 점수와 F·M 평균 점수로 세그먼트를 나눕니다. 사이드바 👥 고객 세그먼트로 특정 세그먼트의 거래만 볼 수 있습니다"
+            )
 
 # =============================================================================
 # Tab 3: 트렌드
 # =============================================================================
 with tab3:
-    if 'TRANSACTION_APPROVED_MONTH' not in filtered_df.columns:
+    if 'TRANSACTION_APPROVED_MONTH' not in data_columns:
         st.warning("⚠️ 시계열 분석을 위한 'TRANSACTION_APPROVED_MONTH' 컬럼이 없습니다.")
     else:
+        # --- 추세 지표 선택 (이 탭의 모든 트렌드 차트에 적용) ---
+        trend_metric = st.radio(
+            "📐 표시 지표",
+            TREND_METRICS,
+            horizontal=True,
+            key="trend_metric"
+        )
+        if trend_metric != '월 합계':
+            st.caption("💡 이동 구간이나 비교 월이 선택 기간 밖에 걸치는 달은 값을 표시하지 않습니다")
+        metric_suffix = "" if trend_metric == '월 합계' else f" · {trend_metric}"
+
+        # 월 x 계열 행렬 하나로 모든 계열의 지표를 한 번에 계산 (필터 조합별 캐시)
+        overall_trend = result_cache.get_or_compute(
+            (filter_signature, display_currency, 'trend_total'), TrendEngine, section_result('month_totals')[['VOLUMN', 'TRX_COUNT']]
+        )
+
         # --- 전체 트렌드 ---
         st.markdown("### 📈 전체 거래 트렌드")
 
-        monthly = filtered_df.groupby('TRANSACTION_APPROVED_MONTH').agg({
-            'VOLUMN': 'sum',
-            'TRX_COUNT': 'sum'
-        }).reset_index().sort_values('TRANSACTION_APPROVED_MONTH')
+        monthly = overall_trend.metric(trend_metric).reset_index()
+        if monthly[['VOLUMN', 'TRX_COUNT']].isna().all().all():
+            st.info(f"ℹ️ 선택 기간에 연속된 월이 부족해 '{trend_metric}' 지표를 계산할 수 없습니다. 기간을 넓혀 보세요.")
 
         col1, col2 = st.columns(2)
 
@@ -1032,7 +2047,7 @@ with tab3:
                 template='plotly_white'
             )
             fig.update_traces(line_color='#1f77b4', line_width=3)
-            fig.update_layout(xaxis_title="월", yaxis_title="거래금액")
+            fig.update_layout(xaxis_title="월", yaxis_title=f"거래금액{metric_suffix}")
             st.plotly_chart(fig, use_container_width=True)
 
         with col2:
@@ -1045,7 +2060,7 @@ with tab3:
                 template='plotly_white'
             )
             fig.update_traces(line_color='#2ca02c', line_width=3)
-            fig.update_layout(xaxis_title="월", yaxis_title="거래건수")
+            fig.update_layout(xaxis_title="월", yaxis_title=f"거래건수{metric_suffix}")
             st.plotly_chart(fig, use_container_width=True)
 
         st.divider()
@@ -1053,9 +2068,17 @@ with tab3:
         # --- 국가별 트렌드 ---
         st.markdown("### 🌍 국가별 거래 트렌드")
 
-        if not filtered_df.empty:
+        if not filtered_empty:
             # Top 9 국가 선택
-            top_trend_countries = filtered_df.groupby('country')['VOLUMN'].sum().nlargest(9).index.tolist()
+            top_trend_countries = country_rank.top(9)
+            country_trend = result_cache.get_or_compute(
+                (filter_signature, display_currency, 'trend_country'), TrendEngine.from_totals,
+                section_result('country_month')['VOLUMN'], 'country'
+            )
+            country_metric = country_trend.metric(trend_metric)
+            # 이상 월 표시는 월 합계 지표에서만 (점수는 월 합계 기준)
+            show_anomalies = trend_metric == '월 합계'
+            country_anomalies = anomaly_result('country') if show_anomalies else None
 
             # 색상 팔레트
             trend_colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8', '#F7DC6F', '#BB8FCE']
@@ -1073,21 +2096,26 @@ with tab3:
                         color = trend_colors[country_idx % len(trend_colors)]
 
                         with cols[col_idx]:
-                            # 해당 국가 월별 데이터
-                            country_monthly = filtered_df[filtered_df['country'] == country].groupby('TRANSACTION_APPROVED_MONTH').agg({
-                                'VOLUMN': 'sum',
-                                'TRX_COUNT': 'sum'
-                            }).reset_index().sort_values('TRANSACTION_APPROVED_MONTH')
+                            # 해당 국가 월별 지표 (엔진 결과에서 열 하나만 꺼냄)
+                            country_monthly = country_metric[country].rename(trend_metric).reset_index()
 
-                            if not country_monthly.empty:
+                            if country_monthly[trend_metric].notna().any():
                                 fig = px.line(
                                     country_monthly,
                                     x='TRANSACTION_APPROVED_MONTH',
-                                    y='VOLUMN',
+                                    y=trend_metric,
                                     markers=True,
                                     title=f"🌍 {country}"
                                 )
                                 fig.update_traces(line_color=color, line_width=2, marker_size=8)
+                                if show_anomalies:
+                                    flags = country_anomalies[country_anomalies['country'] == country]
+                                    if not flags.empty:
+                                        fig.add_trace(go.Scatter(
+                                            x=flags['월'], y=flags['값'], mode='markers', name='이상 징후',
+                                            marker=dict(color='#d62728', size=13, symbol='x'),
+                                            hovertext=flags['유형'] + ' (점수 ' + flags['점수'].round(1).astype(str) + ')'
+                                        ))
                                 fig.update_layout(
                                     height=250,
                                     margin=dict(l=10, r=10, t=40, b=10),
@@ -1099,18 +2127,17 @@ with tab3:
                                 fig.update_yaxes(tickformat=",")
                                 st.plotly_chart(fig, use_container_width=True)
 
-            st.caption("💡 Top 9 국가의 월별 거래금액 추이를 표시합니다")
+            st.caption(f"💡 Top 9 국가의 월별 거래금액{metric_suffix} 추이를 표시합니다"
+                       + (" (✕ 표시는 이상 징후로 탐지된 월)" if show_anomalies else ""))
 
             # 전체 국가 비교 (접기)
             with st.expander("📈 전체 국가 트렌드 비교"):
-                country_trend = filtered_df[filtered_df['country'].isin(top_trend_countries)].groupby(
-                    ['TRANSACTION_APPROVED_MONTH', 'country']
-                )['VOLUMN'].sum().reset_index()
+                country_trend_long = country_trend.long(trend_metric, sorted(top_trend_countries), 'country')
 
                 fig = px.line(
-                    country_trend,
+                    country_trend_long,
                     x='TRANSACTION_APPROVED_MONTH',
-                    y='VOLUMN',
+                    y='값',
                     color='country',
                     markers=True,
                     template='plotly_white'
@@ -1118,7 +2145,7 @@ with tab3:
                 fig.update_layout(
                     height=450,
                     xaxis_title="월",
-                    yaxis_title="거래금액",
+                    yaxis_title=f"거래금액{metric_suffix}",
                     legend_title="국가"
                 )
                 st.plotly_chart(fig, use_container_width=True)
@@ -1127,52 +2154,95 @@ with tab3:
 
         # --- 서비스별 트렌드 ---
         st.markdown("### 💳 서비스별 월간 트렌드")
-        service_monthly = filtered_df.groupby(['TRANSACTION_APPROVED_MONTH', 'PAYMENT_SERVICE_DIV'])['VOLUMN'].sum().reset_index()
-        service_monthly = service_monthly.sort_values('TRANSACTION_APPROVED_MONTH')
+        service_trend = result_cache.get_or_compute(
+            (filter_signature, display_currency, 'trend_service'), TrendEngine.from_totals,
+            section_result('service_month'), 'PAYMENT_SERVICE_DIV'
+        )
+        service_monthly = service_trend.long(trend_metric, None, 'PAYMENT_SERVICE_DIV')
 
         fig = px.line(
             service_monthly,
             x='TRANSACTION_APPROVED_MONTH',
-            y='VOLUMN',
+            y='값',
             color='PAYMENT_SERVICE_DIV',
             markers=True,
             template='plotly_white',
             color_discrete_sequence=px.colors.qualitative.Set2
         )
+        if trend_metric == '월 합계':
+            service_anomalies = anomaly_result('service')
+            if not service_anomalies.empty:
+                fig.add_trace(go.Scatter(
+                    x=service_anomalies['월'], y=service_anomalies['값'], mode='markers', name='이상 징후',
+                    marker=dict(color='#d62728', size=13, symbol='x'),
+                    hovertext=service_anomalies['PAYMENT_SERVICE_DIV'] + ' ' + service_anomalies['유형']
+                ))
         fig.update_layout(
             xaxis_title="월",
-            yaxis_title="거래금액",
+            yaxis_title=f"거래금액{metric_suffix}",
             legend_title="서비스 타입",
             height=400
         )
         st.plotly_chart(fig, use_container_width=True)
 
-        if 'CUSTOMER_CREATEDDATE_MONTH' in filtered_df.columns and not filtered_df.empty:
+        if 'CUSTOMER_CREATEDDATE_MONTH' in data_columns and not filtered_empty:
             st.divider()
             st.subheader("👥 코호트 분석: 가입월별 거래 패턴")
 
-            cohort_grouped = filtered_df.groupby('CUSTOMER_CREATEDDATE_MONTH')['VOLUMN'].sum()
-            if len(cohort_grouped) > 0:
-                top_cohorts = cohort_grouped.nlargest(5).index.tolist()
-                cohort_data = filtered_df.groupby(['CUSTOMER_CREATEDDATE_MONTH', 'TRANSACTION_APPROVED_MONTH'])['VOLUMN'].sum().reset_index()
-                cohort_data = cohort_data[cohort_data['CUSTOMER_CREATEDDATE_MONTH'].isin(top_cohorts)]
+            cohort = section_result('cohort')
+            if cohort:
+                cohort_labels = {'VOLUMN': '거래금액', 'TRX_COUNT': '거래건수', 'customers': '활성 고객 수'}
+                opt_col1, opt_col2 = st.columns([3, 1])
+                with opt_col1:
+                    cohort_metric = st.radio(
+                        "코호트 지표",
+                        [m for m in COHORT_METRICS if m in cohort],
+                        format_func=cohort_labels.get,
+                        horizontal=True,
+                        key="cohort_metric"
+                    )
+                with opt_col2:
+                    cohort_ratio = st.toggle("가입월 대비 비율(%)", key="cohort_ratio")
+
+                matrix = cohort[cohort_metric]
+                if cohort_ratio:
+                    # 각 코호트의 첫 거래 가능 월(경과 0개월) 대비 비율
+                    matrix = matrix.div(matrix[0].replace(0, np.nan), axis=0) * 100
+                    value_format, color_title = ":.1f", "비율(%)"
+                else:
+                    value_format, color_title = ":,.0f", cohort_labels[cohort_metric]
 
-                if not cohort_data.empty:
+                fig = px.imshow(
+                    matrix,
+                    color_continuous_scale='Blues',
+                    aspect='auto',
+                    labels=dict(x="가입 후 경과 개월", y="가입월 (코호트)", color=color_title)
+                )
+                fig.update_traces(
+                    hovertemplate="가입월: %{y}<br>경과: %{x}개월<br>값: %{z" + value_format + "}<extra></extra>"
+                )
+                fig.update_layout(height=max(300, 22 * len(matrix) + 120))
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"💡 {len(matrix)}개 코호트 × {matrix.shape[1]}개월 전체 행렬 (가입월 이전 거래 및 월 형식 오류 행 제외)")
+
+                # 거래금액 상위 5개 코호트의 경과 개월별 추이
+                with st.expander("📈 주요 코호트 추이 보기 (거래금액 Top 5)"):
+                    top_cohorts = cohort['VOLUMN'].sum(axis=1).nlargest(5).index
+                    cohort_data = cohort[cohort_metric].loc[top_cohorts].T
                     fig = px.line(
                         cohort_data,
-                        x='TRANSACTION_APPROVED_MONTH',
-                        y='VOLUMN',
-                        color='CUSTOMER_CREATEDDATE_MONTH',
                         markers=True,
                         template='plotly_white'
                     )
                     fig.update_layout(
-                        xaxis_title="거래월",
-                        yaxis_title="거래금액",
+                        xaxis_title="가입 후 경과 개월",
+                        yaxis_title=cohort_labels[cohort_metric],
                         legend_title="가입월 (코호트)",
                         height=400
                     )
                     st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("코호트를 계산할 수 있는 데이터가 없습니다 (가입월/거래월 형식 확인)")
 
 # =============================================================================
 # Tab 4: 데이터
@@ -1180,52 +2250,101 @@ with tab3:
 with tab4:
     st.markdown("### 📋 필터링된 데이터")
 
-    col1, col2, col3 = st.columns(3)
-    col1.metric("총 행 수", f"{len(filtered_df):,}개")
-    col2.metric("국가 수", f"{filtered_df['country'].nunique()}개")
-    col3.metric("서비스 타입 수", f"{filtered_df['PAYMENT_SERVICE_DIV'].nunique()}개")
+    if filtered_df is None:
+        st.info("🔍 탐색 모드: 필터된 행 데이터를 준비하고 있습니다. 준비되면 자동으로 표시됩니다.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("총 행 수", f"{len(filtered_df):,}개")
+        col2.metric("국가 수", f"{nunique(filtered_df, 'country')}개")
+        col3.metric("서비스 타입 수", f"{nunique(filtered_df, 'PAYMENT_SERVICE_DIV')}개")
 
-    st.divider()
+        st.divider()
 
-    col1, col2, col3 = st.columns([1, 1, 3])
+        col1, col2, col3 = st.columns([1, 1, 3])
 
-    # 다운로드용 데이터 준비 (_source_file 컬럼 제외)
-    download_df = filtered_df.drop(columns=['_source_file'], errors='ignore')
+        # 다운로드용 데이터 준비 (_source_file 컬럼 제외)
+        download_df = filtered_df.drop(columns=['_source_file'], errors='ignore')
 
-    # Excel 최대 행 수 제한
-    EXCEL_MAX_ROWS = 1048576
+        # Excel 최대 행 수 제한
+        EXCEL_MAX_ROWS = 1048576
 
-    with col1:
-        csv = download_df.to_csv(index=False).encode('utf-8-sig')
-        st.download_button(
-            label="📥 CSV 다운로드",
-            data=csv,
-            file_name="filtered_data.csv",
-            mime="text/csv"
-        )
-
-    with col2:
-        if len(download_df) > EXCEL_MAX_ROWS:
-            # 데이터가 너무 큰 경우 경고 표시
-            st.warning(f"⚠️ 데이터가 Excel 한계({EXCEL_MAX_ROWS:,}행)를 초과하여 Excel 다운로드 불가")
-            st.caption("CSV 다운로드를 이용해주세요")
-        else:
-            # Excel 파일 생성
+        # 내보내기 파일은 필터 조합별로 한 번만 만들어 메모리 예산에 보관 (예산을 넘으면 디스크로)
+        def export_excel():
             excel_buffer = io.BytesIO()
             download_df.to_excel(excel_buffer, index=False, sheet_name='Data', engine='openpyxl')
-            excel_data = excel_buffer.getvalue()
+            return excel_buffer.getvalue()
 
+        with col1:
+            csv = memory_budget.get_or_put(
+                ('export', source_key, filter_signature, 'csv'),
+                lambda: csv_bytes(download_df), kind='export'
+            )
             st.download_button(
-                label="📥 Excel 다운로드",
-                data=excel_data,
-                file_name="filtered_data.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                label="📥 CSV 다운로드",
+                data=csv,
+                file_name="filtered_data.csv",
+                mime="text/csv"
             )
 
-    st.divider()
+        with col2:
+            if len(download_df) > EXCEL_MAX_ROWS:
+                # 데이터가 너무 큰 경우 경고 표시
+                st.warning(f"⚠️ 데이터가 Excel 한계({EXCEL_MAX_ROWS:,}행)를 초과하여 Excel 다운로드 불가")
+                st.caption("CSV 다운로드를 이용해주세요")
+            else:
+                # Excel 파일 생성
+                excel_data = memory_budget.get_or_put(('export', source_key, filter_signature, 'xlsx'), export_excel, kind='export')
+
+                st.download_button(
+                    label="📥 Excel 다운로드",
+                    data=excel_data,
+                    file_name="filtered_data.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+        st.divider()
 
-    st.dataframe(
-        filtered_df,
-        use_container_width=True,
-        height=500
+        st.dataframe(
+            filtered_df,
+            use_container_width=True,
+            height=500
+        )
+
+# =============================================================================
+# 성능 정보 (사이드바 하단)
+# =============================================================================
+with st.sidebar.expander("⚙️ 성능 정보"):
+    cache_stats = result_cache.stats()
+    st.markdown("**섹션 결과 캐시**")
+    st.caption(
+        f"보관 {cache_stats['entries']:,}개 · {cache_stats['nbytes'] / 1024 ** 2:,.1f} / "
+        f"{cache_stats['max_bytes'] / 1024 ** 2:,.0f} MB"
+    )
+    st.caption(
+        f"적중 {cache_stats['hits']:,} · 미적중 {cache_stats['misses']:,} · "
+        f"적중률 {cache_stats['hit_rate']:.0%} · 제거 {cache_stats['evictions']:,}"
     )
+    budget = memory_budget.usage()
+    st.markdown("**메모리 예산**")
+    st.caption(
+        f"사용 {budget['nbytes'] / 1024 ** 2:,.1f} / {budget['max_bytes'] / 1024 ** 2:,.0f} MB · "
+        + " · ".join(f"{name} {size / 1024 ** 2:,.1f} MB" for name, size in budget['by_kind'].items())
+    )
+    st.caption(
+        f"디스크로 내린 항목 {budget['spilled_entries']:,}개 ({budget['spilled_nbytes'] / 1024 ** 2:,.1f} MB) · "
+        f"내림 {budget['evictions']:,} · 다시 읽기 {budget['reloads']:,} · 정리 {budget['discards']:,}"
+    )
+    if presets:
+        view_stats = preset_views.status(base_key)
+        st.markdown("**프리셋 뷰**")
+        st.caption(
+            f"미리 계산 {view_stats['ready']:,} / {view_stats['views']:,}개 · "
+            f"보관 데이터셋 {view_stats['datasets']:,}개 · {preset_views.nbytes / 1024 ** 2:,.1f} MB"
+            + (" · 현재 필터는 프리셋 뷰 사용" if preset_view_used else "")
+        )
+    if exploration_mode:
+        st.markdown("**탐색 모드 표본**")
+        st.caption(
+            f"표본 {len(sample):,}행 / 전체 {total_rows:,}행 · 층 {len(sample.population):,}개 · "
+            f"{sample.nbytes / 1024 ** 2:,.1f} MB"
+        )
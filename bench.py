@@ -0,0 +1,394 @@
+# =============================================================================
+# 집계 엔진 벤치마크
+# 사용법:
+#   python bench.py engine --rows 5000000
+#   python bench.py engine --rows 5000000 --threads 1 2 4 8
+#   python bench.py service --rows 2000000 --clients 8 --workers 1 2 4
+#   python bench.py anomaly --series 5000 --months 36
+#   python bench.py validate --rows 3000000
+#   python bench.py dedupe --rows 20000000 --files 4
+#   python bench.py startup --repeat 5 --max-seconds 2
+# - pandas / polars 결과가 같은지 먼저 확인한 뒤 소요 시간을 측정
+# - --threads 를 주면 polars 스레드 수별로 다시 실행해 코어 확장성을 비교
+# - service: 공유 집계 서비스의 워커 수별 처리량 (캐시 없이 / 캐시 적중 시)
+# - anomaly: 이상 징후 탐지를 계열 수 x 개월 수 큐브에 한 번 실행하는 시간
+# - validate: 업로드 검증(validation.py) 소요 시간과 초당 처리 행 수 (일부 행을 일부러 오염)
+# - dedupe: 파일 간 중복 판정(dedupe.py) 소요 시간 (파일마다 --overlap 비율만큼 이전 파일과 겹침)
+# - startup: 새 프로세스에서 업로드 화면까지 걸리는 시간과, 첫 데이터 세션의 추가 import 시간
+#   업로드 화면 전에 무거운 모듈(pandas, numpy, plotly 중 streamlit 이 불러오지 않은 것)이 import 되거나
+#   --max-seconds 를 넘으면 종료 코드 1 (시작 속도 회귀 확인용)
+# =============================================================================
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def make_sample(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    countries = np.array([f"C{i:03d}" for i in range(120)])
+    services = np.array(["CARD", "WALLET", "BANK", "CASH", "MOBILE", "QR", "VOUCHER"])
+    months = np.array([f"{y}-{m:02d}" for y in (2023, 2024, 2025) for m in range(1, 13)])
+    return pd.DataFrame({
+        'country': countries[rng.zipf(1.5, rows) % len(countries)],
+        'PAYMENT_SERVICE_DIV': rng.choice(services, rows),
+        'TRANSACTION_APPROVED_MONTH': rng.choice(months, rows),
+        'CUSTOMER_CREATEDDATE_MONTH': rng.choice(months, rows),
+        'CUSTOMERID': rng.integers(0, max(rows // 20, 1), rows),
+        'VOLUMN': rng.integers(1, 1_000_000, rows).astype('float64'),
+        'TRX_COUNT': rng.integers(1, 50, rows),
+    })
+
+
+# app.py 에서 실제로 쓰는 집계 조합
+CASES = [
+    ("group_sum country", lambda e, d: e.group_sum(d, 'country', 'VOLUMN')),
+    ("group_sum country x2", lambda e, d: e.group_sum(d, 'country', ['VOLUMN', 'TRX_COUNT'])),
+    ("group_sum month x service", lambda e, d: e.group_sum(d, ['TRANSACTION_APPROVED_MONTH', 'PAYMENT_SERVICE_DIV'], 'VOLUMN')),
+    ("nunique CUSTOMERID", lambda e, d: e.nunique(d, 'CUSTOMERID')),
+    ("pivot country x service", lambda e, d: e.pivot_sum(d, 'country', 'PAYMENT_SERVICE_DIV', 'VOLUMN')),
+]
+
+
+def _load_engine(name):
+    os.environ["DASHBOARD_ENGINE"] = name
+    import engine
+    return engine
+
+
+def _assert_same(expected, actual):
+    if isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, actual, check_exact=False, rtol=1e-12)
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual, check_exact=False, rtol=1e-12)
+    else:
+        assert expected == actual, (expected, actual)
+
+
+def run_single(engine_name, rows, repeat):
+    engine = _load_engine(engine_name)
+    data = make_sample(rows)
+    results = {}
+    for label, case in CASES:
+        timings = []
+        for _ in range(repeat):
+            engine.clear_polars_cache()
+            start = time.perf_counter()
+            case(engine, data)
+            timings.append(time.perf_counter() - start)
+        results[label] = min(timings)
+    return engine.engine_name(), results
+
+
+def check_equivalence(rows):
+    data = make_sample(rows, seed=1)
+    import engine
+    for label, case in CASES:
+        engine.ENGINE = "pandas"
+        expected = case(engine, data)
+        engine.ENGINE = "polars"
+        engine.clear_polars_cache()
+        actual = case(engine, data)
+        _assert_same(expected, actual)
+        print(f"  [OK] {label}")
+    engine.ENGINE = "pandas"
+
+
+def cmd_engine(args):
+    engine = _load_engine("polars")
+    if engine.pl is None:
+        print("polars 가 설치되어 있지 않아 pandas 만 측정합니다.")
+        args.threads = []
+    else:
+        sample_rows = min(args.rows, 200_000)
+        print(f"결과 일치 확인 ({sample_rows:,}행)")
+        check_equivalence(sample_rows)
+
+    print(f"\n{args.rows:,}행, {args.repeat}회 반복 중 최솟값 (초)")
+    runs = [("pandas", None)] + [("polars", t) for t in args.threads]
+    table = {}
+    for name, threads in runs:
+        env = dict(os.environ)
+        if threads:
+            env["POLARS_MAX_THREADS"] = str(threads)
+        out = subprocess.run(
+            [sys.executable, __file__, "_single", name, str(args.rows), str(args.repeat)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        label = name if threads is None else f"polars x{threads}"
+        table[label] = json.loads(out.strip().splitlines()[-1])
+
+    print(pd.DataFrame(table).round(4).to_string())
+
+
+def _make_store(rows, files):
+    from store import DatasetStore
+    data = make_sample(rows)
+    root = tempfile.mkdtemp(prefix="bench_store_")
+    store = DatasetStore(root)
+    for i, part in enumerate(np.array_split(np.arange(rows), files)):
+        name = f"file{i}.csv"
+        frame = data.iloc[part].reset_index(drop=True)
+        frame['_source_file'] = name
+        store.add_file(name, frame, digest=str(i))
+    return store
+
+
+def _run_clients(address, authkey, requests, clients):
+    from agg_service import AggregateClient
+    pending = list(requests)
+    lock = threading.Lock()
+
+    def work():
+        client = AggregateClient(address, authkey)
+        while True:
+            with lock:
+                if not pending:
+                    return
+                version, spec, name = pending.pop()
+            client.aggregate(version, spec, name)
+
+    threads = [threading.Thread(target=work) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def cmd_service(args):
+    import secrets
+    from agg_service import AggregateService, make_spec
+    from engine import available_sections
+
+    store = _make_store(args.rows, args.files)
+    print(f"저장소 준비: {args.rows:,}행, 파일 {args.files}개 ({store.root})")
+    months = sorted(store.cube()['TRANSACTION_APPROVED_MONTH'].unique())
+    sections = available_sections(make_sample(10).columns)
+    # 3개월 단위 기간 필터 x 섹션
+    requests = [
+        (store.version, make_spec(months=months[i:i + 3]), name)
+        for i in range(len(months) - 2) for name in sections
+    ]
+
+    authkey = secrets.token_bytes(32)
+    table = {}
+    for workers in args.workers:
+        service = AggregateService(store.root, workers, cache_entries=len(requests))
+        ready = threading.Event()
+        threading.Thread(target=service.serve, args=(("localhost", 0), authkey), kwargs={'ready': ready},
+                         daemon=True).start()
+        ready.wait()
+        cold = _run_clients(service.address, authkey, requests, args.clients)
+        warm = _run_clients(service.address, authkey, requests, args.clients)
+        service.pool.shutdown()
+        table[f"workers x{workers}"] = {
+            '요청 수': len(requests),
+            '캐시 없음 (요청/초)': len(requests) / cold,
+            '캐시 적중 (요청/초)': len(requests) / warm,
+        }
+    shutil.rmtree(store.root, ignore_errors=True)
+    # 워커 수가 코어 수를 넘으면 빨라지지 않음 (1코어에서는 워커를 늘리면 오히려 느려짐)
+    print(f"\n클라이언트 {args.clients}개 동시 요청 · CPU 코어 {os.cpu_count()}개")
+    print(pd.DataFrame(table).T.round(1).to_string())
+
+
+def cmd_anomaly(args):
+    from anomalies import detect_anomalies
+    rng = np.random.default_rng(0)
+    n_services = 8
+    n_countries = max(args.series // n_services, 1)
+    months = np.array([f"{2020 + m // 12}-{m % 12 + 1:02d}" for m in range(args.months)])
+    series = np.arange(n_countries * n_services)
+    cells = len(series) * args.months
+    season = 1 + 0.3 * np.sin(np.tile(np.arange(args.months), len(series)) / 12 * 2 * np.pi)
+    cube = pd.DataFrame({
+        '_source_file': 'bench.csv',
+        'country': np.repeat([f"C{c:05d}" for c in range(n_countries)], n_services * args.months),
+        'PAYMENT_SERVICE_DIV': np.tile(np.repeat([f"S{s}" for s in range(n_services)], args.months), n_countries),
+        'TRANSACTION_APPROVED_MONTH': np.tile(months, len(series)),
+        '_rows': 1,
+        'VOLUMN': np.repeat(rng.lognormal(10, 1, len(series)), args.months) * season * rng.normal(1, 0.05, cells),
+        'TRX_COUNT': 1,
+    })
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        found = detect_anomalies(cube, ['country', 'PAYMENT_SERVICE_DIV'])
+        timings.append(time.perf_counter() - start)
+    print(f"계열 {len(series):,}개 x {args.months}개월 ({cells:,}칸): {min(timings):.3f}초, 이상 월 {len(found):,}건")
+
+
+def cmd_validate(args):
+    from validation import validate_frame
+    frame = make_sample(args.rows)
+    rng = np.random.default_rng(1)
+    frame['VOLUMN'] = frame['VOLUMN'].astype(object)
+    frame.loc[rng.choice(args.rows, args.bad, replace=False), 'VOLUMN'] = 'N/A'
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        clean, quarantine, report, _ = validate_frame(frame)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{args.rows:,}행: {best:.3f}초 ({args.rows / best:,.0f}행/초), 정상 {len(clean):,} / 격리 {len(quarantine):,}")
+    print(report['quarantined'])
+
+
+def cmd_dedupe(args):
+    from dedupe import find_duplicates
+    per_file = args.rows // args.files
+    shared = int(per_file * args.overlap)
+    rng = np.random.default_rng(0)
+    # 행 해시 대신 임의 uint64 (앞 파일의 끝부분 shared 개를 다음 파일이 다시 포함)
+    hashes, previous = {}, np.empty(0, dtype=np.uint64)
+    for i in range(args.files):
+        fresh = rng.integers(0, np.iinfo(np.int64).max, per_file - len(previous[-shared:]) if i else per_file).astype(np.uint64)
+        hashes[f"file{i}.csv"] = np.concatenate([previous[-shared:], fresh]) if i else fresh
+        previous = hashes[f"file{i}.csv"]
+    for policy in ["latest", "earliest"]:
+        start = time.perf_counter()
+        result = find_duplicates(hashes, list(hashes), policy)
+        elapsed = time.perf_counter() - start
+        dropped = sum(r['dropped'] for r in result.values())
+        print(f"{policy}: {args.rows:,}행 {elapsed:.3f}초 ({args.rows / elapsed:,.0f}행/초), 제외 {dropped:,}행")
+
+
+HEAVY_MODULES = ["pandas", "numpy", "plotly"]
+
+# 새 프로세스에서 실행할 측정 코드 (bench.py 자체가 pandas/numpy 를 import 하므로 따로 실행)
+# app.py 를 bare 모드로 실행해 업로드 화면(st.stop)까지의 시간을 잰 뒤,
+# 데이터가 들어온 첫 세션이 추가로 치르는 import 비용(app.py 최상위 import 전체)을 잼
+STARTUP_PROBE = """
+import ast, json, sys, time
+app_path, heavy = sys.argv[1], sys.argv[2].split(",")
+sys.path.insert(0, app_path.rsplit("/", 1)[0] if "/" in app_path else ".")
+start = time.perf_counter()
+import streamlit as st
+import_streamlit = time.perf_counter() - start
+preloaded = set(sys.modules)  # streamlit 이 자체적으로 불러오는 모듈은 제외
+
+class UploadScreen(Exception):
+    pass
+
+def stop():
+    raise UploadScreen()
+
+st.stop = stop
+source = open(app_path, encoding="utf-8").read()
+try:
+    exec(compile(source, app_path, "exec"), {"__name__": "__main__", "__file__": app_path})
+    reached = False
+except UploadScreen:
+    reached = True
+upload_screen = time.perf_counter() - start
+leaked = [m for m in heavy if m in sys.modules and m not in preloaded]
+
+modules = []
+for node in ast.parse(source).body:
+    if isinstance(node, ast.Import):
+        modules += [alias.name for alias in node.names]
+    elif isinstance(node, ast.ImportFrom) and node.module:
+        modules.append(node.module)
+start = time.perf_counter()
+for module in modules:
+    __import__(module)
+analysis_imports = time.perf_counter() - start
+print(json.dumps({
+    "import_streamlit": import_streamlit,
+    "upload_screen": upload_screen,
+    "analysis_imports": analysis_imports,
+    "reached_upload_screen": reached,
+    "heavy_before_upload": leaked,
+}))
+"""
+
+
+def cmd_startup(args):
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    runs = []
+    env = dict(os.environ, STREAMLIT_LOGGER_LEVEL="error")
+    for _ in range(args.repeat):
+        out = subprocess.run([sys.executable, "-c", STARTUP_PROBE, app_path, ",".join(HEAVY_MODULES)],
+                             env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    table = pd.DataFrame(runs)
+    timings = table[["import_streamlit", "upload_screen", "analysis_imports"]]
+    print(f"새 프로세스 {args.repeat}회 (초)")
+    print(timings.agg(["min", "median", "max"]).round(3).T.to_string())
+
+    failures = []
+    if not table["reached_upload_screen"].all():
+        failures.append("업로드 화면(st.stop)에 도달하지 못함")
+    leaked = sorted({m for mods in table["heavy_before_upload"] for m in mods})
+    if leaked:
+        failures.append(f"업로드 화면 전에 import 됨: {', '.join(leaked)}")
+    if args.max_seconds is not None and timings["upload_screen"].median() > args.max_seconds:
+        failures.append(f"업로드 화면까지 {timings['upload_screen'].median():.3f}초 > {args.max_seconds}초")
+    for failure in failures:
+        print(f"  [FAIL] {failure}")
+    if failures:
+        sys.exit(1)
+    print("  [OK] 업로드 화면 전에 무거운 모듈 없음")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "_single":
+        _, results = run_single(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        print(json.dumps(results))
+        return
+
+    parser = argparse.ArgumentParser(description="대시보드 성능 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_engine = sub.add_parser("engine", help="pandas / polars 집계 엔진 비교")
+    p_engine.add_argument("--rows", type=int, default=2_000_000)
+    p_engine.add_argument("--repeat", type=int, default=3)
+    p_engine.add_argument("--threads", type=int, nargs="*", default=[1, 2, 4, os.cpu_count() or 1])
+    p_engine.set_defaults(func=cmd_engine)
+
+    p_service = sub.add_parser("service", help="공유 집계 서비스 처리량")
+    p_service.add_argument("--rows", type=int, default=2_000_000)
+    p_service.add_argument("--files", type=int, default=4)
+    p_service.add_argument("--clients", type=int, default=8)
+    p_service.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, os.cpu_count() or 1])
+    p_service.set_defaults(func=cmd_service)
+
+    p_anomaly = sub.add_parser("anomaly", help="이상 징후 탐지 소요 시간")
+    p_anomaly.add_argument("--series", type=int, default=5000)
+    p_anomaly.add_argument("--months", type=int, default=36)
+    p_anomaly.add_argument("--repeat", type=int, default=3)
+    p_anomaly.set_defaults(func=cmd_anomaly)
+
+    p_validate = sub.add_parser("validate", help="업로드 검증 처리량")
+    p_validate.add_argument("--rows", type=int, default=3_000_000)
+    p_validate.add_argument("--bad", type=int, default=1000)
+    p_validate.add_argument("--repeat", type=int, default=3)
+    p_validate.set_defaults(func=cmd_validate)
+
+    p_dedupe = sub.add_parser("dedupe", help="파일 간 중복 판정 처리량")
+    p_dedupe.add_argument("--rows", type=int, default=20_000_000)
+    p_dedupe.add_argument("--files", type=int, default=4)
+    p_dedupe.add_argument("--overlap", type=float, default=0.25)
+    p_dedupe.set_defaults(func=cmd_dedupe)
+
+    p_startup = sub.add_parser("startup", help="업로드 화면까지의 시작 시간 / import 비용")
+    p_startup.add_argument("--repeat", type=int, default=5)
+    p_startup.add_argument("--max-seconds", type=float, default=None)
+    p_startup.set_defaults(func=cmd_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
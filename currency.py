@@ -0,0 +1,143 @@
+# =============================================================================
+# 통화 환산
+# - VOLUMN 은 국가마다 현지 통화 금액이라 그대로 더하면 통화가 섞임 (국가 간 KPI/구간 점유율 왜곡)
+# - 적재(검증) 시 로컬 환율표를 (통화, 거래월)로 붙여 기준 통화 금액으로 한 번에 환산
+#   행별 환율 = 환율 행렬[통화 코드, 거래월 코드] (인덱스 조회 한 번) -> VOLUMN * 환율 (벡터 곱 한 번)
+# - 원래 금액은 VOLUMN_LOCAL 로 보관하고 VOLUMN 은 기준 통화 금액
+#   -> 큐브/섹션/KPI/스케치는 그대로 VOLUMN 을 합산하면 기준 통화 합계 (큐브에는 두 측정값 모두 보관)
+# - 표시 통화 변경은 집계 결과에 상수 하나(기준 통화 -> 표시 통화, 표시 통화의 최근 환율)를 곱하는 것
+#   (다시 읽거나 다시 집계하지 않음)
+#
+# 환율표 (CSV, DASHBOARD_FX_RATES, 없으면 환산하지 않음)
+#   currency,month,rate        rate = 해당 통화 1단위의 기준 통화 금액
+#   USD,2024-01,1320.5
+#   USD,,1300                  month 가 비면 그 통화의 모든 달에 적용 (월별 값이 있는 달은 월별 값)
+#   환율표에 없는 달은 가장 가까운 이전 달 환율 (그보다 이전 달이면 첫 달 환율)
+#
+# 통화 결정: 데이터에 CURRENCY 컬럼이 있으면 그 값, 없으면 국가 -> 통화 (COUNTRY_CURRENCY,
+#   DASHBOARD_COUNTRY_CURRENCY="XX:USD,YY:EUR" 로 추가/변경). 기준 통화는 환율 1
+# =============================================================================
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from engine import month_index
+
+BASE_CURRENCY = os.environ.get("DASHBOARD_BASE_CURRENCY", "KRW").strip().upper()
+FX_RATES_PATH = os.environ.get(
+    "DASHBOARD_FX_RATES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fx_rates.csv")
+)
+CURRENCY_COLUMN = 'CURRENCY'
+LOCAL_VOLUME_COLUMN = 'VOLUMN_LOCAL'
+
+COUNTRY_CURRENCY = {
+    'KR': 'KRW', 'US': 'USD', 'JP': 'JPY', 'CN': 'CNY', 'HK': 'HKD', 'TW': 'TWD',
+    'VN': 'VND', 'TH': 'THB', 'PH': 'PHP', 'ID': 'IDR', 'MY': 'MYR', 'SG': 'SGD',
+    'IN': 'INR', 'NP': 'NPR', 'BD': 'BDT', 'MN': 'MNT', 'UZ': 'UZS', 'KH': 'KHR',
+    'LK': 'LKR', 'PK': 'PKR', 'MM': 'MMK', 'LA': 'LAK', 'KZ': 'KZT', 'RU': 'RUB',
+    'AU': 'AUD', 'NZ': 'NZD', 'CA': 'CAD', 'GB': 'GBP', 'CH': 'CHF',
+    'DE': 'EUR', 'FR': 'EUR', 'IT': 'EUR', 'ES': 'EUR', 'NL': 'EUR',
+}
+for _pair in os.environ.get("DASHBOARD_COUNTRY_CURRENCY", "").split(","):
+    if ":" in _pair:
+        _country, _currency = _pair.split(":", 1)
+        COUNTRY_CURRENCY[_country.strip()] = _currency.strip().upper()
+
+
+class FxTable:
+    def __init__(self, rates, base=BASE_CURRENCY, digest=None):
+        """rates: [currency, month, rate] DataFrame (month 결측 = 모든 달)"""
+        self.base = base
+        self.digest = digest
+        rates = rates.dropna(subset=['currency', 'rate'])
+        currency = rates['currency'].astype(str).str.strip().str.upper()
+        self.currencies = pd.Index(sorted(set(currency) | {base}))
+        period = month_index(rates['month']) if 'month' in rates.columns else np.full(len(rates), -1)
+        monthly = period >= 0
+        self.base_period = int(period[monthly].min()) if monthly.any() else 0
+        n_periods = int(period[monthly].max() - self.base_period + 1) if monthly.any() else 1
+
+        # 통화 x 달 환율 행렬: 월별 값 -> 이전 달 값으로 채움 -> 첫 달 이전은 첫 값 -> 그래도 없으면 고정 환율
+        codes = self.currencies.get_indexer(currency)
+        values = rates['rate'].to_numpy(dtype='float64')
+        matrix = np.full((len(self.currencies), n_periods), np.nan)
+        matrix[codes[monthly], period[monthly] - self.base_period] = values[monthly]
+        matrix = pd.DataFrame(matrix.T).ffill().bfill().to_numpy().T
+        fixed = np.full(len(self.currencies), np.nan)
+        fixed[codes[~monthly]] = values[~monthly]
+        self.rates = np.where(np.isnan(matrix), fixed[:, None], matrix)
+        self.rates[self.currencies.get_loc(base)] = 1.0
+
+    @classmethod
+    def from_csv(cls, path, base=BASE_CURRENCY):
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:12]
+        return cls(pd.read_csv(path, dtype={'month': 'object'}), base, digest)
+
+    def currency_of(self, frame):
+        """행별 통화 코드 (CURRENCY 컬럼 우선, 없으면 국가 매핑)"""
+        if CURRENCY_COLUMN in frame.columns:
+            return frame[CURRENCY_COLUMN].astype(str).str.strip().str.upper()
+        # 고유 국가만 매핑해서 펼침
+        codes, countries = pd.factorize(frame['country'])
+        mapped = np.array([COUNTRY_CURRENCY.get(c, '') for c in countries] + [''], dtype=object)
+        return pd.Series(mapped[codes], index=frame.index)
+
+    def rates_for(self, frame):
+        """행별 환율 (통화 1단위의 기준 통화 금액, 환율 없으면 NaN)"""
+        currency = self.currencies.get_indexer(self.currency_of(frame))
+        if 'TRANSACTION_APPROVED_MONTH' in frame.columns:
+            period = month_index(frame['TRANSACTION_APPROVED_MONTH'])
+            column = np.clip(period - self.base_period, 0, self.rates.shape[1] - 1)
+            column[period < 0] = self.rates.shape[1] - 1
+        else:
+            column = np.full(len(frame), self.rates.shape[1] - 1)
+        rates = self.rates[np.maximum(currency, 0), column]
+        return np.where(currency >= 0, rates, np.nan)
+
+    def latest_rate(self, currency):
+        """통화의 가장 최근 환율 (기준 통화 금액)"""
+        return float(self.rates[self.currencies.get_loc(currency), -1])
+
+    def display_currencies(self):
+        # 기준 통화 먼저, 나머지는 최근 환율이 있는 통화만
+        latest = self.rates[:, -1]
+        return [self.base] + [c for c, r in zip(self.currencies, latest) if c != self.base and np.isfinite(r) and r > 0]
+
+    def display_factor(self, currency):
+        """기준 통화 금액 -> 표시 통화 금액 배수"""
+        return 1.0 if currency == self.base else 1.0 / self.latest_rate(currency)
+
+
+_loaded = {}
+
+
+def load_fx_table(path=FX_RATES_PATH, base=BASE_CURRENCY):
+    """환율표 (파일이 없으면 None = 환산하지 않음). 파일 수정 시각이 같으면 읽어 둔 표를 재사용"""
+    if not path or not os.path.exists(path):
+        return None
+    stamp = (path, base, os.path.getmtime(path))
+    if stamp not in _loaded:
+        _loaded.clear()
+        _loaded[stamp] = FxTable.from_csv(path, base)
+    return _loaded[stamp]
+
+
+def rescale(result, factor, columns=('VOLUMN',)):
+    """
+    기준 통화 집계 결과 -> 표시 통화. 금액 컬럼(columns)만 factor 배
+    DataFrame(컬럼), Series(이름), dict(키, 코호트 행렬 등), 숫자 모두 지원
+    """
+    if factor == 1 or result is None:
+        return result
+    if isinstance(result, dict):
+        return {k: v * factor if k in columns else v for k, v in result.items()}
+    if isinstance(result, pd.DataFrame):
+        present = [c for c in columns if c in result.columns]
+        return result.assign(**{c: result[c] * factor for c in present}) if present else result
+    if isinstance(result, pd.Series):
+        return result * factor if result.name in columns else result
+    return result * factor
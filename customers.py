@@ -0,0 +1,149 @@
+# =============================================================================
+# 고객 차원 테이블
+# - 데이터셋 버전별로 한 번만 만들고, 고객 단위 지표는 행 데이터 대신 여기서 계산
+# - 고객 1명 = 배열 1칸 (pandas 객체 대신 numpy 배열로 보관해 메모리 절약)
+#
+#   first_period / last_period   첫/마지막 거래월 (정수 기간, engine.month_index)
+#   volume / trx                 누적 거래금액 / 거래건수
+#   month_bits                   거래월 활동 비트맵 (uint64, 64개월 단위)
+#   country_bits / service_bits  거래한 국가 / 서비스 비트맵
+#   primary_country / _service   거래금액 기준 주 이용 국가 / 서비스 (코드)
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+from engine import month_index
+
+
+def _bitmap(rows, slots, n_rows, n_slots):
+    # (행, 슬롯) 쌍을 uint64 비트맵으로 (중복 쌍은 먼저 제거)
+    pairs = pd.unique(rows.astype('int64') * n_slots + slots)
+    rows, slots = pairs // n_slots, pairs % n_slots
+    bits = np.zeros((n_rows, max(1, (n_slots + 63) // 64)), dtype=np.uint64)
+    np.bitwise_or.at(bits, (rows, slots // 64), np.left_shift(np.uint64(1), (slots % 64).astype(np.uint64)))
+    return bits
+
+
+def _mask(slots, n_slots):
+    mask = np.zeros(max(1, (n_slots + 63) // 64), dtype=np.uint64)
+    for slot in slots:
+        if slot >= 0:
+            mask[slot // 64] |= np.uint64(1) << np.uint64(slot % 64)
+    return mask
+
+
+def _popcount(bits):
+    # 고객별 켜진 비트 수
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits).sum(axis=1)
+    return np.unpackbits(bits.view(np.uint8), axis=1).sum(axis=1)
+
+
+def _primary(customer, codes, weights, n_customers):
+    # 고객별 거래금액이 가장 큰 코드
+    agg = pd.DataFrame({'c': customer, 'k': codes, 'v': weights}).groupby(['c', 'k'], sort=False)['v'].sum().reset_index()
+    agg = agg.sort_values(['c', 'v'], ascending=[True, False]).drop_duplicates('c')
+    primary = np.full(n_customers, -1, dtype=np.int32)
+    primary[agg['c'].to_numpy()] = agg['k'].to_numpy()
+    return primary
+
+
+class CustomerTable:
+    def __init__(self, frame):
+        customer, self.ids = pd.factorize(frame['CUSTOMERID'])
+        valid = customer >= 0
+        customer = customer[valid]
+        n = len(self.ids)
+
+        period = month_index(frame['TRANSACTION_APPROVED_MONTH'])[valid]
+        known = period >= 0
+        self.base_period = int(period[known].min()) if known.any() else 0
+        self.n_months = int(period[known].max() - self.base_period + 1) if known.any() else 0
+
+        volume = np.nan_to_num(frame['VOLUMN'].to_numpy(dtype='float64')[valid])
+        self.volume = np.bincount(customer, weights=volume, minlength=n)
+        self.trx = np.bincount(customer, weights=frame['TRX_COUNT'].to_numpy(dtype='float64')[valid], minlength=n).astype('int64')
+
+        self.first_period = np.full(n, np.iinfo(np.int32).max, dtype=np.int32)
+        self.last_period = np.full(n, -1, dtype=np.int32)
+        np.minimum.at(self.first_period, customer[known], period[known])
+        np.maximum.at(self.last_period, customer[known], period[known])
+
+        self.month_bits = _bitmap(customer[known], period[known] - self.base_period, n, max(self.n_months, 1))
+
+        country, countries = pd.factorize(frame['country'].to_numpy()[valid])
+        service, services = pd.factorize(frame['PAYMENT_SERVICE_DIV'].to_numpy()[valid])
+        self.countries, self.services = pd.Index(countries), pd.Index(services)
+        self.country_bits = _bitmap(customer, country, n, max(len(self.countries), 1))
+        self.service_bits = _bitmap(customer, service, n, max(len(self.services), 1))
+        self.primary_country = _primary(customer, country, volume, n)
+        self.primary_service = _primary(customer, service, volume, n)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        arrays = [self.volume, self.trx, self.first_period, self.last_period, self.month_bits,
+                  self.country_bits, self.service_bits, self.primary_country, self.primary_service]
+        return sum(a.nbytes for a in arrays)
+
+    # --- 조건 -> 고객 마스크 --------------------------------------------------
+    def _month_slots(self, months):
+        periods = month_index(pd.Series(list(months), dtype='object'))
+        slots = periods[periods >= 0] - self.base_period
+        return slots[(slots >= 0) & (slots < self.n_months)]
+
+    def active_in(self, months=None, countries=None, services=None):
+        """조건에 맞는 거래가 한 번이라도 있는 고객 (각 조건은 OR, 조건끼리는 AND)"""
+        active = np.ones(len(self), dtype=bool)
+        checks = [
+            (months, self.month_bits, lambda v: _mask(self._month_slots(v), max(self.n_months, 1))),
+            (countries, self.country_bits, lambda v: _mask(self.countries.get_indexer(list(v)), len(self.countries))),
+            (services, self.service_bits, lambda v: _mask(self.services.get_indexer(list(v)), len(self.services))),
+        ]
+        for values, bits, to_mask in checks:
+            if values is not None:
+                active &= ((bits & to_mask(values)) != 0).any(axis=1)
+        return active
+
+    def segment(self, countries=None, services=None):
+        """주 이용 국가 / 서비스 기준 고객 세그먼트"""
+        selected = np.ones(len(self), dtype=bool)
+        if countries is not None:
+            selected &= np.isin(self.primary_country, self.countries.get_indexer(list(countries)))
+        if services is not None:
+            selected &= np.isin(self.primary_service, self.services.get_indexer(list(services)))
+        return selected
+
+    def count_active(self, months=None, countries=None, services=None, within=None):
+        """
+        고유 고객 수. 행 단위 필터 결과와 정확히 같을 때만 값을 반환하고,
+        두 개 이상의 차원이 동시에 제한되면 None (행 데이터로 계산해야 함)
+        within: 대상 고객 마스크 (RFM 세그먼트 필터 등, 고객 단위라 행 필터와 항상 일치)
+        """
+        restricted = sum(v is not None for v in (months, countries, services))
+        if restricted > 1:
+            return None
+        active = self.active_in(months, countries, services)
+        if within is not None:
+            active &= within
+        return int(active.sum())
+
+    def summary(self, selected, latest_month=None, prev_month=None):
+        """선택된 고객들의 요약 지표"""
+        n = int(selected.sum())
+        active_months = _popcount(self.month_bits)
+        result = {
+            'customers': n,
+            'avg_volume': float(self.volume[selected].mean()) if n else 0.0,
+            'avg_trx': float(self.trx[selected].mean()) if n else 0.0,
+            'avg_active_months': float(active_months[selected].mean()) if n else 0.0,
+        }
+        if latest_month is not None:
+            latest = month_index(pd.Series([latest_month], dtype='object'))[0]
+            result['new'] = int((selected & (self.first_period == latest)).sum())
+            if prev_month is not None:
+                retained = self.active_in(months=[latest_month]) & self.active_in(months=[prev_month])
+                result['retained'] = int((selected & retained).sum())
+        return result
@@ -0,0 +1,97 @@
+# =============================================================================
+# 파일 간 중복 행 제거
+# - 여러 파일에 같은 행(키 컬럼 값이 같은 행)이 있으면 우선순위가 가장 높은 파일의 행만 남김
+#   (기간이 겹치는 월별 추출 파일을 함께 올려도 거래금액이 두 번 더해지지 않도록)
+# - 행 비교는 키 컬럼 해시(uint64, validation.row_hashes)로만 하므로 행 데이터를 모으지 않음
+#   -> 메모리는 행당 해시/코드 몇 개 분량, 계산은 해시 테이블 1회 통과(선형 시간)
+# - 같은 파일 안의 중복은 건드리지 않음 (파일 간 중복만 제거)
+#
+# 우선순위 정책 (DASHBOARD_DEDUPE_POLICY, 화면에서 변경 가능)
+#   latest   : 나중에 추가한 파일 우선 (새로 받은 추출본이 이전 추출본을 대체)
+#   earliest : 먼저 추가한 파일 우선
+#   keep     : 제거하지 않음 (이전 방식, 중복 행이 모두 합산됨)
+#
+# 키 컬럼 (DASHBOARD_DEDUPE_KEYS, 쉼표 구분)
+#   기본은 전체 컬럼 (모든 값이 같은 행만 중복). 예: 정정된 금액으로 다시 받은 추출본이면
+#   "country,PAYMENT_SERVICE_DIV,TRANSACTION_APPROVED_MONTH,CUSTOMERID" 처럼 금액을 빼고 지정
+# =============================================================================
+import os
+
+import numpy as np
+import pandas as pd
+
+from validation import row_hashes
+
+DEDUPE_POLICIES = {
+    'latest': '나중에 추가한 파일 우선',
+    'earliest': '먼저 추가한 파일 우선',
+    'keep': '중복 유지 (제거 안 함)',
+}
+DEFAULT_POLICY = os.environ.get("DASHBOARD_DEDUPE_POLICY", "latest")
+if DEFAULT_POLICY not in DEDUPE_POLICIES:
+    DEFAULT_POLICY = "latest"
+
+DEDUPE_KEYS = [c.strip() for c in os.environ.get("DASHBOARD_DEDUPE_KEYS", "").split(",") if c.strip()] or None
+
+
+def key_hashes(frame, keys=DEDUPE_KEYS):
+    """행별 키 해시. keys 가 None 이면 전체 컬럼 (내부 컬럼 제외)"""
+    if keys is not None:
+        keys = [c for c in keys if c in frame.columns]
+    return row_hashes(frame, keys)
+
+
+def find_duplicates(hashes_by_file, order, policy=DEFAULT_POLICY):
+    """
+    파일별 {제외 행 수, 제외할 키 해시}. order 는 추가 순서 (먼저 추가한 파일부터)
+    같은 키가 여러 파일에 있으면 우선순위가 가장 높은 파일이 그 키의 행을 모두 가짐
+    """
+    empty = np.empty(0, dtype=np.uint64)
+    result = {name: {'dropped': 0, 'hashes': empty} for name in order}
+    if policy == 'keep' or len(order) < 2:
+        return result
+
+    ranked = list(order) if policy == 'earliest' else list(order)[::-1]
+    sizes = [len(hashes_by_file[name]) for name in ranked]
+    hashes = np.concatenate([hashes_by_file[name] for name in ranked])
+    owner = np.repeat(np.arange(len(ranked), dtype=np.int32), sizes)
+
+    # 키별 승자 파일 = 키가 나온 파일 중 순위가 가장 높은(번호가 가장 작은) 파일
+    codes, uniques = pd.factorize(hashes)
+    winner = np.full(len(uniques), len(ranked), dtype=np.int32)
+    np.minimum.at(winner, codes, owner)
+    lost = winner[codes] != owner
+
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    for i, name in enumerate(ranked):
+        file_lost = lost[bounds[i]:bounds[i + 1]]
+        if file_lost.any():
+            result[name] = {
+                'dropped': int(file_lost.sum()),
+                'hashes': pd.unique(hashes[bounds[i]:bounds[i + 1]][file_lost]),
+            }
+    return result
+
+
+def drop_duplicates(frame, drop_hashes, keys=DEDUPE_KEYS):
+    """find_duplicates 결과의 키 해시에 해당하는 행을 뺀 frame"""
+    if not len(drop_hashes) or frame.empty:
+        return frame
+    keep = ~pd.Series(key_hashes(frame, keys)).isin(drop_hashes).to_numpy()
+    return frame[keep].reset_index(drop=True)
+
+
+def dedupe_table(file_rows, duplicates, order, policy):
+    """파일별 반영 현황 표 (화면 표시용)"""
+    ranked = list(order) if policy == 'earliest' else list(order)[::-1]
+    rows = []
+    for name in order:
+        dropped = duplicates[name]['dropped'] if name in duplicates else 0
+        rows.append({
+            '파일': name,
+            '우선순위': ranked.index(name) + 1 if policy != 'keep' else None,
+            '원본 행': file_rows[name],
+            '중복 제외': dropped,
+            '반영 행': file_rows[name] - dropped,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,247 @@
+# =============================================================================
+# 집계 엔진
+# - app.py 의 groupby-sum / nunique / pivot_table 을 한 곳에서 실행
+# - DASHBOARD_ENGINE 환경변수로 pandas(기본) 또는 polars(멀티스레드) 선택
+# - 어떤 엔진을 쓰든 결과는 pandas 객체로 동일하게 반환
+# =============================================================================
+import os
+
+import numpy as np
+import pandas as pd
+
+ENGINE = os.environ.get("DASHBOARD_ENGINE", "pandas").strip().lower()
+
+# polars 스레드 수는 import 전에 정해야 적용됨
+if os.environ.get("DASHBOARD_ENGINE_THREADS"):
+    os.environ.setdefault("POLARS_MAX_THREADS", os.environ["DASHBOARD_ENGINE_THREADS"])
+
+pl = None
+if ENGINE == "polars":
+    try:
+        import polars as pl
+    except ImportError:
+        # polars 미설치 시 pandas 로 자동 전환
+        ENGINE = "pandas"
+
+
+def engine_name():
+    return ENGINE
+
+
+# 같은 DataFrame 을 여러 번 집계할 때 polars 변환을 재사용 (최근 1개만 보관)
+# (frame, columns, result) 튜플을 통째로 교체하므로 여러 스레드에서 호출해도 안전
+_polars_cache = [None]
+
+
+def clear_polars_cache():
+    _polars_cache[0] = None
+
+
+def _to_polars(frame, columns):
+    cached = _polars_cache[0]
+    if cached is not None and cached[0] is frame and set(columns) <= set(cached[1]):
+        return cached[2]
+    result = pl.from_pandas(frame[list(columns)])
+    _polars_cache[0] = (frame, list(columns), result)
+    return result
+
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+
+def group_sum(frame, by, values):
+    """frame.groupby(by)[values].sum() 과 같은 결과 (키 정렬, 결측 키 제외)"""
+    if ENGINE != "polars":
+        return frame.groupby(by)[values].sum()
+
+    keys = _as_list(by)
+    cols = _as_list(values)
+    result = (
+        _to_polars(frame, keys + cols)
+        .drop_nulls(keys)
+        .group_by(keys)
+        .agg([pl.col(c).sum() for c in cols])
+        .sort(keys)
+        .to_pandas()
+    )
+    result = result.set_index(by)
+    # pandas 와 동일하게 정수 합계는 int64 유지
+    for c in cols:
+        if frame[c].dtype != result[c].dtype:
+            result[c] = result[c].astype(frame[c].dtype)
+    return result[values]
+
+
+def nunique(frame, column):
+    """frame[column].nunique() 과 같은 결과 (결측 제외)"""
+    if ENGINE != "polars":
+        return frame[column].nunique()
+    return int(_to_polars(frame, [column])[column].drop_nulls().n_unique())
+
+
+def pivot_sum(frame, index, columns, values):
+    """pivot_table(aggfunc='sum', fill_value=0) 과 같은 결과"""
+    if ENGINE != "polars":
+        return frame.pivot_table(
+            values=values,
+            index=index,
+            columns=columns,
+            aggfunc='sum',
+            fill_value=0
+        )
+    return group_sum(frame, [index, columns], values).unstack(fill_value=0)
+
+
+# =============================================================================
+# 리프 집계 큐브
+# - (소스 파일, 국가, 서비스, 거래월) 단위 합계
+# - 파일별로 한 번만 만들어 두고 목록/순위 계산은 큐브에서 처리
+# =============================================================================
+CUBE_DIMENSIONS = ['_source_file', 'country', 'PAYMENT_SERVICE_DIV', 'TRANSACTION_APPROVED_MONTH']
+# VOLUMN_LOCAL: 통화 환산(currency.py) 전 현지 통화 금액 (환율표가 있을 때만, 국가 단위로만 의미 있음)
+CUBE_MEASURES = ['VOLUMN', 'TRX_COUNT', 'VOLUMN_LOCAL']
+
+
+def build_cube(frame):
+    keys = [c for c in CUBE_DIMENSIONS if c in frame.columns]
+    measures = {m: (m, 'sum') for m in CUBE_MEASURES if m in frame.columns}
+    cube = frame.groupby(keys, dropna=False, sort=False).agg(
+        _rows=(keys[0], 'size'),
+        **measures
+    ).reset_index()
+    return cube
+
+
+def merge_cubes(cubes):
+    # 큐브는 소스 파일별로 나뉘어 있으므로 이어 붙이기만 하면 됨
+    cubes = [c for c in cubes if c is not None and not c.empty]
+    if not cubes:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS + ['_rows'] + CUBE_MEASURES).astype(
+            {'_rows': 'int64', 'VOLUMN': 'float64', 'TRX_COUNT': 'int64', 'VOLUMN_LOCAL': 'float64'}
+        )
+    return pd.concat(cubes, ignore_index=True)
+
+
+def dimension_values(cube, column):
+    if column not in cube.columns:
+        return []
+    return sorted(cube[column].dropna().unique())
+
+
+def filter_cube(cube, sources=None, countries=None, services=None, months=None):
+    """사이드바 필터를 큐브(리프 집계)에 적용. None 인 차원은 제한하지 않음"""
+    mask = np.ones(len(cube), dtype=bool)
+    for column, values in (
+        ('_source_file', sources),
+        ('country', countries),
+        ('PAYMENT_SERVICE_DIV', services),
+        ('TRANSACTION_APPROVED_MONTH', months),
+    ):
+        if values is not None and column in cube.columns:
+            mask &= cube[column].isin(values).to_numpy()
+    return cube[mask]
+
+
+# =============================================================================
+# 코호트 엔진
+# - 가입월 x 가입 후 경과 개월 행렬을 한 번의 벡터 연산으로 계산
+# - 월 문자열은 고유값만 파싱해 정수 기간(연*12+월)으로 변환
+# =============================================================================
+def month_index(values):
+    """월 값('2024-01', '202401', '2024-01-15' 등) -> (정수 기간 배열, 파싱 실패는 -1)"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    digits = pd.Series(uniques, dtype='object').astype(str).str.replace(r'\D', '', regex=True).str[:6]
+    number = pd.to_numeric(digits, errors='coerce')
+    year, month = number // 100, number % 100
+    period = (year * 12 + month - 1).where((month >= 1) & (month <= 12) & (year >= 1900))
+    lookup = np.append(period.fillna(-1).to_numpy(dtype='int64'), -1)
+    return lookup[codes]
+
+
+def period_label(period):
+    return f"{period // 12}-{period % 12 + 1:02d}"
+
+
+COHORT_METRICS = ['VOLUMN', 'TRX_COUNT', 'customers']
+
+
+def cohort_matrix(frame, cohort_col='CUSTOMER_CREATEDDATE_MONTH',
+                  period_col='TRANSACTION_APPROVED_MONTH', customer_col='CUSTOMERID'):
+    """{지표: DataFrame(가입월 x 경과 개월)} - 거래금액, 거래건수, 활성 고객 수"""
+    cohort = month_index(frame[cohort_col])
+    period = month_index(frame[period_col])
+    offset = period - cohort
+    valid = (cohort >= 0) & (period >= 0) & (offset >= 0)
+    if not valid.any():
+        return {}
+
+    cohort, offset = cohort[valid], offset[valid]
+    base = cohort.min()
+    n_cohorts = int(cohort.max() - base + 1)
+    n_offsets = int(offset.max() + 1)
+    cell = (cohort - base) * n_offsets + offset
+    size = n_cohorts * n_offsets
+
+    result = {}
+    for measure in ['VOLUMN', 'TRX_COUNT']:
+        if measure in frame.columns:
+            weights = frame[measure].to_numpy()[valid]
+            result[measure] = np.bincount(cell, weights=np.nan_to_num(weights.astype('float64')), minlength=size)
+    if customer_col in frame.columns:
+        customer_codes, customers = pd.factorize(frame[customer_col].to_numpy()[valid])
+        keep = customer_codes >= 0
+        pairs = pd.unique(cell[keep] * np.int64(max(len(customers), 1)) + customer_codes[keep])
+        result['customers'] = np.bincount(pairs // max(len(customers), 1), minlength=size)
+
+    index = pd.Index([period_label(base + i) for i in range(n_cohorts)], name='가입월')
+    columns = pd.RangeIndex(n_offsets, name='경과 개월')
+    # 실제 거래가 있는 코호트(행)만 남김
+    has_data = np.bincount(cell // n_offsets, minlength=n_cohorts) > 0
+    return {
+        name: pd.DataFrame(values.reshape(n_cohorts, n_offsets), index=index, columns=columns)[has_data]
+        for name, values in result.items()
+    }
+
+
+# =============================================================================
+# 섹션 집계
+# - 대시보드 백그라운드 작업과 집계 서비스(agg_service.py)가 같은 정의를 사용
+# - 이름 -> (필요한 컬럼, 계산 함수, 리프 큐브 롤업 가능 여부)
+# - 합계형 섹션은 합계의 합계가 같으므로 행 데이터 대신 필터된 큐브에 그대로 적용
+# =============================================================================
+SECTION_AGGREGATES = {
+    'country_totals': (
+        ['country'],
+        lambda f: group_sum(f, 'country', ['VOLUMN', 'TRX_COUNT']), True),
+    'service_totals': (
+        ['PAYMENT_SERVICE_DIV'],
+        lambda f: group_sum(f, 'PAYMENT_SERVICE_DIV', ['VOLUMN', 'TRX_COUNT']), True),
+    'country_service': (
+        ['country', 'PAYMENT_SERVICE_DIV'],
+        lambda f: group_sum(f, ['country', 'PAYMENT_SERVICE_DIV'], 'VOLUMN'), True),
+    'month_totals': (
+        ['TRANSACTION_APPROVED_MONTH'],
+        lambda f: group_sum(f, 'TRANSACTION_APPROVED_MONTH', ['VOLUMN', 'TRX_COUNT']), True),
+    'country_month': (
+        ['country', 'TRANSACTION_APPROVED_MONTH'],
+        lambda f: group_sum(f, ['country', 'TRANSACTION_APPROVED_MONTH'], ['VOLUMN', 'TRX_COUNT']), True),
+    'service_month': (
+        ['TRANSACTION_APPROVED_MONTH', 'PAYMENT_SERVICE_DIV'],
+        lambda f: group_sum(f, ['TRANSACTION_APPROVED_MONTH', 'PAYMENT_SERVICE_DIV'], 'VOLUMN'), True),
+    'cohort': (
+        ['CUSTOMER_CREATEDDATE_MONTH', 'TRANSACTION_APPROVED_MONTH'],
+        cohort_matrix, False),
+}
+
+
+def available_sections(columns):
+    return [name for name, (required, _, _) in SECTION_AGGREGATES.items() if set(required) <= set(columns)]
+
+
+def section_from_cube(name):
+    return SECTION_AGGREGATES[name][2]
+
+
+def section_aggregate(name, frame):
+    return SECTION_AGGREGATES[name][1](frame)
@@ -0,0 +1,236 @@
+# =============================================================================
+# 폴더 감시 자동 수집
+# - 지정한 로컬 폴더의 .xlsx/.csv 추출 파일을 주기적으로 확인해, 새 파일/내용이 바뀐 파일을
+#   누적 데이터셋(DatasetStore)에 자동으로 추가 (화면 업로드와 같은 읽기/검증 경로: load_file)
+# - 읽기/검증/파티션 쓰기/파일 몫 집계(stage_file)는 백그라운드 워커에서 하므로 화면 갱신(rerun)을
+#   막지 않음. 반영(commit)은 목록 교체만 하는 짧은 잠금
+#   대시보드 안에서는 스레드 워커 (Streamlit 은 앱 스크립트를 __main__ 으로 실행하므로 spawn 프로세스가
+#   앱 전체를 다시 실행함), 별도 프로세스(명령줄)로 실행하면 프로세스 워커
+# - 복사 중인 파일을 읽지 않도록 크기/수정 시각이 두 번 연속 같을 때만 처리
+# - 폴더에서 지워진 파일은 데이터셋에서 지우지 않음 (삭제는 화면의 저장소 관리에서)
+# - 화면에서 삭제한 파일은 내용이 바뀌기 전까지 다시 넣지 않음 (manifest 의 watched 기록)
+#
+# 사용법:
+#   DASHBOARD_WATCH_DIR=/data/exports streamlit run app.py    (대시보드 프로세스 안에서 감시)
+#   python ingest.py --dir /data/exports                        (별도 프로세스로 감시, 대시보드 여러 개일 때)
+# =============================================================================
+import argparse
+import collections
+import functools
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from currency import load_fx_table
+from store import DEFAULT_ROOT, DatasetStore
+from validation import SchemaError, validate_frame
+
+WATCH_DIR = os.environ.get("DASHBOARD_WATCH_DIR", "")
+WATCH_INTERVAL = float(os.environ.get("DASHBOARD_WATCH_INTERVAL", 10))
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv')
+
+
+def load_file(file_name, source, fx=None):
+    """
+    파일 하나를 읽어 컬럼 단위로 검증(환율표 fx 가 있으면 기준 통화로 환산):
+    (정상 행, 격리 행, 품질 리포트, 정상 행 해시)
+    읽기 실패/필수 컬럼 없음이면 (None, None, {'error': 사유}, None). source 는 경로 또는 파일 객체
+    """
+    try:
+        if file_name.endswith('.csv'):
+            df = pd.read_csv(source)
+        else:
+            df = pd.read_excel(source)
+        clean, quarantine, report, hashes = validate_frame(df, fx)
+    except SchemaError as e:
+        return None, None, {'error': str(e)}, None
+    except Exception as e:
+        return None, None, {'error': f"파일을 읽을 수 없음 ({type(e).__name__})"}, None
+    clean['_source_file'] = file_name  # 소스 파일 추적용
+    return clean, quarantine, report, hashes
+
+
+def file_digest(path):
+    # 업로드 파일과 같은 sha1 (같은 파일을 업로드/감시 양쪽으로 넣어도 한 번만 반영)
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stage(root, name, path, digest):
+    # 워커 프로세스: 읽기 + 검증 + 파티션/집계 준비. (준비 결과, 오류 사유) 중 하나만 있음
+    clean, quarantine, report, hashes = load_file(name, path, load_fx_table())
+    if clean is None:
+        return None, report['error']
+    staged = DatasetStore(root).stage_file(name, clean, digest, quality=report,
+                                           quarantine=quarantine, row_hashes=hashes)
+    return staged, None
+
+
+class DirectoryWatcher:
+    def __init__(self, directory, store, interval=WATCH_INTERVAL, workers=1, processes=False):
+        self.directory = os.path.abspath(directory)
+        self.store = store
+        self.interval = interval
+        if processes:
+            # fork 는 부모의 pyarrow 스레드 풀 상태를 물려받아 멈출 수 있으므로 spawn 사용 (agg_service.py 와 동일)
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._seen = {}      # 직전 확인 때의 (크기, 수정 시각)
+        self._handled = {}   # 처리를 마친 (크기, 수정 시각) - 같으면 다시 보지 않음
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.errors = {}
+        self.ingested = collections.deque(maxlen=20)
+        self.last_scan = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ingest-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.scan()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            self._stop.wait(self.interval)
+
+    def _listing(self):
+        entries = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                # ~$ 로 시작하는 파일은 Excel 이 열어 둔 잠금 파일
+                if (entry.is_file() and entry.name.lower().endswith(SUPPORTED_EXTENSIONS)
+                        and not entry.name.startswith(('~$', '.'))):
+                    stat = entry.stat()
+                    entries[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return entries
+
+    def scan(self):
+        """폴더를 한 번 확인해 처리할 파일을 워커에 제출. 제출한 파일 이름 목록"""
+        entries = self._listing()
+        submitted = []
+        for name, stat in entries.items():
+            with self._lock:
+                if name in self._pending or self._handled.get(name) == stat:
+                    continue
+            if self._seen.get(name) != stat:
+                continue  # 아직 쓰는 중일 수 있음 - 다음 확인 때 그대로면 처리
+            path = os.path.join(self.directory, name)
+            digest = file_digest(path)
+            self.store.refresh()
+            if self.store.contains(name, digest) or self.store.watched_digest(name) == digest:
+                with self._lock:
+                    self._handled[name] = stat
+                continue
+            future = self.pool.submit(_stage, self.store.root, name, path, digest)
+            with self._lock:
+                self._pending[name] = future
+            future.add_done_callback(functools.partial(self._finish, name, stat))
+            submitted.append(name)
+        self._seen = entries
+        self.last_scan = time.strftime("%Y-%m-%d %H:%M:%S")
+        return submitted
+
+    def _finish(self, name, stat, future):
+        # 워커 결과 반영 (워커 스레드/풀 관리 스레드에서 실행). 실패한 파일은 내용이 바뀌면 다시 시도
+        try:
+            staged, error = future.result()
+            if staged is not None:
+                self.store.commit(staged, watched=True)
+        except Exception as e:
+            staged, error = None, f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._pending.pop(name, None)
+            self._handled[name] = stat
+            if error is None:
+                self.errors.pop(name, None)
+                self.ingested.appendleft((name, staged["info"]["rows"], time.strftime("%Y-%m-%d %H:%M:%S")))
+            else:
+                self.errors[name] = error
+
+    def wait(self, timeout=None):
+        """제출한 파일 처리가 모두 끝날 때까지 대기 (명령줄/점검용)"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.05)
+
+    def status(self):
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'interval': self.interval,
+                'last_scan': self.last_scan,
+                'last_error': self.last_error,
+                'pending': sorted(self._pending),
+                'errors': dict(self.errors),
+                'ingested': list(self.ingested),
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="폴더 감시 자동 수집")
+    parser.add_argument("--dir", default=WATCH_DIR, help="감시할 폴더 (기본: DASHBOARD_WATCH_DIR)")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="누적 데이터셋 저장 위치")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="확인 주기(초)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--once", action="store_true", help="한 번만 확인하고 종료")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir 또는 DASHBOARD_WATCH_DIR 를 지정하세요")
+
+    watcher = DirectoryWatcher(args.dir, DatasetStore(args.root), args.interval, args.workers, processes=True)
+    print(f"감시 시작: {watcher.directory} -> {watcher.store.root} ({args.interval:g}초 주기)")
+    reported, reported_errors = set(), {}
+    try:
+        while True:
+            watcher.scan()
+            if args.once:
+                # 크기/수정 시각 확인을 위해 한 번 더 보고 처리 완료까지 대기
+                time.sleep(min(args.interval, 1))
+                watcher.scan()
+                watcher.wait()
+            status = watcher.status()
+            for item in reversed(status['ingested']):
+                if item not in reported:
+                    reported.add(item)
+                    print(f"[{item[2]}] 추가: {item[0]} ({item[1]:,}행) -> v{watcher.store.version}")
+            for name, error in status['errors'].items():
+                if reported_errors.get(name) != error:
+                    print(f"실패: {name} - {error}")
+            reported_errors = status['errors']
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# =============================================================================
+# 섹션 백그라운드 계산
+# - 필터 조합(signature) 하나에 대한 섹션별 집계 작업 묶음
+# - 작업은 프로세스 공용 스레드 풀에서 실행되고, 화면은 결과가 준비되는 순서대로 채워짐
+# - 필터가 바뀌면 이전 묶음을 취소 (아직 시작하지 않은 작업은 실행되지 않음)
+# =============================================================================
+import os
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+SECTION_WORKERS = int(os.environ.get("DASHBOARD_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def create_executor():
+    return ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="section")
+
+
+class SectionJobs:
+    def __init__(self, executor, signature):
+        self.executor = executor
+        self.signature = signature
+        self.futures = {}
+        self._cancelled = threading.Event()
+
+    def submit(self, name, fn, *args, **kwargs):
+        # 같은 필터로 다시 실행(rerun)되면 이미 제출한 작업을 그대로 재사용
+        if name not in self.futures:
+            self.futures[name] = self.executor.submit(self._run, fn, args, kwargs)
+        return self.futures[name]
+
+    def _run(self, fn, args, kwargs):
+        if self._cancelled.is_set():
+            raise CancelledError()
+        return fn(*args, **kwargs)
+
+    def done(self, name):
+        return self.futures[name].done()
+
+    def result(self, name):
+        return self.futures[name].result()
+
+    def cancel(self):
+        self._cancelled.set()
+        for future in self.futures.values():
+            future.cancel()
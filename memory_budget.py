@@ -0,0 +1,271 @@
+# =============================================================================
+# 메모리 예산
+# - 프로세스가 들고 있는 행 데이터 파티션과 내보내기 파일(CSV/Excel)을 크기와 함께 한 곳에서 관리하고,
+#   합계가 예산(DASHBOARD_MEMORY_MB)을 넘으면 가장 오래 쓰지 않은 항목부터 메모리에서 내림
+#   업로드 파티션: 처음 내릴 때 spill 폴더에 parquet(컬럼 형식)로 써 두고 다시 필요하면 읽음
+#   저장소 파티션: 이미 parquet 파일이 있으므로 쓰지 않고 내리기만 함
+#   내보내기 파일: 만든 바이트를 그대로 파일로 씀
+# - 직접 관리하지 않는 캐시(섹션 결과 캐시, 고객 테이블, 탐색 표본)는 크기만 보고받아 예산에 포함
+#   (그만큼 관리 항목을 더 내림). 각 캐시의 한도는 캐시 자체가 가짐
+# - 항목은 넣은 뒤 바뀌지 않음 (같은 키 = 같은 내용) -> 내렸다 다시 읽어도 같은 값
+# - 내보내기 파일은 최근 DASHBOARD_MAX_EXPORTS 개만 보관 (오래 쓰지 않은 것부터 spill 파일째 삭제)
+# - 데이터셋이 바뀌면 어느 세션도 쓰지 않게 된 이전 데이터셋 항목을 접두사로 지움 (discard_prefix, DatasetTracker)
+#   닫힌 세션은 알 수 없으므로 DASHBOARD_SESSION_TTL 초 동안 다시 실행되지 않은 세션은 끝난 것으로 봄
+#   (그 세션이 돌아오면 지워진 항목은 처음 쓸 때 다시 만듦)
+#   디스크에 써 둔 spill 파일도 함께 삭제 (저장소 parquet 파일은 건드리지 않음)
+# - spill 에 실패한 항목(디스크 오류, parquet 로 쓸 수 없는 컬럼)은 메모리에 그대로 둠
+# - spill 폴더(DASHBOARD_SPILL_DIR, 없으면 임시 폴더)는 프로세스가 끝나면 정리
+# =============================================================================
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+
+from result_cache import result_nbytes
+
+MEMORY_BUDGET_MB = int(os.environ.get("DASHBOARD_MEMORY_MB", 2048))
+SPILL_DIR = os.environ.get("DASHBOARD_SPILL_DIR", "")
+MAX_EXPORT_ENTRIES = int(os.environ.get("DASHBOARD_MAX_EXPORTS", 16))
+SESSION_TTL_SECONDS = int(os.environ.get("DASHBOARD_SESSION_TTL", 3600))
+
+KIND_LABELS = {
+    'partition': '행 데이터',
+    'export': '내보내기 파일',
+}
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes=MEMORY_BUDGET_MB * 1024 * 1024, spill_dir=SPILL_DIR, max_exports=MAX_EXPORT_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_exports = max_exports
+        self._spill_root = spill_dir
+        self._tempdir = None
+        # 키 -> {'value': 메모리의 값(내렸으면 None), 'nbytes', 'kind', 'path': 디스크 사본(없으면 None),
+        #        'spilled': path 가 spill 폴더에 직접 쓴 파일인지, 'pinned': spill 에 실패해 메모리에 둘 항목인지}
+        self._entries = OrderedDict()
+        self._watched = {}
+        self._lock = threading.RLock()
+        self.spills = 0      # 디스크에 새로 쓴 횟수
+        self.evictions = 0   # 메모리에서 내린 횟수
+        self.reloads = 0     # 내린 항목을 다시 읽은 횟수
+        self.spill_failures = 0
+        self.discards = 0    # 지운 항목 수
+
+    def _spill_dir(self):
+        if self._spill_root:
+            os.makedirs(self._spill_root, exist_ok=True)
+            return self._spill_root
+        if self._tempdir is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="dashboard-spill-")
+        return self._tempdir.name
+
+    def contains(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, value, kind='partition', path=None):
+        """항목 등록 (DataFrame 또는 bytes). path 는 같은 내용이 이미 있는 parquet 파일 (있으면 내릴 때 쓰지 않음)"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {'value': value, 'nbytes': result_nbytes(value), 'kind': kind, 'path': path,
+                                  'spilled': False, 'pinned': False}
+            if kind == 'export':
+                exports = [k for k, e in self._entries.items() if e['kind'] == 'export']
+                for old in exports[:max(len(exports) - self.max_exports, 0)]:
+                    self._remove(old)
+            self._enforce(keep=key)
+        return key
+
+    def discard(self, key):
+        """항목 삭제 (spill 파일도 삭제). 없는 키면 무시"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def discard_prefix(self, prefix):
+        """키가 prefix 로 시작하는 항목을 모두 삭제 (문자열 키는 문자열 접두사, 튜플 키는 앞쪽 원소). 지운 수"""
+        with self._lock:
+            keys = [key for key in self._entries if _has_prefix(key, prefix)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.discards += 1
+        if entry['spilled']:
+            try:
+                os.remove(entry['path'])
+            except OSError:
+                pass
+
+    def get(self, key):
+        """항목 값 (내렸으면 디스크에서 다시 읽음). 없는 키, 읽는 사이 지워진 항목이면 KeyError"""
+        with self._lock:
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            if entry['value'] is not None:
+                return entry['value']
+            path, is_frame = entry['path'], entry['kind'] != 'export'
+        # 읽기는 잠금 밖에서 (다른 스레드의 조회를 막지 않도록)
+        try:
+            value = pd.read_parquet(path) if is_frame else _read_bytes(path)
+        except OSError as e:
+            # 다른 세션/프리셋 워커가 그 사이 항목을 지워 spill 파일이 없어짐 -> 없는 키와 같게 처리
+            raise KeyError(key) from e
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['value'] is None and entry['path'] == path:
+                entry['value'] = value
+                self.reloads += 1
+                self._enforce(keep=key)
+        return value
+
+    def load(self, key):
+        """PartitionedFrame loader: 등록된 키면 그 값, 아니면(지워졌으면) parquet 경로로 보고 읽어서 등록"""
+        if self.contains(key):
+            try:
+                return self.get(key)
+            except KeyError:
+                pass
+        value = pd.read_parquet(key)
+        self.put(key, value, path=key)
+        return value
+
+    def get_or_put(self, key, build, kind='partition'):
+        if self.contains(key):
+            try:
+                return self.get(key)
+            except KeyError:
+                pass  # 읽는 사이 지워짐 -> 다시 만듦
+        value = build()
+        self.put(key, value, kind)
+        return value
+
+    def watch(self, name, obj):
+        """예산에 포함할 외부 캐시 (nbytes 속성). 객체가 사라지면 자동으로 빠짐"""
+        with self._lock:
+            self._watched[name] = weakref.ref(obj)
+
+    def _external(self):
+        sizes = {}
+        for name, ref in list(self._watched.items()):
+            obj = ref()
+            if obj is None:
+                del self._watched[name]
+            else:
+                sizes[name] = int(obj.nbytes)
+        return sizes
+
+    def _resident(self):
+        return sum(e['nbytes'] for e in self._entries.values() if e['value'] is not None)
+
+    def _enforce(self, keep=None):
+        # 예산 초과분만큼 오래 쓰지 않은 항목부터 내림 (방금 쓴 항목 keep 은 남김)
+        over = self._resident() + sum(self._external().values()) - self.max_bytes
+        for key, entry in self._entries.items():
+            if over <= 0:
+                break
+            if key == keep or entry['value'] is None or entry['pinned']:
+                continue
+            if entry['path'] is None:
+                try:
+                    entry['path'] = self._spill(key, entry)
+                except (OSError, pa.ArrowException):
+                    entry['pinned'] = True
+                    self.spill_failures += 1
+                    continue
+                entry['spilled'] = True
+            entry['value'] = None
+            self.evictions += 1
+            over -= entry['nbytes']
+
+    def _spill(self, key, entry):
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20]
+        is_frame = entry['kind'] != 'export'
+        path = os.path.join(self._spill_dir(), f"{name}.parquet" if is_frame else f"{name}.bin")
+        try:
+            if is_frame:
+                entry['value'].to_parquet(path, index=False)
+            else:
+                with open(path, 'wb') as f:
+                    f.write(entry['value'])
+        except BaseException:
+            # 쓰다 만 파일은 지움 (다음 항목이 같은 이름을 쓰지 않도록)
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        self.spills += 1
+        return path
+
+    def usage(self):
+        with self._lock:
+            resident = {label: 0 for label in KIND_LABELS.values()}
+            spilled = {'entries': 0, 'nbytes': 0}
+            for entry in self._entries.values():
+                if entry['value'] is not None:
+                    resident[KIND_LABELS[entry['kind']]] += entry['nbytes']
+                else:
+                    spilled['entries'] += 1
+                    spilled['nbytes'] += entry['nbytes']
+            resident.update(self._external())
+            return {
+                'max_bytes': self.max_bytes,
+                'nbytes': sum(resident.values()),
+                'by_kind': resident,
+                'entries': len(self._entries),
+                'spilled_entries': spilled['entries'],
+                'spilled_nbytes': spilled['nbytes'],
+                'spills': self.spills,
+                'evictions': self.evictions,
+                'reloads': self.reloads,
+                'spill_failures': self.spill_failures,
+                'discards': self.discards,
+            }
+
+
+class DatasetTracker:
+    """
+    세션별로 지금 쓰는 데이터셋의 예산 키 접두사와 마지막 실행 시각. 세션의 데이터셋이 바뀌거나
+    ttl 초 넘게 실행되지 않은 세션(닫힌 세션)이 있으면, 어느 세션도 더 이상 쓰지 않는 접두사를 돌려줌
+    (다른 세션이 같은 파일을 쓰면 남김)
+    """
+
+    def __init__(self, ttl=SESSION_TTL_SECONDS):
+        self.ttl = ttl
+        self._sessions = {}   # 세션 -> (마지막 실행 시각, 접두사 목록)
+        self._lock = threading.Lock()
+
+    def switch(self, session, prefixes, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            released = list(self._sessions.pop(session, (now, []))[1])
+            for other, (seen, used) in list(self._sessions.items()):
+                if now - seen > self.ttl:
+                    del self._sessions[other]
+                    released += used
+            self._sessions[session] = (now, list(prefixes))
+            in_use = {prefix for _, used in self._sessions.values() for prefix in used}
+            return list(dict.fromkeys(prefix for prefix in released if prefix not in in_use))
+
+    def sessions(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def _has_prefix(key, prefix):
+    if isinstance(prefix, tuple):
+        return isinstance(key, tuple) and key[:len(prefix)] == prefix
+    return isinstance(key, str) and key.startswith(prefix)
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
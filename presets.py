@@ -0,0 +1,213 @@
+# =============================================================================
+# 필터 프리셋
+# - 이름 붙인 사이드바 필터 조합을 JSON 파일 하나(DASHBOARD_PRESETS, 기본 <데이터셋 저장 위치>/presets.json)에
+#   저장해 모든 세션/사용자가 함께 사용. 임시 파일에 쓴 뒤 교체(os.replace)하고, 다른 프로세스가 바꾸면
+#   수정 시각으로 감지해 다시 읽음
+# - 프리셋 항목 (항목이 없으면 전체):
+#   sources / services / segments   값 목록
+#   countries                        값 목록 또는 {'top': N}   (거래금액 Top N, 데이터가 바뀌면 다시 고름)
+#   months                           값 목록 또는 {'last': N}  (최근 N개월)
+# - 프리셋 뷰(materialized view): 프리셋 필터의 섹션 결과를 데이터셋 버전별로 미리 계산해 보관
+#   뷰는 (데이터셋 키, 필터 조합) 단위. 세션마다 데이터셋(업로드 파일, 중복 처리 정책)이 다를 수 있으므로
+#   최근 쓴 데이터셋 DASHBOARD_PRESET_DATASETS 개의 뷰를 함께 보관 (넘으면 가장 오래 쓰지 않은 데이터셋 뷰를 버림)
+#   계산은 전용 워커 스레드 하나에서
+#   프리셋을 열면 보관된 결과를 섹션 결과 캐시에 넣으므로 섹션 계산 없이 바로 그려짐 (KPI 는 뷰에서 바로 읽음)
+#   (결과 캐시에서 밀려나도 뷰에는 남아 있음)
+# =============================================================================
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import result_nbytes
+from store import DEFAULT_ROOT
+
+PRESETS_PATH = os.environ.get("DASHBOARD_PRESETS", os.path.join(DEFAULT_ROOT, "presets.json"))
+PRESET_FIELDS = ['sources', 'countries', 'services', 'months', 'segments']
+PRESET_VIEW_DATASETS = int(os.environ.get("DASHBOARD_PRESET_DATASETS", 4))
+
+
+def make_preset(selection, choices, top_countries):
+    """
+    현재 선택 {항목: 값 목록} -> 프리셋. choices 는 항목별 전체 값 목록, top_countries(n) 은 거래금액 Top n 국가
+    전체를 고른 항목은 저장하지 않고(새 데이터의 값도 포함), Top N 국가 / 최근 N개월은 규칙으로 저장
+    """
+    preset = {}
+    for field in PRESET_FIELDS:
+        values = list(selection.get(field) or [])
+        options = choices.get(field, [])
+        if not values or (field != 'segments' and set(values) == set(options)):
+            continue
+        n = len(values)
+        if field == 'countries' and set(values) == set(top_countries(n)):
+            preset[field] = {'top': n}
+        elif field == 'months' and set(values) == set(options[-n:]):
+            preset[field] = {'last': n}
+        else:
+            preset[field] = values
+    return preset
+
+
+def resolve_preset(preset, choices, top_countries):
+    """프리셋 -> 지금 데이터셋의 선택 {항목: 값 목록} (데이터에 없는 값은 뺌)"""
+    selection = {}
+    for field in PRESET_FIELDS:
+        value = preset.get(field)
+        options = choices.get(field, [])
+        if value is None:
+            selection[field] = [] if field == 'segments' else list(options)
+        elif isinstance(value, dict) and 'top' in value:
+            selection[field] = list(top_countries(int(value['top'])))
+        elif isinstance(value, dict) and 'last' in value:
+            selection[field] = list(options[-int(value['last']):])
+        else:
+            allowed = set(options)
+            selection[field] = [v for v in value if v in allowed]
+    return selection
+
+
+def describe_preset(preset):
+    """프리셋 요약 한 줄 (버튼 도움말용)"""
+    labels = {'sources': '파일', 'countries': '국가', 'services': '서비스', 'months': '기간', 'segments': '세그먼트'}
+    parts = []
+    for field in PRESET_FIELDS:
+        value = preset.get(field)
+        if value is None:
+            continue
+        if isinstance(value, dict) and 'top' in value:
+            parts.append(f"{labels[field]} Top {value['top']}")
+        elif isinstance(value, dict) and 'last' in value:
+            parts.append(f"최근 {value['last']}개월")
+        elif len(value) <= 3:
+            parts.append(f"{labels[field]} {', '.join(map(str, value))}")
+        else:
+            parts.append(f"{labels[field]} {len(value)}개")
+    return " · ".join(parts) or "전체"
+
+
+class PresetStore:
+    def __init__(self, path=PRESETS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._presets = {}
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                presets = json.load(f)
+            return presets if isinstance(presets, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def load(self):
+        """{이름: 프리셋} (저장한 순서). 파일이 바뀌었을 때만 다시 읽음"""
+        with self._lock:
+            stamp = self._mtime()
+            if stamp != self._stamp:
+                self._presets = self._read() if stamp is not None else {}
+                self._stamp = stamp
+            return dict(self._presets)
+
+    def _update(self, change):
+        with self._lock:
+            presets = self._read()
+            change(presets)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(presets, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._presets, self._stamp = presets, self._mtime()
+
+    def save(self, name, preset):
+        self._update(lambda presets: presets.__setitem__(name, preset))
+
+    def delete(self, name):
+        self._update(lambda presets: presets.pop(name, None))
+
+
+class PresetViews:
+    def __init__(self, max_datasets=PRESET_VIEW_DATASETS):
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preset-view")
+        self.max_datasets = max_datasets
+        self._datasets = OrderedDict()  # 데이터셋 키 -> {필터 조합(signature): Future({결과 캐시 키: 결과})} (최근 쓴 순)
+        self._sizes = {}   # 준비된 뷰의 크기 (처음 물을 때 한 번 계산)
+        self._lock = threading.Lock()
+
+    def refresh(self, dataset_key, requests, build):
+        """
+        requests: {signature: build 인자}. 이 데이터셋의 뷰 중 없는 것만 build(signature, *인자)로 계산 제출하고,
+        더 이상 프리셋이 아닌 뷰는 버림. 다른 데이터셋의 뷰는 그대로 두고, 데이터셋 수가 한도를 넘으면
+        가장 오래 쓰지 않은 데이터셋의 뷰를 버림
+        """
+        with self._lock:
+            views = self._datasets.setdefault(dataset_key, {})
+            self._datasets.move_to_end(dataset_key)
+            for signature in [s for s in views if s not in requests]:
+                self._drop(views, signature)
+            for signature, args in requests.items():
+                if signature not in views:
+                    views[signature] = self.pool.submit(build, signature, *args)
+            while len(self._datasets) > self.max_datasets:
+                _, old_views = self._datasets.popitem(last=False)
+                for signature in list(old_views):
+                    self._drop(old_views, signature)
+
+    def _drop(self, views, signature):
+        views.pop(signature).cancel()
+        self._sizes.pop(signature, None)
+
+    def _ready(self, signature):
+        with self._lock:
+            future = next((views[signature] for views in self._datasets.values() if signature in views), None)
+        if future is None or not future.done() or future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def ready(self, signature):
+        return self._ready(signature) is not None
+
+    def result(self, signature, name):
+        """준비된 뷰의 결과 하나 (뷰가 없거나 준비 전이면 None)"""
+        results = self._ready(signature)
+        return None if results is None else results.get((signature, name))
+
+    def seed(self, signature, cache):
+        """뷰가 준비되어 있으면 결과를 섹션 결과 캐시에 넣음 (이미 있는 키는 그대로). 넣었으면 True"""
+        results = self._ready(signature)
+        if results is None:
+            return False
+        for key, value in results.items():
+            cache.put_if_absent(key, value)
+        return True
+
+    def _signatures(self, dataset_key=None):
+        with self._lock:
+            if dataset_key is not None:
+                return list(self._datasets.get(dataset_key, {}))
+            return [s for views in self._datasets.values() for s in views]
+
+    @property
+    def nbytes(self):
+        signatures = self._signatures()
+        for signature in signatures:
+            if signature not in self._sizes:
+                results = self._ready(signature)
+                if results is not None:
+                    self._sizes[signature] = result_nbytes(results)
+        return sum(self._sizes.get(s, 0) for s in signatures)
+
+    def status(self, dataset_key=None):
+        """dataset_key 가 있으면 그 데이터셋의 뷰만 (datasets 는 보관 중인 데이터셋 수)"""
+        signatures = self._signatures(dataset_key)
+        with self._lock:
+            datasets = len(self._datasets)
+        return {'views': len(signatures), 'ready': sum(self.ready(s) for s in signatures), 'datasets': datasets}
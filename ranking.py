@@ -0,0 +1,75 @@
+# =============================================================================
+# 순위 인덱스
+# - 차원 값(국가, 서비스 등)별 거래금액을 리프(소스 파일 x 나머지 차원 x 거래월) 행렬로 보관
+# - 전체 순위 뷰는 인덱스와 함께 보관해 재사용하고, 필터가 걸리면 해당 리프 행만 합친 뒤
+#   상위 N개만 부분 선택(np.partition)해서 정렬
+# - 결과는 group_sum(...).nlargest(n) 과 같음 (동점은 값 이름순, 해당 행이 없는 값은 제외)
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+from engine import CUBE_DIMENSIONS
+
+
+def _top_positions(totals, present, n):
+    candidates = np.flatnonzero(present)
+    if n < len(candidates):
+        # n번째 값 이상인 후보만 남긴 뒤(동점 포함) 그 안에서만 정렬
+        kth = np.partition(totals[candidates], len(candidates) - n)[len(candidates) - n]
+        candidates = candidates[totals[candidates] >= kth]
+    order = np.lexsort((candidates, -totals[candidates]))
+    return candidates[order[:n]]
+
+
+class RankingIndex:
+    def __init__(self, cube, column, measure='VOLUMN'):
+        self.column = column
+        self.leaf_columns = [c for c in CUBE_DIMENSIONS if c in cube.columns and c != column]
+        codes, values = pd.factorize(cube[column], sort=True, use_na_sentinel=True)
+        known = codes >= 0
+        self.values = pd.Index(values)
+
+        leaves = cube.loc[known, self.leaf_columns]
+        leaf_codes = leaves.groupby(self.leaf_columns, dropna=False, sort=False).ngroup().to_numpy()
+        self.leaves = leaves.drop_duplicates().reset_index(drop=True)
+
+        shape = (len(self.leaves), len(self.values))
+        cell = leaf_codes * len(self.values) + codes[known]
+        self.matrix = np.bincount(
+            cell, weights=np.nan_to_num(cube.loc[known, measure].to_numpy(dtype='float64')), minlength=shape[0] * shape[1]
+        ).reshape(shape)
+        self.rows = np.bincount(cell, weights=cube.loc[known, '_rows'].to_numpy(dtype='float64'),
+                                minlength=shape[0] * shape[1]).reshape(shape)
+        self.overall = RankedView(self.values, self.matrix.sum(axis=0), self.rows.sum(axis=0) > 0)
+
+    def view(self, allowed=None, **filters):
+        """
+        필터 조건의 순위 뷰. filters 는 리프 차원 이름 -> 허용 값 (None 이면 제한 없음),
+        allowed 는 순위에 넣을 차원 값 목록
+        """
+        mask = np.ones(len(self.leaves), dtype=bool)
+        for column, values in filters.items():
+            if values is not None and column in self.leaves.columns:
+                mask &= self.leaves[column].isin(values).to_numpy()
+        if mask.all():
+            totals, present = self.overall.totals, self.overall.present
+        else:
+            totals, present = self.matrix[mask].sum(axis=0), self.rows[mask].sum(axis=0) > 0
+        if allowed is not None:
+            present = present & self.values.isin(allowed)
+        return RankedView(self.values, totals, present)
+
+
+class RankedView:
+    def __init__(self, values, totals, present):
+        self.values = values
+        self.totals = totals
+        self.present = present
+        self._order = np.empty(0, dtype='int64')
+
+    def top(self, n):
+        """거래금액 상위 n개 값 (내림차순)"""
+        # 이미 정렬해 둔 범위 안이면 재사용하고, 더 큰 n 이 오면 그만큼만 다시 선택
+        if n > len(self._order) and len(self._order) < self.present.sum():
+            self._order = _top_positions(self.totals, self.present, n)
+        return self.values[self._order[:n]].tolist()
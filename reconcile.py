@@ -0,0 +1,100 @@
+# =============================================================================
+# 소스 파일 대사 (두 추출 파일 비교)
+# - 두 파일을 키 컬럼(국가 x 서비스 x 거래월, 선택 시 + 고객 ID)으로 맞춰 거래금액/건수/행 수 차이와
+#   한쪽 파일에만 있는 키를 보고
+# - 키 인코딩: 컬럼마다 두 파일 값을 함께 factorize 한 코드를 혼합 기수로 합쳐 행별 int64 키 하나
+#   (범위가 int64 를 넘을 것 같으면 지금까지의 키를 다시 factorize 해서 줄인 뒤 계속)
+# - 파일별 집계: 정렬된 고유 키(np.unique) + 키 번호별 bincount
+# - 조인: 두 파일의 정렬된 고유 키를 합친 뒤 searchsorted 로 양쪽 위치 조회 (행 수에 대해 n log n)
+# - 국가 x 서비스 x 거래월 비교는 파일별 리프 큐브를 그대로 입력으로 쓰므로 행 데이터를 읽지 않음
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+RECONCILE_KEYS = ['country', 'PAYMENT_SERVICE_DIV', 'TRANSACTION_APPROVED_MONTH']
+RECONCILE_MEASURES = ['VOLUMN', 'TRX_COUNT', '_rows']
+STATUS_LABELS = ['일치', '차이', 'A에만', 'B에만']
+KEY_LIMIT = 1 << 62
+
+
+def encode_keys(frames, columns):
+    """여러 프레임의 키 컬럼 -> 프레임별 행 키(int64). 같은 키 값이면 프레임이 달라도 같은 키"""
+    sizes = [len(f) for f in frames]
+    key = np.zeros(sum(sizes), dtype=np.int64)
+    cardinality = 1
+    for column in columns:
+        values = pd.concat([f[column] for f in frames], ignore_index=True)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        n = max(len(uniques), 1)
+        if cardinality * n >= KEY_LIMIT:
+            key, seen = pd.factorize(key)
+            cardinality = max(len(seen), 1)
+        key = key * n + codes
+        cardinality *= n
+    return np.split(key, np.cumsum(sizes)[:-1])
+
+
+def _aggregate(key, frame, measures):
+    # 정렬된 고유 키, 키별 첫 행 위치, 키별 측정값 합계
+    uniques, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    sums = {
+        m: np.bincount(inverse, weights=np.nan_to_num(frame[m].to_numpy(dtype='float64')), minlength=len(uniques))
+        for m in measures
+    }
+    return uniques, first, sums
+
+
+def reconcile(left, right, keys=RECONCILE_KEYS, measures=RECONCILE_MEASURES, tolerance=0.005):
+    """
+    두 프레임(행 데이터 또는 리프 큐브)을 keys 로 맞춘 비교표
+    [keys..., {측정값}_A, {측정값}_B, {측정값}_차이, 상태] (상태: STATUS_LABELS)
+    _rows 가 없는 행 데이터는 행 1개 = 1 로 셈
+    """
+    left = left if '_rows' in left.columns else left.assign(_rows=1)
+    right = right if '_rows' in right.columns else right.assign(_rows=1)
+    measures = [m for m in measures if m in left.columns and m in right.columns]
+    left_key, right_key = encode_keys([left, right], keys)
+    left_uniques, left_first, left_sums = _aggregate(left_key, left, measures)
+    right_uniques, right_first, right_sums = _aggregate(right_key, right, measures)
+
+    # 정렬 병합 조인: 합친 키의 양쪽 위치 (없으면 -1). 양쪽 모두 정렬되어 있으므로 병합 정렬 + 인접 중복 제거
+    union = np.concatenate([left_uniques, right_uniques])
+    union.sort(kind='stable')
+    union = union[np.concatenate([[True], union[1:] != union[:-1]])] if len(union) else union
+    positions = []
+    for uniques in (left_uniques, right_uniques):
+        pos = np.searchsorted(uniques, union)
+        found = pos < len(uniques)
+        found[found] = uniques[pos[found]] == union[found]
+        positions.append(np.where(found, pos, -1))
+    in_left, in_right = positions[0] >= 0, positions[1] >= 0
+
+    # 키 값은 각 키의 첫 행에서 (A 에 있으면 A, 아니면 B). 원래 타입 그대로 가져옴 (문자열 변환 없음)
+    result = pd.DataFrame(index=pd.RangeIndex(len(union)))
+    for column in keys:
+        values = pd.Series(np.full(len(union), None, dtype=object)) if not len(union) else None
+        for frame, first, pos, found in ((right, right_first, positions[1], in_right),
+                                         (left, left_first, positions[0], in_left)):
+            if found.any():
+                taken = frame[column].iloc[first[np.maximum(pos, 0)]].reset_index(drop=True)
+                values = taken if values is None else taken.where(found, values)
+        result[column] = values
+    differs = np.zeros(len(union), dtype=bool)
+    for m in measures:
+        a, b = np.zeros(len(union)), np.zeros(len(union))
+        a[in_left] = left_sums[m][positions[0][in_left]]
+        b[in_right] = right_sums[m][positions[1][in_right]]
+        result[f'{m}_A'], result[f'{m}_B'], result[f'{m}_차이'] = a, b, b - a
+        differs |= np.abs(b - a) > tolerance
+    status = np.select([~in_right, ~in_left, differs], [2, 3, 1], default=0)
+    result['상태'] = np.asarray(STATUS_LABELS, dtype=object)[status]
+    return result
+
+
+def reconcile_summary(result):
+    """상태별 키 수 / 측정값 합계 (화면 요약용)"""
+    measures = [c[:-2] for c in result.columns if c.endswith('_A')]
+    columns = {f'{m}_{side}': 'sum' for m in measures for side in ('A', 'B', '차이')}
+    summary = result.groupby('상태', sort=False).agg(키=('상태', 'size'), **{c: (c, f) for c, f in columns.items()})
+    order = [s for s in STATUS_LABELS if s in summary.index]
+    return summary.loc[order].reset_index()
@@ -0,0 +1,87 @@
+# =============================================================================
+# 섹션 결과 캐시
+# - (데이터셋 버전 + 필터 조합, 섹션) -> 집계 결과 (프로세스 공용, 모든 세션이 함께 사용)
+# - 합계형 섹션은 리프 큐브(소스 파일 x 국가 x 서비스 x 거래월)를 롤업해 만들므로
+#   처음 보는 필터 조합도 행 데이터를 다시 읽지 않고 계산됨 (engine.section_from_cube)
+# - 보관 용량이 한도를 넘으면 가장 오래 쓰지 않은 결과부터 제거
+# =============================================================================
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+RESULT_CACHE_MB = int(os.environ.get("DASHBOARD_RESULT_CACHE_MB", 256))
+
+
+def result_nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, dict):
+        return sum(result_nbytes(v) for v in value.values())
+    # 배열 기반 객체(TrendEngine 등)는 자체 nbytes 사용
+    return int(getattr(value, 'nbytes', sys.getsizeof(value)))
+
+
+class ResultCache:
+    def __init__(self, max_bytes=RESULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, fn, *args):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self.misses += 1
+        value = fn(*args)
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = result_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            # 한도보다 큰 결과 하나는 보관하지 않음
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def put_if_absent(self, key, value):
+        # 미리 계산해 둔 결과 넣기 (조회 통계에 넣지 않음)
+        with self._lock:
+            if key in self._entries:
+                return
+        self.put(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'nbytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,110 @@
+# =============================================================================
+# RFM 고객 세그먼트
+# - 고객 차원 테이블(customers.py)의 고객별 배열에서 바로 계산 (행 데이터를 다시 훑지 않음)
+#   R(최근성)  데이터셋 마지막 거래월 - 고객의 마지막 거래월 (개월, 작을수록 좋음)
+#   F(빈도)    누적 거래건수
+#   M(금액)    누적 거래금액 (기준 통화)
+# - 점수는 고객 전체 분위수(5분위) 기준 1~5점 (같은 값은 같은 점수, 동점 중 가장 높은 순위 기준)
+# - 세그먼트는 R 점수와 F/M 평균 점수로 위에서부터 먼저 맞는 것 하나
+#   챔피언       R >= 4, FM >= 4
+#   충성 고객    R >= 3, FM >= 3
+#   잠재 충성    R >= 4, FM >= 2
+#   신규 고객    R >= 4
+#   관심 필요    R == 3
+#   이탈 위험    FM >= 3
+#   휴면         나머지
+# - 행 필터(세그먼트 고객의 거래만)는 CUSTOMERID -> 고객 번호 -> 세그먼트 조회 한 번
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+RFM_SEGMENTS = ['챔피언', '충성 고객', '잠재 충성', '신규 고객', '관심 필요', '이탈 위험', '휴면']
+RFM_BINS = 5
+
+
+def quantile_scores(values, bins=RFM_BINS):
+    """값의 분위수 점수 1~bins (클수록 높은 점수, NaN 은 1점)"""
+    pct = pd.Series(values).rank(method='max', pct=True).to_numpy()
+    return np.where(np.isnan(pct), 1, np.clip(np.ceil(pct * bins), 1, bins)).astype(np.int8)
+
+
+class RfmTable:
+    def __init__(self, customers):
+        """customers: CustomerTable"""
+        self.customers = customers
+        known = customers.last_period >= 0
+        last = customers.base_period + customers.n_months - 1
+        self.recency = np.where(known, last - customers.last_period, -1).astype(np.int32)
+        # 최근성은 작을수록 높은 점수 (거래월을 모르는 고객은 1점)
+        self.r = quantile_scores(np.where(known, -self.recency, np.nan))
+        self.f = quantile_scores(customers.trx.astype('float64'))
+        self.m = quantile_scores(customers.volume)
+        fm = (self.f.astype(np.int16) + self.m) / 2
+
+        r = self.r
+        conditions = [
+            (r >= 4) & (fm >= 4),
+            (r >= 3) & (fm >= 3),
+            (r >= 4) & (fm >= 2),
+            r >= 4,
+            r == 3,
+            fm >= 3,
+        ]
+        self.segment = np.select(conditions, np.arange(len(conditions)), default=len(conditions)).astype(np.int8)
+
+    def __len__(self):
+        return len(self.segment)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.recency, self.r, self.f, self.m, self.segment))
+
+    def _codes(self, segments):
+        return [RFM_SEGMENTS.index(s) for s in segments if s in RFM_SEGMENTS]
+
+    def mask(self, segments=None):
+        """세그먼트에 속한 고객 (None 이면 전체)"""
+        if segments is None:
+            return np.ones(len(self), dtype=bool)
+        return np.isin(self.segment, self._codes(segments))
+
+    def row_mask(self, frame, segments):
+        """행 데이터 중 세그먼트 고객의 행 (고객 ID 가 없는 행은 제외)"""
+        codes = self.customers.ids.get_indexer(frame['CUSTOMERID'])
+        row_segment = np.where(codes >= 0, self.segment[np.maximum(codes, 0)], -1)
+        return np.isin(row_segment, self._codes(segments))
+
+    def summary(self, selected):
+        """선택된 고객의 세그먼트별 [세그먼트, 고객 수, 고객 비중, 거래금액, 금액 비중, 평균 R/F/M 점수]"""
+        segment = self.segment[selected]
+        n = len(RFM_SEGMENTS)
+        customers = np.bincount(segment, minlength=n)
+        volume = np.bincount(segment, weights=self.customers.volume[selected], minlength=n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = pd.DataFrame({
+                '세그먼트': RFM_SEGMENTS,
+                '고객 수': customers,
+                '고객 비중': customers / max(customers.sum(), 1),
+                '거래금액': volume,
+                '금액 비중': volume / volume.sum() if volume.sum() else np.zeros(n),
+                '평균 R': np.bincount(segment, weights=self.r[selected], minlength=n) / customers,
+                '평균 F': np.bincount(segment, weights=self.f[selected], minlength=n) / customers,
+                '평균 M': np.bincount(segment, weights=self.m[selected], minlength=n) / customers,
+            })
+        return result[result['고객 수'] > 0].reset_index(drop=True)
+
+    def breakdown(self, selected, by='country'):
+        """주 이용 국가/서비스(by) x 세그먼트 거래금액 [by, 세그먼트, VOLUMN]"""
+        customers = self.customers
+        codes, labels = ((customers.primary_country, customers.countries) if by == 'country'
+                         else (customers.primary_service, customers.services))
+        keep = selected & (codes >= 0)
+        n = len(RFM_SEGMENTS)
+        cells = codes[keep].astype('int64') * n + self.segment[keep]
+        volume = np.bincount(cells, weights=customers.volume[keep], minlength=len(labels) * n)
+        result = pd.DataFrame({
+            by: np.repeat(np.asarray(labels, dtype=object), n),
+            '세그먼트': np.tile(np.asarray(RFM_SEGMENTS, dtype=object), len(labels)),
+            'VOLUMN': volume,
+        })
+        return result[result['VOLUMN'] > 0].reset_index(drop=True)
@@ -0,0 +1,180 @@
+# =============================================================================
+# 탐색 모드 표본 (층화 표본 + 신뢰구간)
+# - 층 = 국가 x 거래월. 층별 모집단 행 수는 리프 큐브에서 바로 구함 (행 데이터 재집계 없음)
+# - 층별 표본 수 = 전체 표본 크기의 비례 배분 (층마다 최소 MIN_PER_STRATUM 행, 층 크기 이하)
+#   -> 모든 (국가, 거래월) 조합이 표본에 들어가므로 국가/월 목록은 표본으로도 정확함
+# - 표본 추출은 파티션을 하나씩 읽으며 층별로 난수가 가장 작은 n_h 행만 남김 (메모리는 표본 크기 수준)
+# - 필터 후 계산량은 표본 크기에만 비례 (데이터셋 크기와 무관)
+#
+# 추정 (층화 추정량, 신뢰구간은 정규 근사 95%)
+#   합계  T = Σ_h (N_h / n_h) Σ y_i
+#   분산  V = Σ_h N_h² (1 - n_h / N_h) s_h² / n_h   (s_h² : 층 내 표본 분산)
+#   비율  R = T_y / T_x, 분산은 선형화 (z_i = y_i - R x_i 의 합계 분산 / T_x²)
+#   서비스/소스 파일 필터는 층을 가로지르는 부분 모집단이므로 해당 행 외 값은 0 으로 두고 같은 식 적용
+# =============================================================================
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_ROWS = int(os.environ.get("DASHBOARD_SAMPLE_ROWS", 200_000))
+MIN_PER_STRATUM = 20
+STRATA = ['country', 'TRANSACTION_APPROVED_MONTH']
+Z_95 = 1.96
+
+
+def allocate(population, size=SAMPLE_ROWS, minimum=MIN_PER_STRATUM):
+    """층별 표본 수 (비례 배분, 층마다 최소 minimum, 층 크기 이하)"""
+    population = np.asarray(population, dtype='int64')
+    total = population.sum()
+    if total == 0:
+        return np.zeros_like(population)
+    share = np.floor(population * (size / total)).astype('int64')
+    return np.minimum(population, np.maximum(share, minimum))
+
+
+def _smallest_per_stratum(codes, keys, taken):
+    # 층별로 난수 키가 가장 작은 taken[층] 개 행의 위치
+    order = np.lexsort((keys, codes))
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, sorted_codes, side='left')
+    rank = np.arange(len(order)) - starts
+    return np.sort(order[rank < taken[sorted_codes]])
+
+
+class StratifiedSample:
+    def __init__(self, partitions, cube, size=SAMPLE_ROWS, minimum=MIN_PER_STRATUM, seed=0):
+        """partitions: 행 DataFrame 묶음 (순회 가능), cube: 같은 데이터의 리프 큐브"""
+        self.strata_columns = [c for c in STRATA if c in cube.columns]
+        counts = cube.groupby(self.strata_columns, sort=True)['_rows'].sum()
+        counts = counts[counts > 0]
+        self.strata = counts.index
+        self.population = counts.to_numpy(dtype='int64')
+        self.taken = allocate(self.population, size, minimum)
+
+        rng = np.random.default_rng(seed)
+        candidates, candidate_keys = [], []
+        for part in partitions:
+            if part.empty:
+                continue
+            codes = self._codes(part)
+            keys = rng.random(len(part))
+            keep = _smallest_per_stratum(np.where(codes >= 0, codes, len(self.taken)), keys,
+                                         np.append(self.taken, 0))
+            candidates.append(part.iloc[keep])
+            candidate_keys.append(keys[keep])
+
+        if candidates:
+            rows = pd.concat(candidates, ignore_index=True)
+            keys = np.concatenate(candidate_keys)
+            rows = rows.iloc[_smallest_per_stratum(self._codes(rows), keys, self.taken)].reset_index(drop=True)
+        else:
+            rows = pd.DataFrame(columns=list(cube.columns))
+        self.rows = rows
+        self.codes = self._codes(rows)
+        # 실제 뽑힌 수 (층 크기가 바뀐 경우 대비) 와 층별 가중치
+        self.taken = np.bincount(self.codes, minlength=len(self.population))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.weights = np.where(self.taken > 0, self.population / self.taken, 0.0)
+
+    def _codes(self, frame):
+        if len(self.strata_columns) == 1:
+            return self.strata.get_indexer(frame[self.strata_columns[0]])
+        return self.strata.get_indexer(pd.MultiIndex.from_frame(frame[self.strata_columns]))
+
+    def __len__(self):
+        return len(self.rows)
+
+    @functools.cached_property
+    def nbytes(self):
+        # 표본은 만든 뒤 바뀌지 않으므로 한 번만 계산 (메모리 예산이 자주 조회)
+        return int(self.rows.memory_usage(deep=True).sum())
+
+    def view(self, sources=None, countries=None, services=None, months=None):
+        """필터 조건의 추정 뷰 (빈 선택/None 은 제한 없음)"""
+        mask = np.ones(len(self.rows), dtype=bool)
+        for column, values in [('_source_file', sources), ('country', countries),
+                               ('PAYMENT_SERVICE_DIV', services), ('TRANSACTION_APPROVED_MONTH', months)]:
+            if values and column in self.rows.columns:
+                mask &= self.rows[column].isin(values).to_numpy()
+        return SampleView(self, mask)
+
+
+class SampleView:
+    def __init__(self, sample, mask):
+        self.sample = sample
+        self.mask = mask
+        self.rows = sample.rows[mask]
+
+    @property
+    def empty(self):
+        return not self.mask.any()
+
+    def _variance(self, values, groups=None, n_groups=1):
+        # 층(x 그룹)별 합/제곱합으로 층화 분산 계산. values 는 표본 전체 길이 (필터 밖 행은 0)
+        sample = self.sample
+        n_strata = len(sample.population)
+        cells = sample.codes if groups is None else sample.codes * n_groups + groups
+        sums = np.bincount(cells, weights=values, minlength=n_strata * n_groups).reshape(n_strata, n_groups)
+        squares = np.bincount(cells, weights=values ** 2, minlength=n_strata * n_groups).reshape(n_strata, n_groups)
+        n = sample.taken[:, None].astype('float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s2 = np.where(n > 1, (squares - sums ** 2 / n) / (n - 1), 0.0)
+            fpc = 1 - n / sample.population[:, None]
+            variance = np.where(n > 0, sample.population[:, None] ** 2 * fpc * np.maximum(s2, 0) / n, 0.0)
+        return variance.sum(axis=0)
+
+    def _domain(self, column):
+        return np.where(self.mask, self.sample.rows[column].to_numpy(dtype='float64'), 0.0)
+
+    def _total(self, values, groups=None, n_groups=1):
+        weighted = values * self.sample.weights[self.sample.codes]
+        if groups is None:
+            estimate = np.array([weighted.sum()])
+        else:
+            estimate = np.bincount(groups, weights=weighted, minlength=n_groups)
+        return estimate, Z_95 * np.sqrt(self._variance(values, groups, n_groups))
+
+    def total(self, column):
+        """(추정 합계, 95% 신뢰구간 반폭)"""
+        estimate, half = self._total(self._domain(column))
+        return float(estimate[0]), float(half[0])
+
+    def count(self):
+        """(추정 행 수, 95% 신뢰구간 반폭)"""
+        estimate, half = self._total(self.mask.astype('float64'))
+        return float(estimate[0]), float(half[0])
+
+    def ratio(self, numerator, denominator):
+        """(추정 비율 합계(numerator) / 합계(denominator), 95% 신뢰구간 반폭). 분자/분모는 (컬럼, 행 마스크) 또는 컬럼"""
+        y, x = self._masked(numerator), self._masked(denominator)
+        total_y, total_x = self._total(y)[0][0], self._total(x)[0][0]
+        if total_x == 0:
+            return np.nan, np.nan
+        estimate = total_y / total_x
+        half = Z_95 * np.sqrt(self._variance(y - estimate * x)[0]) / abs(total_x)
+        return float(estimate), float(half)
+
+    def _masked(self, spec):
+        if isinstance(spec, str):
+            return self._domain(spec)
+        column, rows = spec
+        return np.where(rows, self._domain(column), 0.0)
+
+    def where(self, column, value):
+        """표본 전체 길이의 행 마스크 (ratio 의 분자/분모 조건용)"""
+        return (self.sample.rows[column] == value).to_numpy()
+
+    def group_total(self, column, by):
+        """그룹별 추정 합계 [by, column, 오차] (필터 안에 표본 행이 있는 그룹만, 추정값 내림차순)"""
+        groups, labels = pd.factorize(self.sample.rows[by], sort=True)
+        values = np.where(groups >= 0, self._domain(column), 0.0)
+        estimate, half = self._total(values, np.maximum(groups, 0), len(labels))
+        present = np.bincount(groups[self.mask & (groups >= 0)], minlength=len(labels)) > 0
+        result = pd.DataFrame({by: labels, column: estimate, '오차': half})[present]
+        return result.sort_values(column, ascending=False, kind='stable').reset_index(drop=True)
+
+    def values(self, column):
+        """필터 안에 있는 값 목록 (정렬)"""
+        return sorted(self.rows[column].dropna().unique())
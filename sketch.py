@@ -0,0 +1,107 @@
+# =============================================================================
+# 분위수 스케치
+# - 로그 구간(상대오차 1%) 히스토그램: 구간별 개수만 더하면 병합 가능
+# - 리프(소스 파일, 국가, 서비스, 거래월)별로 만들어 두고,
+#   필터가 바뀌면 해당 리프의 구간 개수만 합쳐 백분위/히스토그램 계산
+#
+# 구간 키: 값의 크기 순서와 같은 정수
+#   양수 v -> ceil(log(v) / log(gamma)) + KEY_OFFSET
+#   0      -> 0
+#   음수 v -> -(ceil(log(-v) / log(gamma)) + KEY_OFFSET)
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+from engine import CUBE_DIMENSIONS
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = np.log(GAMMA)
+KEY_OFFSET = 4096
+
+
+def bucket_keys(values):
+    values = np.asarray(values, dtype='float64')
+    magnitude = np.abs(values)
+    keys = np.zeros(len(values), dtype='int64')
+    nonzero = magnitude > 0
+    keys[nonzero] = np.ceil(np.log(magnitude[nonzero]) / LOG_GAMMA).astype('int64') + KEY_OFFSET
+    return np.where(values < 0, -keys, keys)
+
+
+def key_values(keys):
+    # 구간 대표값 (상대오차가 최소가 되는 중간값)
+    keys = np.asarray(keys, dtype='int64')
+    exponent = np.abs(keys) - KEY_OFFSET
+    values = 2 * np.power(GAMMA, exponent.astype('float64')) / (GAMMA + 1)
+    return np.where(keys == 0, 0.0, np.sign(keys) * values)
+
+
+class QuantileSketch:
+    def __init__(self, keys, counts):
+        # keys 는 정렬된 고유 키
+        self.keys = np.asarray(keys, dtype='int64')
+        self.counts = np.asarray(counts, dtype='float64')
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype='float64')
+        keys, counts = np.unique(bucket_keys(values[~np.isnan(values)]), return_counts=True)
+        return cls(keys, counts)
+
+    @classmethod
+    def from_buckets(cls, keys, counts):
+        summed = pd.Series(np.asarray(counts, dtype='float64')).groupby(np.asarray(keys, dtype='int64')).sum()
+        return cls(summed.index.to_numpy(), summed.to_numpy())
+
+    def merge(self, other):
+        return QuantileSketch.from_buckets(
+            np.concatenate([self.keys, other.keys]),
+            np.concatenate([self.counts, other.counts])
+        )
+
+    @property
+    def count(self):
+        return float(self.counts.sum())
+
+    def quantile(self, q):
+        """q(스칼라 또는 배열, 0~1)에 해당하는 근사 분위수"""
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        cumulative = np.cumsum(self.counts)
+        rank = np.clip(np.asarray(q, dtype='float64'), 0, 1) * (self.count - 1)
+        idx = np.searchsorted(cumulative, rank, side='right')
+        return key_values(self.keys[np.minimum(idx, len(self.keys) - 1)])
+
+    def histogram(self, edges):
+        """구간 경계 edges 기준 개수 (각 버킷을 대표값 위치에 배정)"""
+        positions = np.searchsorted(edges, key_values(self.keys), side='right') - 1
+        inside = (positions >= 0) & (positions < len(edges) - 1)
+        return np.bincount(positions[inside], weights=self.counts[inside], minlength=len(edges) - 1)
+
+
+# =============================================================================
+# 스케치 큐브 (리프 차원 + _bucket -> _count)
+# =============================================================================
+def build_sketch_cube(frame, value_col='VOLUMN'):
+    keys = [c for c in CUBE_DIMENSIONS if c in frame.columns]
+    values = frame[value_col].to_numpy(dtype='float64')
+    valid = ~np.isnan(values)
+    leaf = frame.loc[valid, keys].copy()
+    leaf['_bucket'] = bucket_keys(values[valid])
+    return leaf.groupby(keys + ['_bucket'], dropna=False, sort=False).size().rename('_count').reset_index()
+
+
+def sketch_from_cube(sketch_cube):
+    if sketch_cube is None or sketch_cube.empty:
+        return QuantileSketch([], [])
+    return QuantileSketch.from_buckets(sketch_cube['_bucket'].to_numpy(), sketch_cube['_count'].to_numpy())
+
+
+def sketches_by(sketch_cube, column):
+    """column 값별 스케치 (예: 국가별 거래 1건당 금액 분포)"""
+    grouped = sketch_cube.groupby([column, '_bucket'], sort=True)['_count'].sum().reset_index()
+    return {
+        value: QuantileSketch(part['_bucket'].to_numpy(), part['_count'].to_numpy())
+        for value, part in grouped.groupby(column, sort=False)
+    }
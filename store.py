@@ -0,0 +1,475 @@
+# =============================================================================
+# 누적 데이터셋 저장소
+# - 업로드한 파일을 디스크(parquet)에 보관해 다음 세션에서도 재사용
+# - 파일 단위로 추가/삭제하며, 집계 큐브도 해당 파일 몫만 갱신
+# - 행 데이터는 (소스 파일, 거래월) 파티션으로 나눠 보관
+#
+# 디렉터리 구조
+#   <root>/manifest.json               파일 목록, 파티션 목록, 데이터셋 버전
+#   <root>/files/<id>/p<n>.parquet     원본 행 데이터 (파일 x 거래월 파티션)
+#   <root>/files/<id>/quarantine.parquet  검증에서 격리된 행 (validation.py, 있을 때만)
+#   <root>/files/<id>/row_hashes_v2*.npy  정상 행 해시 (전체 컬럼 / 중복 키 컬럼별, 파일 간 중복 확인용)
+#   <root>/cube.v<n>.parquet           전체 리프 집계 큐브 (파일별 큐브를 이어 붙인 것, 버전별 파일)
+#   <root>/sketch.v<n>.parquet         리프별 분위수 스케치 (sketch.py)
+#
+# 동시 갱신 (여러 세션 / 폴더 감시(ingest.py) / 다른 프로세스)
+# - 파일 추가는 준비(stage_file: 파티션/집계 생성, 잠금 없음)와 반영(commit: 목록 교체, 짧은 잠금)으로 나뉨
+# - manifest.json 교체가 유일한 반영 시점. 집계 파일도 버전마다 새 이름으로 쓰고 manifest 가 가리키므로
+#   다른 프로세스는 manifest 하나만 다시 읽으면(refresh) 항상 일관된 버전을 봄
+# - 교체/삭제된 파일과 이전 집계는 바로 지우지 않고 RETIRE_SECONDS 뒤에 정리 (읽는 중인 세션 보호)
+# - 프로세스 간 쓰기는 <root>/manifest.lock 파일로 한 번에 하나만
+# =============================================================================
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from engine import build_cube, merge_cubes
+from sketch import build_sketch_cube
+from validation import row_hashes as compute_row_hashes
+
+# 파일 단위로 증분 갱신되는 집계 (이름 -> 생성 함수). 모두 _source_file 차원을 포함
+AGGREGATES = {
+    "cube": build_cube,
+    "sketch": build_sketch_cube,
+}
+
+DEFAULT_ROOT = os.environ.get(
+    "DASHBOARD_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_store")
+)
+
+RETIRE_SECONDS = 300
+LOCK_STALE_SECONDS = 120
+# 행 해시 방식이 바뀌면 이름을 올림 (이전 방식 해시 파일은 무시하고 처음 요청될 때 다시 계산)
+ROW_HASHES_FILE = "row_hashes_v2"
+
+
+class DatasetStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.files_dir = os.path.join(root, "files")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock_path = os.path.join(root, "manifest.lock")
+        os.makedirs(self.files_dir, exist_ok=True)
+        # 같은 프로세스 안의 세션/감시 스레드 사이 잠금. 읽는 쪽은 목록/집계를 한 번에 가져갈 때만 잡음
+        self.lock = threading.RLock()
+        self._manifest_stamp = None
+        self.manifest = self._read_manifest()
+        self._aggregates = {}
+
+    # --- manifest ----------------------------------------------------------
+    def _stamp(self):
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_manifest(self):
+        self._manifest_stamp = self._stamp()
+        if self._manifest_stamp is None:
+            return {"version": 0, "files": {}}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        self.manifest["version"] += 1
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_stamp = self._stamp()
+
+    def refresh(self):
+        """다른 프로세스가 manifest 를 바꿨으면 다시 읽음 (stat 한 번). 바뀌었으면 True"""
+        with self.lock:
+            if self._stamp() == self._manifest_stamp:
+                return False
+            manifest = self._read_manifest()
+            if manifest["version"] == self.manifest["version"]:
+                return False
+            self.manifest = manifest
+            self._aggregates = {}
+            return True
+
+    @contextmanager
+    def _writing(self):
+        # 프로세스 간 쓰기 잠금 (잠금 파일 생성 성공 = 획득). 비정상 종료로 남은 잠금은 오래되면 무시
+        with self.lock:
+            while True:
+                try:
+                    fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - os.path.getmtime(self.lock_path) > LOCK_STALE_SECONDS:
+                            os.remove(self.lock_path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    time.sleep(0.05)
+            try:
+                os.close(fd)
+                # 잠금을 잡은 뒤 다른 프로세스가 반영한 내용부터 읽고 그 위에 갱신
+                self.refresh()
+                self._purge_retired()
+                yield
+            finally:
+                os.remove(self.lock_path)
+
+    def _retire(self, path):
+        # 바로 지우지 않고 정리 대기 목록에 올림 (manifest 에 저장되므로 프로세스가 바뀌어도 정리됨)
+        self.manifest.setdefault("retired", []).append([os.path.relpath(path, self.root), time.time()])
+
+    def _purge_retired(self):
+        now = time.time()
+        keep = []
+        for relpath, retired_at in self.manifest.get("retired", []):
+            path = os.path.join(self.root, relpath)
+            if now - retired_at < RETIRE_SECONDS:
+                keep.append([relpath, retired_at])
+            elif os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+        if len(keep) != len(self.manifest.get("retired", [])):
+            self.manifest["retired"] = keep
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    def file_names(self):
+        return sorted(self.manifest["files"])
+
+    def file_order(self):
+        # 추가된 순서 (같은 이름으로 다시 추가한 파일은 맨 뒤)
+        return list(self.manifest["files"])
+
+    def file_info(self, name):
+        return self.manifest["files"].get(name)
+
+    def contains(self, name, digest):
+        info = self.file_info(name)
+        return info is not None and info["digest"] == digest
+
+    def _file_dir(self, name):
+        return os.path.join(self.files_dir, self.manifest['files'][name]['id'])
+
+    def watched_digest(self, name):
+        # 폴더 감시(ingest.py)로 마지막에 추가한 내용 해시 (화면에서 삭제해도 남아 같은 파일을 다시 넣지 않음)
+        return self.manifest.get("watched", {}).get(name)
+
+    # --- 읽기 ---------------------------------------------------------------
+    def file_partitions(self, name):
+        # {거래월: parquet 경로} - 실제 읽기는 필요한 파티션만 나중에
+        file_dir = self._file_dir(name)
+        return {
+            month: os.path.join(file_dir, part_name)
+            for month, part_name in self.manifest['files'][name]['partitions']
+        }
+
+    def aggregate(self, name):
+        with self.lock:
+            if name not in self._aggregates:
+                path = self._aggregate_path(name)
+                if os.path.exists(path):
+                    self._aggregates[name] = pd.read_parquet(path)
+                elif self.manifest["files"]:
+                    # 이전 버전 저장소에 없던 집계는 저장된 파티션으로 한 번 만들어 둠
+                    self._write_aggregate(name, merge_cubes([
+                        AGGREGATES[name](self._read_file(file_name)) for file_name in self.file_names()
+                    ]))
+                else:
+                    self._aggregates[name] = None
+            return self._aggregates[name]
+
+    def _read_file(self, name):
+        return pd.concat([pd.read_parquet(p) for p in self.file_partitions(name).values()], ignore_index=True)
+
+    def quality(self, name):
+        # 추가할 때 저장한 품질 리포트 (이전 버전 저장소의 파일은 None)
+        return self.manifest["files"][name].get("quality")
+
+    def quarantine(self, name):
+        if name not in self.manifest["files"]:
+            return None
+        path = os.path.join(self._file_dir(name), "quarantine.parquet")
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    def row_hashes(self, name, columns=None):
+        # 행 해시 (columns 가 없으면 전체 컬럼). 키 컬럼별로 처음 요청될 때 한 번 계산해 보관
+        suffix = "" if columns is None else "_" + hashlib.sha1(",".join(columns).encode("utf-8")).hexdigest()[:8]
+        path = os.path.join(self._file_dir(name), f"{ROW_HASHES_FILE}{suffix}.npy")
+        if not os.path.exists(path):
+            frame = self._read_file(name)
+            np.save(path, compute_row_hashes(frame, None if columns is None else [c for c in columns if c in frame.columns]))
+        return np.load(path)
+
+    def cube(self):
+        return self.aggregate("cube") if self.manifest["files"] else merge_cubes([])
+
+    def sketch_cube(self):
+        return self.aggregate("sketch")
+
+    def _aggregate_path(self, name):
+        # manifest 가 가리키는 버전의 집계 파일 (이전 버전 저장소는 <name>.parquet)
+        file_name = self.manifest.get("aggregates", {}).get(name, f"{name}.parquet")
+        return os.path.join(self.root, file_name)
+
+    def _write_aggregate(self, name, frame, file_name=None):
+        if file_name is None:
+            frame.to_parquet(self._aggregate_path(name), index=False)
+        else:
+            # 새 버전 파일로 쓰고 manifest 가 가리키게 함 (이전 파일은 정리 대기)
+            old_path = self._aggregate_path(name)
+            frame.to_parquet(os.path.join(self.root, file_name), index=False)
+            if os.path.exists(old_path):
+                self._retire(old_path)
+            self.manifest.setdefault("aggregates", {})[name] = file_name
+        self._aggregates[name] = frame
+
+    def _replace_aggregates(self, update):
+        # 집계마다 update(현재 집계, 집계 이름) 결과를 다음 버전 파일로 저장
+        next_version = self.manifest["version"] + 1
+        for agg_name in AGGREGATES:
+            frame = update(self.aggregate(agg_name), agg_name)
+            if frame is not None:
+                self._write_aggregate(agg_name, frame, f"{agg_name}.v{next_version}.parquet")
+
+    # --- 증분 갱신 ----------------------------------------------------------
+    def stage_file(self, name, frame, digest, quality=None, quarantine=None, row_hashes=None):
+        """
+        추가할 파일의 파티션/해시를 쓰고 파일 몫 집계를 만듦 (목록은 바꾸지 않으므로 잠금 없이,
+        다른 프로세스에서도 실행 가능). 결과를 commit 에 넘기면 데이터셋에 반영됨
+        """
+        file_id = hashlib.sha1(f"{name}:{digest}".encode("utf-8")).hexdigest()[:16]
+        file_dir = os.path.join(self.files_dir, file_id)
+        os.makedirs(file_dir, exist_ok=True)
+        partitions = []
+        for i, (month, part) in enumerate(split_by_month(frame).items()):
+            part_name = f"p{i}.parquet"
+            part.to_parquet(os.path.join(file_dir, part_name), index=False)
+            partitions.append([month, part_name])
+        if quarantine is not None and len(quarantine):
+            quarantine.to_parquet(os.path.join(file_dir, "quarantine.parquet"), index=False)
+        np.save(os.path.join(file_dir, f"{ROW_HASHES_FILE}.npy"),
+                compute_row_hashes(frame) if row_hashes is None else row_hashes)
+        return {
+            "name": name,
+            "info": {
+                "id": file_id,
+                "digest": digest,
+                "rows": int(len(frame)),
+                "partitions": partitions,
+                "added_at": None,
+                "quality": quality,
+            },
+            "aggregates": {agg_name: builder(frame) for agg_name, builder in AGGREGATES.items()},
+        }
+
+    def commit(self, staged, watched=False):
+        """stage_file 결과를 반영 (같은 이름의 파일이 있으면 교체). 집계는 파일 몫만 이어 붙임"""
+        name, info = staged["name"], dict(staged["info"])
+        with self._writing():
+            replaced = self.manifest["files"].get(name)
+            # 같은 내용을 다시 추가하는 경우(삭제 후 재추가) 정리 대기 중인 디렉터리를 살림
+            file_dir = os.path.relpath(os.path.join(self.files_dir, info["id"]), self.root)
+            self.manifest["retired"] = [r for r in self.manifest.get("retired", []) if r[0] != file_dir]
+
+            def update(current, agg_name):
+                if current is not None and replaced is not None:
+                    current = current[current['_source_file'] != name]
+                return merge_cubes([current, staged["aggregates"][agg_name]])
+
+            self._replace_aggregates(update)
+            if replaced is not None:
+                del self.manifest["files"][name]
+                if replaced["id"] != info["id"]:
+                    self._retire(os.path.join(self.files_dir, replaced["id"]))
+            info["added_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self.manifest["files"][name] = info
+            if watched:
+                self.manifest.setdefault("watched", {})[name] = info["digest"]
+            self._write_manifest()
+
+    def add_file(self, name, frame, digest, quality=None, quarantine=None, row_hashes=None):
+        self.commit(self.stage_file(name, frame, digest, quality, quarantine, row_hashes))
+
+    def remove_file(self, name):
+        with self._writing():
+            if name not in self.manifest["files"]:
+                return
+            file_dir = self._file_dir(name)
+
+            def update(current, agg_name):
+                if current is None:
+                    return None
+                return current[current['_source_file'] != name].reset_index(drop=True)
+
+            self._replace_aggregates(update)
+            del self.manifest["files"][name]
+            self._retire(file_dir)
+            self._write_manifest()
+
+
+# =============================================================================
+# 파티션 데이터셋
+# - (소스 파일, 거래월) 별 DataFrame 묶음
+# - 기간/파일 필터는 해당 파티션만 골라 붙이므로 나머지 행은 읽지도 않음
+# - 파티션 값이 경로(str)이면 loader 로 필요할 때 읽음
+# - 파티션 안의 행은 (국가, 서비스) 순으로 정렬해 두고, 조합별 행 구간(PartitionIndex)을
+#   파티션당 한 번 만들어 둠 -> 국가/서비스 필터(사이드바, 차트 드릴다운)는 구간 목록에서
+#   해당 조합만 골라 잘라 붙임 (행 전체 마스크 계산 없음, 비용은 고른 행 수에 비례)
+#   이전 버전에서 정렬 없이 저장한 파티션은 행 마스크로 처리
+# =============================================================================
+MONTH_COLUMN = 'TRANSACTION_APPROVED_MONTH'
+INDEX_COLUMNS = ['country', 'PAYMENT_SERVICE_DIV']
+
+
+def split_by_month(frame):
+    # 거래월로 나누면서 파티션 안은 (국가, 서비스) 순 (안정 정렬이라 같은 조합 안의 순서는 유지)
+    keys = [c for c in INDEX_COLUMNS if c in frame.columns]
+    if MONTH_COLUMN not in frame.columns:
+        return {None: frame.sort_values(keys, kind='stable', ignore_index=True) if keys else frame}
+    frame = frame.sort_values([MONTH_COLUMN] + keys, kind='stable')
+    return {
+        month: part.reset_index(drop=True)
+        for month, part in frame.groupby(MONTH_COLUMN, sort=True, dropna=False)
+    }
+
+
+class PartitionIndex:
+    def __init__(self, part):
+        """파티션의 (국가, 서비스) 조합별 행 구간 [starts, stops)"""
+        n = len(part)
+        change = np.zeros(n, dtype=bool)
+        if n:
+            change[0] = True
+            for column in INDEX_COLUMNS:
+                values = part[column].to_numpy()
+                change[1:] |= values[1:] != values[:-1]
+        self.rows = n
+        self.starts = np.flatnonzero(change)
+        self.stops = np.append(self.starts[1:], n).astype(self.starts.dtype)
+        self.keys = part[INDEX_COLUMNS].iloc[self.starts].reset_index(drop=True)
+        # 같은 조합이 여러 구간에 나오면 정렬되지 않은 파티션 (이전 버전 저장본)
+        self.contiguous = not self.keys.duplicated().any()
+
+    def positions(self, countries=None, services=None):
+        """조건에 맞는 행 위치 (오름차순). 전체면 None, 정렬되지 않은 파티션이면 행 마스크로 계산"""
+        runs = np.ones(len(self.keys), dtype=bool)
+        if countries is not None:
+            runs &= self.keys['country'].isin(countries).to_numpy()
+        if services is not None:
+            runs &= self.keys['PAYMENT_SERVICE_DIV'].isin(services).to_numpy()
+        if runs.all():
+            return None
+        if not self.contiguous:
+            return np.flatnonzero(np.repeat(runs, self.stops - self.starts))
+        starts, lengths = self.starts[runs], (self.stops - self.starts)[runs]
+        # 구간별 [start, stop) 를 이어 붙인 위치: 0..합계 에 구간마다 (start - 앞 구간 길이 합)을 더함
+        offsets = starts - (np.cumsum(lengths) - lengths)
+        return np.arange(lengths.sum()) + np.repeat(offsets, lengths)
+
+
+# 파티션 객체별 색인 (파티션은 읽은 뒤 바뀌지 않음). 파티션이 메모리에서 사라지면 함께 정리
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def partition_index(part):
+    key = id(part)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0]() is part:
+            return entry[1]
+    index = PartitionIndex(part)
+    with _indexes_lock:
+        _indexes[key] = (weakref.ref(part), index)
+    weakref.finalize(part, _drop_index, key)
+    return index
+
+
+def _drop_index(key):
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0]() is None:
+            del _indexes[key]
+
+
+class PartitionedFrame:
+    def __init__(self, files, loader=pd.read_parquet, file_rows=None):
+        # files: {소스 파일: {거래월: DataFrame 또는 parquet 경로}}
+        self.files = files
+        self.loader = loader
+        self._file_rows = file_rows
+
+    def _get(self, part):
+        return self.loader(part) if isinstance(part, str) else part
+
+    def file_names(self):
+        return list(self.files)
+
+    def file_rows(self):
+        if self._file_rows is None:
+            self._file_rows = {
+                src: sum(len(self._get(p)) for p in parts.values())
+                for src, parts in self.files.items()
+            }
+        return self._file_rows
+
+    def __len__(self):
+        return sum(self.file_rows().values())
+
+    @property
+    def columns(self):
+        # 첫 파티션의 컬럼 (모든 파티션이 같은 검증을 거쳐 컬럼 구성이 같음)
+        return self._empty().columns
+
+    def _empty(self):
+        first = next(iter(next(iter(self.files.values())).values()))
+        return self._get(first).iloc[0:0]
+
+    def _parts(self, sources=None, months=None):
+        # 빈 선택은 전체로 간주 (사이드바 필터와 동일한 규칙)
+        sources = set(sources) if sources else None
+        months = set(months) if months else None
+        return [
+            self._get(part)
+            for src, file_parts in self.files.items() if sources is None or src in sources
+            for month, part in file_parts.items() if months is None or month is None or month in months
+        ]
+
+    def _concat(self, parts):
+        if not parts:
+            return self._empty()
+        if len(parts) == 1:
+            # 파티션 하나면 복사 없이 넘기되, 메모리 예산이 들고 있는 원본 객체는 넘기지 않음
+            # (받은 쪽이 컬럼을 바꿔도 다른 세션이 보는 캐시 파티션은 그대로, copy-on-write)
+            return parts[0].copy(deep=False)
+        return pd.concat(parts, ignore_index=True)
+
+    def select(self, sources=None, months=None):
+        return self._concat(self._parts(sources, months))
+
+    def query(self, sources=None, countries=None, services=None, months=None):
+        """사이드바/드릴다운 필터 적용: 소스 파일/기간은 파티션 선택, 국가/서비스는 파티션 색인의 행 구간"""
+        pieces = []
+        for part in self._parts(sources, months):
+            if countries is not None or services is not None:
+                positions = partition_index(part).positions(countries, services)
+                if positions is not None:
+                    if not len(positions):
+                        continue
+                    part = part.take(positions)
+            pieces.append(part)
+        return self._concat(pieces)
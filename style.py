@@ -0,0 +1,124 @@
+# =============================================================================
+# 페이지 스타일 (커스텀 CSS)
+# - 모듈을 처음 import 할 때 한 번만 주석/공백을 정리해 <style> 블록으로 만들어 둠
+#   (프로세스당 1회, 이후 세션/재실행은 만들어 둔 문자열을 그대로 전송)
+# =============================================================================
+import re
+
+_PAGE_CSS = """
+    /* 사이드바 전체 스타일 */
+    [data-testid="stSidebar"] {
+        background: linear-gradient(180deg, #1e3a5f 0%, #2d5a87 100%);
+    }
+
+    [data-testid="stSidebar"] * {
+        color: white !important;
+    }
+
+    /* 사이드바 헤더 스타일 */
+    [data-testid="stSidebar"] h1,
+    [data-testid="stSidebar"] h2,
+    [data-testid="stSidebar"] h3 {
+        color: white !important;
+        padding: 0.5rem 0;
+    }
+
+    /* 필터 카드 스타일 */
+    .filter-card {
+        background: rgba(255, 255, 255, 0.1);
+        border-radius: 10px;
+        padding: 1rem;
+        margin-bottom: 1rem;
+        border: 1px solid rgba(255, 255, 255, 0.2);
+    }
+
+    .filter-title {
+        font-size: 0.9rem;
+        font-weight: 600;
+        margin-bottom: 0.5rem;
+        display: flex;
+        align-items: center;
+        gap: 0.5rem;
+    }
+
+    .filter-desc {
+        font-size: 0.75rem;
+        opacity: 0.8;
+        margin-bottom: 0.5rem;
+    }
+
+    /* 선택 요약 박스 */
+    .summary-box {
+        background: rgba(76, 175, 80, 0.3);
+        border-radius: 8px;
+        padding: 0.8rem;
+        margin: 0.5rem 0;
+        border-left: 4px solid #4CAF50;
+    }
+
+    .summary-item {
+        font-size: 0.8rem;
+        margin: 0.3rem 0;
+    }
+
+    /* 프리셋 버튼 스타일 */
+    .stButton > button {
+        background: rgba(255, 255, 255, 0.15) !important;
+        border: 1px solid rgba(255, 255, 255, 0.3) !important;
+        color: white !important;
+        font-size: 0.8rem !important;
+        padding: 0.3rem 0.8rem !important;
+        border-radius: 20px !important;
+        transition: all 0.3s ease !important;
+    }
+
+    .stButton > button:hover {
+        background: rgba(255, 255, 255, 0.25) !important;
+        border-color: rgba(255, 255, 255, 0.5) !important;
+    }
+
+    /* 리셋 버튼 특별 스타일 */
+    [data-testid="stSidebar"] .reset-btn button {
+        background: rgba(244, 67, 54, 0.3) !important;
+        border-color: #f44336 !important;
+        width: 100%;
+    }
+
+    /* Expander 스타일 */
+    [data-testid="stSidebar"] .streamlit-expanderHeader {
+        background: rgba(255, 255, 255, 0.1) !important;
+        border-radius: 8px !important;
+    }
+
+    /* 멀티셀렉트 스타일 */
+    [data-testid="stSidebar"] .stMultiSelect {
+        background: rgba(255, 255, 255, 0.05);
+        border-radius: 8px;
+        padding: 0.5rem;
+    }
+
+    /* 메인 KPI 카드 스타일 */
+    [data-testid="metric-container"] {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        border-radius: 10px;
+        padding: 1rem;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    }
+
+    [data-testid="metric-container"] label {
+        color: rgba(255, 255, 255, 0.8) !important;
+    }
+
+    [data-testid="metric-container"] [data-testid="stMetricValue"] {
+        color: white !important;
+    }
+"""
+
+
+def _minify(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,])\s*", r"\1", css).strip()
+
+
+PAGE_STYLE = f"<style>{_minify(_PAGE_CSS)}</style>"
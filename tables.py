@@ -0,0 +1,85 @@
+# =============================================================================
+# 표 표시 / 내보내기 (Arrow)
+# - 화면 표: 숫자 컬럼은 숫자 그대로 st.dataframe 에 넘기고 표시 형식(천 단위 구분, %, ≈/± 등)은
+#   column_config 로 지정 -> 행마다 파이썬 문자열을 만들지 않고 브라우저가 그릴 때 형식을 적용
+#   (숫자 열과 Arrow 문자열 열은 Arrow 로 넘길 때 버퍼를 그대로 씀. 정렬도 숫자 기준으로 됨)
+# - CSV 내보내기: DataFrame -> Arrow 테이블 -> 레코드 배치 단위로 CSV 기록
+#   (pandas to_csv 처럼 값마다 파이썬 객체로 바꾸지 않음)
+#   값은 항상 Arrow 가 씀 -> 숫자 형식은 파일 내용과 무관하게 같음 (실수는 가장 짧은 표기: 2.0 은 2, 1.5 는 1.5
+#   이전 pandas 파일의 2.0 과 다름). 머리글과 값은 따옴표 없이 쓰고, 쉼표/따옴표/줄바꿈이 든 값이 있으면
+#   그 파일은 문자열 값을 모두 따옴표로 감싸 다시 씀 (읽으면 같은 값). 머리글은 필요한 이름만 따옴표
+#   bool/날짜는 pandas 와 같은 True/False, 2024-01-01. 타입이 섞인 object 컬럼 등 Arrow 로 바꿀 수 없는
+#   컬럼은 문자열로 바꿔서 씀 (결측은 빈 칸)
+# - Excel 은 openpyxl 이 셀마다 파이썬 값을 받으므로 기존대로 pandas to_excel
+# =============================================================================
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import streamlit as st
+
+AMOUNT_FORMAT = "%,.0f"
+ESTIMATE_FORMAT = "≈%,.0f"
+ERROR_FORMAT = "±%,.0f"
+PERCENT_FORMAT = "%.1f%%"     # 값은 0~100 (비율이면 100을 곱해서 넘김)
+SCORE_FORMAT = "%.1f"
+SIGNED_SCORE_FORMAT = "%+.1f"
+
+# 머리글은 Arrow 가 항상 따옴표로 감싸므로 직접 씀
+CSV_OPTIONS = pa_csv.WriteOptions(include_header=False, batch_size=64 * 1024, quoting_style='none')
+CSV_QUOTED_OPTIONS = pa_csv.WriteOptions(include_header=False, batch_size=64 * 1024, quoting_style='needed')
+CSV_SPECIAL = (',', '"', '\n', '\r')
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def number_columns(formats):
+    """{컬럼: printf 형식} -> st.dataframe 의 column_config"""
+    return {column: st.column_config.NumberColumn(format=fmt) for column, fmt in formats.items()}
+
+
+def to_arrow(frame):
+    """DataFrame -> Arrow 테이블 (인덱스 제외)"""
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def _as_text(values):
+    # 결측은 빈 칸으로 남김
+    return values.astype(str).where(values.notna())
+
+
+def _csv_table(frame):
+    # bool/날짜는 pandas 와 같은 표기의 문자열로, Arrow 로 바꿀 수 없는 컬럼(섞인 object 등)도 문자열로
+    # 컬럼별로 바꿔서 이름이 겹치는 컬럼도 그대로 씀
+    arrays = []
+    for i in range(frame.shape[1]):
+        values = frame.iloc[:, i]
+        if pd.api.types.is_bool_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+            values = _as_text(values)
+        try:
+            arrays.append(pa.Array.from_pandas(values))
+        except (pa.ArrowException, TypeError, ValueError):
+            arrays.append(pa.Array.from_pandas(_as_text(values)))
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in frame.columns])
+
+
+def _csv_header(columns):
+    names = []
+    for column in map(str, columns):
+        if any(ch in column for ch in CSV_SPECIAL):
+            column = '"' + column.replace('"', '""') + '"'
+        names.append(column)
+    return ",".join(names).encode('utf-8') + b'\n'
+
+
+def csv_bytes(frame):
+    """DataFrame -> CSV bytes (Excel 에서 한글이 깨지지 않도록 UTF-8 BOM 포함)"""
+    table = _csv_table(frame)
+    head = UTF8_BOM + _csv_header(frame.columns)
+    for options in (CSV_OPTIONS, CSV_QUOTED_OPTIONS):
+        sink = pa.BufferOutputStream()
+        sink.write(head)
+        try:
+            pa_csv.write_csv(table, sink, options)
+        except pa.ArrowInvalid:
+            # 따옴표가 필요한 값이 있음 -> 문자열 값을 따옴표로 감싸 다시 씀
+            continue
+        return sink.getvalue().to_pybytes()
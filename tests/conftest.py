@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 루트의 모듈(engine, store, agg_service ...)을 테스트에서 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
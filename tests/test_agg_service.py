@@ -0,0 +1,128 @@
+# =============================================================================
+# 공유 집계 서비스 (agg_service.py)
+# - 임시 DatasetStore 로 loopback 포트에 서비스를 띄워 실제 연결로 요청
+# =============================================================================
+import os
+import stat
+import threading
+from multiprocessing import AuthenticationError
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agg_service import (AUTHKEY_ENV, AUTHKEY_FILE, AggregateClient, AggregateService, StaleVersionError,
+                         load_authkey, make_spec)
+from engine import available_sections, section_aggregate
+from store import DatasetStore, PartitionedFrame
+
+AUTHKEY = b"test-key"
+
+
+def make_frame(name, rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'country': rng.choice(['KR', 'US', 'JP'], rows),
+        'PAYMENT_SERVICE_DIV': rng.choice(['CARD', 'BANK'], rows),
+        'TRANSACTION_APPROVED_MONTH': rng.choice(['2024-01', '2024-02', '2024-03'], rows),
+        'CUSTOMER_CREATEDDATE_MONTH': rng.choice(['2023-12', '2024-01'], rows),
+        'CUSTOMERID': rng.integers(0, 50, rows),
+        'VOLUMN': rng.random(rows) * 1000,
+        'TRX_COUNT': rng.integers(1, 5, rows),
+        '_source_file': name,
+    })
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    store = DatasetStore(str(tmp_path_factory.mktemp("store")))
+    store.add_file('a.csv', make_frame('a.csv', seed=1), digest='a')
+    store.add_file('b.csv', make_frame('b.csv', seed=2), digest='b')
+    service = AggregateService(store.root, workers=1)
+    ready = threading.Event()
+    threading.Thread(target=service.serve, args=(("localhost", 0), AUTHKEY), kwargs={'ready': ready},
+                     daemon=True).start()
+    assert ready.wait(30)
+    yield service, store
+    service.pool.shutdown(cancel_futures=True)
+
+
+def local_dataset(store):
+    return PartitionedFrame({name: store.file_partitions(name) for name in store.file_names()})
+
+
+def assert_same(expected, actual):
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, actual)
+    elif isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert_same(expected[key], actual[key])
+    elif isinstance(expected, (list, tuple)):
+        assert len(expected) == len(actual)
+        for e, a in zip(expected, actual):
+            assert_same(e, a)
+    else:
+        assert expected == actual or (pd.isna(expected) and pd.isna(actual))
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {'countries': ['KR', 'US'], 'months': ['2024-02', '2024-03']},
+    {'sources': ['b.csv'], 'services': ['CARD']},
+])
+def test_matches_in_process_result(service, filters):
+    service, store = service
+    client = AggregateClient(service.address, AUTHKEY)
+    rows = local_dataset(store).query(**filters)
+    for name in available_sections(rows.columns):
+        assert_same(section_aggregate(name, rows), client.aggregate(store.version, make_spec(**filters), name))
+
+
+def test_second_request_served_from_shared_cache(service):
+    service, store = service
+    spec = make_spec(countries=['JP'])
+    name = available_sections(make_frame('x').columns)[0]
+    first = AggregateClient(service.address, AUTHKEY).aggregate(store.version, spec, name)
+    before = service.stats()
+    # 다른 연결(다른 대시보드 프로세스)의 같은 요청도 서비스 캐시에서
+    second = AggregateClient(service.address, AUTHKEY).aggregate(store.version, spec, name)
+    after = service.stats()
+    assert after['hits'] == before['hits'] + 1
+    assert after['misses'] == before['misses']
+    assert_same(first, second)
+
+
+def test_old_version_is_rejected_as_stale(service):
+    service, store = service
+    client = AggregateClient(service.address, AUTHKEY)
+    names = available_sections(make_frame('x').columns)
+    old_version = store.version
+    store.add_file('c.csv', make_frame('c.csv', seed=3), digest='c')
+    # 워커가 새 버전을 읽은 뒤 이전 버전 요청은 계산하지 않고 거절
+    client.aggregate(store.version, make_spec(), names[0])
+    with pytest.raises(StaleVersionError):
+        client.aggregate(old_version, make_spec(months=['2024-01']), names[0])
+    # 거절된 요청은 캐시에 남지 않음
+    assert all(key[0] != old_version or key[1] != make_spec(months=['2024-01']) for key in service._cache)
+
+
+def test_wrong_authkey_is_refused(service):
+    service, store = service
+    with pytest.raises(AuthenticationError):
+        AggregateClient(service.address, b"wrong").stats()
+    # 잘못된 접속이 있어도 서비스는 계속 요청을 받음
+    assert AggregateClient(service.address, AUTHKEY).stats()['workers'] == 1
+
+
+def test_authkey_file_is_created_private(tmp_path, monkeypatch):
+    monkeypatch.delenv(AUTHKEY_ENV, raising=False)
+    assert load_authkey(str(tmp_path)) is None
+    key = load_authkey(str(tmp_path), create=True)
+    assert len(key) >= 32 and load_authkey(str(tmp_path)) == key
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(tmp_path / AUTHKEY_FILE).st_mode) == 0o600
+    monkeypatch.setenv(AUTHKEY_ENV, "explicit")
+    assert load_authkey(str(tmp_path)) == b"explicit"
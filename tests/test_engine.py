@@ -0,0 +1,109 @@
+# =============================================================================
+# 집계 엔진 결과 일치 (pandas 경로 vs polars 경로)
+# - polars 가 설치되어 있지 않으면 건너뜀
+# =============================================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+
+pl = pytest.importorskip("polars")
+
+
+@pytest.fixture
+def run_both(monkeypatch):
+    """같은 호출을 pandas / polars 엔진으로 각각 실행해 (pandas 결과, polars 결과)"""
+    def run(func, *args):
+        monkeypatch.setattr(engine, "ENGINE", "pandas")
+        expected = func(*args)
+        monkeypatch.setattr(engine, "ENGINE", "polars")
+        monkeypatch.setattr(engine, "pl", pl)
+        engine.clear_polars_cache()
+        actual = func(*args)
+        engine.clear_polars_cache()
+        return expected, actual
+    return run
+
+
+def assert_same(expected, actual):
+    if isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(expected, actual, check_exact=False, rtol=1e-12)
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(expected, actual, check_exact=False, rtol=1e-12)
+    else:
+        assert expected == actual
+
+
+def sample(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'country': rng.choice(['KR', 'US', 'JP', 'VN'], rows),
+        'PAYMENT_SERVICE_DIV': rng.choice(['CARD', 'BANK', 'WALLET'], rows),
+        'TRANSACTION_APPROVED_MONTH': rng.choice(['2024-01', '2024-02', '2024-03'], rows),
+        'CUSTOMERID': rng.integers(0, 300, rows),
+        'VOLUMN': rng.random(rows) * 1000,
+        'TRX_COUNT': rng.integers(1, 20, rows),
+    })
+
+
+@pytest.mark.parametrize("by, values", [
+    ('country', 'VOLUMN'),
+    ('country', ['VOLUMN', 'TRX_COUNT']),
+    (['country', 'PAYMENT_SERVICE_DIV'], ['VOLUMN', 'TRX_COUNT']),
+])
+def test_group_sum(run_both, by, values):
+    assert_same(*run_both(engine.group_sum, sample(), by, values))
+
+
+def test_group_sum_nan_keys(run_both):
+    frame = sample()
+    frame.loc[frame.index[::7], 'country'] = None
+    assert_same(*run_both(engine.group_sum, frame, ['country', 'PAYMENT_SERVICE_DIV'], ['VOLUMN', 'TRX_COUNT']))
+
+
+def test_group_sum_empty(run_both):
+    frame = sample().iloc[0:0]
+    expected, actual = run_both(engine.group_sum, frame, 'country', ['VOLUMN', 'TRX_COUNT'])
+    assert expected.empty and actual.empty
+    assert list(expected.columns) == list(actual.columns)
+
+
+def test_group_sum_categorical(run_both):
+    frame = sample().astype({'country': 'category'})
+    assert_same(*run_both(engine.group_sum, frame, 'country', 'VOLUMN'))
+
+
+@pytest.mark.parametrize("column", ['country', 'CUSTOMERID'])
+def test_nunique(run_both, column):
+    assert_same(*run_both(engine.nunique, sample(), column))
+
+
+def test_nunique_nan(run_both):
+    frame = sample()
+    frame['CUSTOMERID'] = frame['CUSTOMERID'].astype('float64')
+    frame.loc[frame.index[::5], 'CUSTOMERID'] = np.nan
+    frame.loc[frame.index[::3], 'country'] = None
+    assert_same(*run_both(engine.nunique, frame, 'CUSTOMERID'))
+    assert_same(*run_both(engine.nunique, frame, 'country'))
+
+
+def test_nunique_empty(run_both):
+    assert_same(*run_both(engine.nunique, sample().iloc[0:0], 'CUSTOMERID'))
+
+
+def test_nunique_categorical(run_both):
+    assert_same(*run_both(engine.nunique, sample().astype({'country': 'category'}), 'country'))
+
+
+def test_pivot_sum(run_both):
+    assert_same(*run_both(engine.pivot_sum, sample(), 'country', 'TRANSACTION_APPROVED_MONTH', 'VOLUMN'))
+
+
+def test_pivot_sum_missing_cell(run_both):
+    frame = sample()
+    # KR 의 2024-03 행을 빼서 빈 칸(0 으로 채움)을 만듦
+    frame = frame[~((frame['country'] == 'KR') & (frame['TRANSACTION_APPROVED_MONTH'] == '2024-03'))]
+    expected, actual = run_both(engine.pivot_sum, frame, 'country', 'TRANSACTION_APPROVED_MONTH', 'TRX_COUNT')
+    assert expected.loc['KR', '2024-03'] == 0
+    assert_same(expected, actual)
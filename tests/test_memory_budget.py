@@ -0,0 +1,45 @@
+# =============================================================================
+# 메모리 예산 / 세션별 데이터셋 추적 (memory_budget.py)
+# =============================================================================
+import os
+
+import numpy as np
+import pandas as pd
+
+from memory_budget import DatasetTracker, MemoryBudget
+
+
+def test_tracker_releases_prefixes_of_switched_and_idle_sessions():
+    tracker = DatasetTracker(ttl=10)
+    assert tracker.switch('s1', ['a/', 'shared/'], now=0) == []
+    assert tracker.switch('s2', ['shared/'], now=5) == []
+    # s1 이 다른 데이터셋으로 바뀜: s2 가 쓰는 접두사는 남김
+    assert tracker.switch('s1', ['b/'], now=6) == ['a/']
+    # s2 가 ttl 넘게 실행되지 않음 (닫힌 세션): 다른 세션이 실행할 때 정리
+    assert tracker.switch('s1', ['b/'], now=16) == ['shared/']
+    assert tracker.sessions() == 1
+
+
+def test_spilled_entry_removed_during_read_is_rebuilt(tmp_path):
+    budget = MemoryBudget(max_bytes=1000, spill_dir=str(tmp_path))
+    budget.put('upload/x/1', pd.DataFrame({'v': np.arange(1000)}))
+    budget.put('upload/x/2', pd.DataFrame({'v': np.arange(1000)}))
+    path = budget._entries['upload/x/1']['path']
+    assert path is not None and os.path.exists(path)
+    # 다른 세션이 지운 직후처럼 spill 파일만 없는 상태
+    os.remove(path)
+    rebuilt = budget.get_or_put('upload/x/1', lambda: pd.DataFrame({'v': [7]}))
+    assert rebuilt['v'].tolist() == [7]
+
+
+def test_discard_prefix_deletes_spill_files_only(tmp_path):
+    budget = MemoryBudget(max_bytes=1000, spill_dir=str(tmp_path / "spill"))
+    stored = tmp_path / "part.parquet"
+    pd.DataFrame({'v': np.arange(1000)}).to_parquet(stored)
+    budget.load(str(stored))
+    budget.put('upload/x/1', pd.DataFrame({'v': np.arange(1000)}))
+    budget.put('upload/x/2', pd.DataFrame({'v': np.arange(1000)}))
+    assert budget.discard_prefix('upload/x/') == 2
+    assert os.listdir(tmp_path / "spill") == []
+    budget.discard(str(stored))
+    assert stored.exists()
@@ -0,0 +1,48 @@
+# =============================================================================
+# 프리셋 뷰 (presets.PresetViews)
+# =============================================================================
+import threading
+
+from presets import PresetViews
+
+
+def build(signature, value, gate=None):
+    if gate is not None:
+        gate.wait(5)
+    return {(signature, 'kpi'): value}
+
+
+def wait_all(views):
+    views.pool.submit(lambda: None).result()
+
+
+def test_views_of_other_datasets_survive_refresh():
+    views = PresetViews(max_datasets=2)
+    views.refresh('ds-a', {('ds-a', 'p1'): (1,)}, build)
+    views.refresh('ds-b', {('ds-b', 'p1'): (2,)}, build)
+    # 두 세션이 번갈아 실행해도 서로의 뷰를 버리거나 다시 계산하지 않음
+    views.refresh('ds-a', {('ds-a', 'p1'): (1,)}, build)
+    wait_all(views)
+    assert views.result(('ds-a', 'p1'), 'kpi') == 1
+    assert views.result(('ds-b', 'p1'), 'kpi') == 2
+    assert views.status('ds-a') == {'views': 1, 'ready': 1, 'datasets': 2}
+
+
+def test_least_recently_used_dataset_is_dropped():
+    views = PresetViews(max_datasets=2)
+    for key in ('ds-a', 'ds-b', 'ds-a', 'ds-c'):
+        views.refresh(key, {(key, 'p1'): (key,)}, build)
+    wait_all(views)
+    assert views.ready(('ds-a', 'p1')) and views.ready(('ds-c', 'p1'))
+    assert not views.ready(('ds-b', 'p1'))
+
+
+def test_removed_preset_view_is_dropped_and_pending_view_not_ready():
+    views = PresetViews()
+    gate = threading.Event()
+    views.refresh('ds-a', {('ds-a', 'p1'): (1, gate), ('ds-a', 'p2'): (2,)}, build)
+    assert not views.ready(('ds-a', 'p1'))
+    gate.set()
+    views.refresh('ds-a', {('ds-a', 'p1'): (1, gate)}, build)
+    wait_all(views)
+    assert views.ready(('ds-a', 'p1')) and not views.ready(('ds-a', 'p2'))
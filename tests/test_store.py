@@ -0,0 +1,16 @@
+# =============================================================================
+# 파티션 데이터셋 (store.PartitionedFrame)
+# =============================================================================
+import pandas as pd
+
+from store import PartitionedFrame
+
+
+def test_single_partition_query_does_not_share_cached_frame():
+    cached = pd.DataFrame({'country': ['KR', 'US'], 'PAYMENT_SERVICE_DIV': ['CARD', 'BANK'], 'VOLUMN': [1.0, 2.0]})
+    dataset = PartitionedFrame({'a.csv': {'2024-01': cached}})
+    for result in (dataset.query(), dataset.select()):
+        result['VOLUMN'] = 0.0
+        result.loc[0, 'country'] = 'JP'
+    assert cached['VOLUMN'].tolist() == [1.0, 2.0]
+    assert cached['country'].tolist() == ['KR', 'US']
@@ -0,0 +1,40 @@
+# =============================================================================
+# CSV 내보내기 (tables.csv_bytes)
+# =============================================================================
+import io
+
+import numpy as np
+import pandas as pd
+
+from tables import UTF8_BOM, csv_bytes
+
+
+def lines(frame):
+    data = csv_bytes(frame)
+    assert data.startswith(UTF8_BOM)
+    return data[len(UTF8_BOM):].decode('utf-8').splitlines()
+
+
+def test_float_format_does_not_depend_on_other_values():
+    plain = pd.DataFrame({'국가': ['KR', 'US'], 'VOLUMN': [1.0, 2.5]})
+    quoted = plain.assign(국가=['KR', 'U,S'])
+    assert [line.split(',')[-1] for line in lines(plain)[1:]] == ['1', '2.5']
+    assert [line.rsplit(',', 1)[-1] for line in lines(quoted)[1:]] == ['1', '2.5']
+
+
+def test_header_and_values_unquoted_unless_needed():
+    frame = pd.DataFrame({'상태': ['일치'], 'a,b': [1], 'flag': [True], 'day': pd.to_datetime(['2024-01-01'])})
+    assert lines(frame) == ['상태,"a,b",flag,day', '일치,1,True,2024-01-01']
+
+
+def test_mixed_object_column_round_trips():
+    frame = pd.DataFrame({'id': pd.Series([1, 'x', None], dtype=object), 'v': [1.5, np.nan, 3.0],
+                          'note': ['a', 'b "q"', None]})
+    back = pd.read_csv(io.BytesIO(csv_bytes(frame)), encoding='utf-8-sig', dtype={'id': str})
+    assert back['id'].tolist()[:2] == ['1', 'x'] and pd.isna(back['id'][2])
+    assert back['note'].tolist()[:2] == ['a', 'b "q"']
+    np.testing.assert_array_equal(back['v'].to_numpy(), [1.5, np.nan, 3.0])
+
+
+def test_duplicate_column_names():
+    assert lines(pd.DataFrame([[1, 2.0]], columns=['a', 'a'])) == ['a,a', '1,2']
@@ -0,0 +1,140 @@
+# =============================================================================
+# 트렌드 엔진
+# - 월 x 계열(국가, 서비스, 지표 등) 합계 행렬 하나로 모든 계열의 추세 지표를 한 번에 계산
+# - 월 축은 달력 기준 정수 기간(engine.month_index)으로 펼쳐서 계산하고,
+#   결과는 실제 데이터가 있는(= 선택된) 월만 반환
+# - 이동 구간/비교 월이 선택 기간 밖에 걸치면 해당 값은 비움(NaN)
+#
+# 지표
+#   월 합계, N개월 이동합계/이동평균(3/6/12), 연초 대비 누적(YTD),
+#   전월/전년 동월 대비 성장률(%), 계절 조정 지수(평균 = 100)
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+from engine import month_index
+
+ROLLING_WINDOWS = [3, 6, 12]
+
+TREND_METRICS = (
+    ['월 합계']
+    + [f'{w}개월 이동합계' for w in ROLLING_WINDOWS]
+    + [f'{w}개월 이동평균' for w in ROLLING_WINDOWS]
+    + ['YTD 누적', '전월 대비 성장률(%)', '전년 동월 대비 성장률(%)', '계절 조정 지수']
+)
+
+
+def _window_sum(cumulative, observed_cumulative, start, end):
+    # [start, end) 구간 합계. 구간 안에 관측되지 않은 월이 있으면 NaN
+    n = cumulative.shape[0] - 1
+    valid = (start >= 0) & (end <= n)
+    start, end = np.clip(start, 0, n), np.clip(end, 0, n)
+    total = cumulative[end] - cumulative[start]
+    complete = (observed_cumulative[end] - observed_cumulative[start]) == (end - start)
+    return np.where((valid & complete)[:, None], total, np.nan)
+
+
+def _growth(current, previous):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous > 0, (current / previous - 1) * 100, np.nan)
+
+
+class TrendEngine:
+    def __init__(self, matrix):
+        """matrix: 월 x 계열 합계 (index 는 거래월 값, columns 는 계열 이름)"""
+        periods = month_index(pd.Series(matrix.index, dtype='object'))
+        valid = periods >= 0
+        matrix, periods = matrix[valid], periods[valid]
+        self.columns = matrix.columns
+        if not len(matrix):
+            self.labels = pd.Index([], name=matrix.index.name or '월')
+            self.metrics = {name: np.empty((0, len(self.columns))) for name in TREND_METRICS}
+            return
+
+        # 같은 기간으로 해석되는 월 값('2024-01', '202401' 등)은 합침
+        codes, self.periods = pd.factorize(periods, sort=True)
+        values = np.zeros((len(self.periods), len(self.columns)))
+        np.add.at(values, codes, np.nan_to_num(matrix.to_numpy(dtype='float64')))
+        first_label = pd.Series(matrix.index).groupby(codes).first()
+        self.labels = pd.Index(first_label.to_numpy(), name=matrix.index.name or '월')
+
+        # 달력 기준으로 펼친 행렬 (선택되지 않은 월은 0, observed=False)
+        base = int(self.periods[0])
+        n = int(self.periods[-1]) - base + 1
+        rows = self.periods - base
+        dense = np.zeros((n, len(self.columns)))
+        dense[rows] = values
+        observed = np.zeros(n, dtype=bool)
+        observed[rows] = True
+        self.metrics = self._compute(dense, observed, base, rows)
+
+    @classmethod
+    def from_totals(cls, totals, dimension):
+        """(dimension, 거래월) 합계 Series -> 계열이 dimension 값인 엔진"""
+        return cls(totals.unstack(dimension, fill_value=0))
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.metrics.values())
+
+    def _compute(self, dense, observed, base, rows):
+        n = dense.shape[0]
+        index = np.arange(n)
+        cumulative = np.vstack([np.zeros((1, dense.shape[1])), np.cumsum(dense, axis=0)])
+        observed_cumulative = np.concatenate([[0], np.cumsum(observed)])
+        calendar_month = (base + index) % 12
+
+        metrics = {'월 합계': dense}
+        for w in ROLLING_WINDOWS:
+            rolling = _window_sum(cumulative, observed_cumulative, index - w + 1, index + 1)
+            metrics[f'{w}개월 이동합계'] = rolling
+            metrics[f'{w}개월 이동평균'] = rolling / w
+
+        # 연초 대비 누적: 해당 연도 1월(또는 데이터 시작) 이후 선택된 월의 합
+        year_start = np.maximum(index - calendar_month, 0)
+        metrics['YTD 누적'] = cumulative[index + 1] - cumulative[year_start]
+
+        previous = np.vstack([np.full((1, dense.shape[1]), np.nan), dense[:-1]])
+        previous[1:][~observed[:-1]] = np.nan
+        metrics['전월 대비 성장률(%)'] = _growth(dense, previous)
+        last_year = np.full_like(dense, np.nan)
+        last_year[12:] = dense[:-12]
+        last_year[12:][~observed[:-12]] = np.nan
+        metrics['전년 동월 대비 성장률(%)'] = _growth(dense, last_year)
+
+        metrics['계절 조정 지수'] = self._seasonal_index(dense, cumulative, observed_cumulative, calendar_month, observed)
+        return {name: values[rows] for name, values in metrics.items()}
+
+    def _seasonal_index(self, dense, cumulative, observed_cumulative, calendar_month, observed):
+        # 중심 2x12 이동평균 대비 비율의 월별 평균을 계절 요인으로 사용 (평균 1로 정규화)
+        index = np.arange(dense.shape[0])
+        inner = _window_sum(cumulative, observed_cumulative, index - 5, index + 6)
+        edges = _window_sum(cumulative, observed_cumulative, index - 6, index + 7) - inner
+        trend = (inner + edges / 2) / 12
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(trend > 0, dense / trend, np.nan)
+        ratio_sum = np.zeros((12, dense.shape[1]))
+        ratio_count = np.zeros((12, dense.shape[1]))
+        np.add.at(ratio_sum, calendar_month, np.nan_to_num(ratio))
+        np.add.at(ratio_count, calendar_month, ~np.isnan(ratio))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factors = ratio_sum / ratio_count
+        # 12개월 모두 요인이 있어야 조정 가능 (대략 연속 24개월 이상)
+        factors[:, np.isnan(factors).any(axis=0)] = np.nan
+        factors = factors / factors.mean(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            adjusted = dense / factors[calendar_month]
+            adjusted[~observed] = np.nan
+            level = np.nansum(adjusted, axis=0) / (~np.isnan(adjusted)).sum(axis=0)
+            return adjusted / level * 100
+
+    def metric(self, name):
+        """지표 하나의 월 x 계열 표"""
+        return pd.DataFrame(self.metrics[name], index=self.labels, columns=self.columns)
+
+    def long(self, name, columns=None, column_name='계열'):
+        """차트용 긴 형식 [월, 계열, 값]"""
+        frame = self.metric(name)
+        if columns is not None:
+            frame = frame[[c for c in columns if c in frame.columns]]
+        return frame.melt(ignore_index=False, var_name=column_name, value_name='값').reset_index()
@@ -0,0 +1,172 @@
+# =============================================================================
+# 업로드 데이터 검증
+# - 파일 하나를 컬럼 단위(벡터) 연산으로 검사 (행 반복 없음)
+# - 필수 컬럼이 없으면 파일 전체를 거부하고, 그 외 문제 행은 버리지 않고 격리(quarantine)
+# - 결과: 정상 행, 격리 행(사유 컬럼 포함), 품질 리포트(dict), 정상 행 해시(중복 확인용)
+#
+# 격리 사유 (여러 개에 해당하면 먼저 검사한 사유 하나만 기록)
+#   숫자 변환 실패 -> 거래금액 없음 -> 음수 금액/건수 -> 국가/서비스 없음 -> 거래월 형식 오류 -> 환율 없음
+#
+# 환율표(currency.py)를 넘기면 정상 행의 VOLUMN 을 기준 통화로 환산 (원래 금액은 VOLUMN_LOCAL)
+# 행 해시는 원래 금액으로 계산 (환율표가 바뀌어도 같은 원본 행은 같은 해시)
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+from currency import LOCAL_VOLUME_COLUMN
+from engine import month_index
+
+REQUIRED_COLUMNS = ['country', 'PAYMENT_SERVICE_DIV', 'VOLUMN', 'TRX_COUNT']
+OPTIONAL_COLUMNS = ['TRANSACTION_APPROVED_MONTH', 'CUSTOMER_CREATEDDATE_MONTH', 'CUSTOMERID']
+NUMERIC_COLUMNS = ['VOLUMN', 'TRX_COUNT']
+MONTH_COLUMNS = ['TRANSACTION_APPROVED_MONTH', 'CUSTOMER_CREATEDDATE_MONTH']
+
+QUARANTINE_COLUMN = '_quarantine_reason'
+QUARANTINE_REASONS = ['숫자 변환 실패', '거래금액 없음', '음수 금액/건수', '국가/서비스 없음', '거래월 형식 오류', '환율 없음']
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def row_hashes(frame, columns=None):
+    """행 내용 해시 (uint64). columns 가 없으면 소스 파일 컬럼 등 내부 컬럼(_ 로 시작)을 뺀 전체"""
+    if columns is None:
+        columns = [c for c in frame.columns if not str(c).startswith('_')]
+    # 환산된 행은 원래 금액으로 해시 (환산 전/후, 환율표가 달라도 같은 원본 행은 같은 해시)
+    columns = [c for c in columns if c != LOCAL_VOLUME_COLUMN]
+    # 파일마다 컬럼 순서/숫자 타입(int, float)이 달라도 같은 값이면 같은 해시가 되도록 맞춤
+    keyed = frame[sorted(columns, key=str)]
+    if LOCAL_VOLUME_COLUMN in frame.columns and 'VOLUMN' in keyed.columns:
+        keyed = keyed.assign(VOLUMN=frame[LOCAL_VOLUME_COLUMN])
+    # 금액/건수는 float64, 그 밖의 숫자 컬럼(고객 ID 등)은 정수 그대로 (float 으로 바꾸면 2**53 이 넘는 ID 가 겹침)
+    # 결측 때문에 float 으로 읽힌 정수 컬럼은 Int64 로 (결측 없는 Int64 는 int64 와 같은 해시)
+    casts = {}
+    for c in keyed.columns:
+        values = keyed[c]
+        if c in NUMERIC_COLUMNS:
+            if pd.api.types.is_numeric_dtype(values):
+                casts[c] = 'float64'
+        elif pd.api.types.is_float_dtype(values):
+            finite = values.dropna().to_numpy()
+            if (np.all(np.isfinite(finite)) and np.all(np.abs(finite) < 2.0 ** 63)
+                    and np.array_equal(finite, np.trunc(finite))):
+                casts[c] = 'Int64'
+    if casts:
+        keyed = keyed.astype(casts)
+    return pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+
+
+def validate_frame(frame, fx=None):
+    """(정상 행, 격리 행, 품질 리포트, 정상 행 해시). 필수 컬럼이 없으면 SchemaError. fx: 환율표(FxTable)"""
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if missing:
+        raise SchemaError(f"필수 컬럼 없음: {', '.join(missing)}")
+
+    n = len(frame)
+    reason = np.zeros(n, dtype=np.int8)
+
+    def flag(mask, code):
+        # 아직 사유가 없는 행에만 기록
+        mask = np.asarray(mask, dtype=bool)
+        reason[(reason == 0) & mask] = code
+
+    # 변환 전 원본 값 (격리 행 표시용). 컬럼을 새로 할당하므로 입력 frame 은 바뀌지 않음
+    originals = {}
+    coercion = {}
+    numeric_failed = np.zeros(n, dtype=bool)
+    frame = frame.copy(deep=False)
+    for col in NUMERIC_COLUMNS:
+        if not pd.api.types.is_numeric_dtype(frame[col]):
+            originals[col] = frame[col]
+            coerced = pd.to_numeric(frame[col], errors='coerce')
+            failed = (coerced.isna() & frame[col].notna()).to_numpy()
+            coercion[col] = int(failed.sum())
+            numeric_failed |= failed
+            frame[col] = coerced
+    flag(numeric_failed, 1)
+    flag(frame['VOLUMN'].isna(), 2)
+    flag((frame['VOLUMN'] < 0) | (frame['TRX_COUNT'] < 0), 3)
+    flag(frame['country'].isna() | frame['PAYMENT_SERVICE_DIV'].isna(), 4)
+    if 'TRANSACTION_APPROVED_MONTH' in frame.columns:
+        flag(month_index(frame['TRANSACTION_APPROVED_MONTH']) < 0, 5)
+    rates = None
+    if fx is not None:
+        rates = fx.rates_for(frame)
+        flag(np.isnan(rates), 6)
+
+    bad_created = 0
+    if 'CUSTOMER_CREATEDDATE_MONTH' in frame.columns:
+        created = frame['CUSTOMER_CREATEDDATE_MONTH']
+        bad_created = int(((month_index(created) < 0) & created.notna().to_numpy() & (reason == 0)).sum())
+
+    valid = reason == 0
+    # 격리 행은 원본 값을 그대로 보여주기 위해 문자열로 보관 (변환 실패 값 유지)
+    quarantine = frame[~valid].assign(**{col: values[~valid] for col, values in originals.items()})
+    quarantine = quarantine.astype(str).reset_index(drop=True)
+    quarantine[QUARANTINE_COLUMN] = np.asarray(QUARANTINE_REASONS, dtype=object)[reason[~valid] - 1]
+
+    # 월 컬럼은 문자열로 통일
+    for col in MONTH_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].astype(str)
+    # 값 타입이 섞인 object 컬럼(예: Excel 의 CUSTOMERID [123, 'A45'])은 parquet/Arrow 로 쓸 수 없으므로
+    # 빈 값은 그대로 두고 문자열로 통일
+    for col in frame.columns:
+        if frame[col].dtype == object:
+            values = frame[col]
+            frame[col] = values.where(values.isna(), values.astype(str))
+    clean = frame[valid].reset_index(drop=True) if not valid.all() else frame
+
+    hashes = row_hashes(clean)
+    if rates is not None:
+        # 환산: 정상 행 환율과 금액의 벡터 곱 한 번
+        clean = clean.copy(deep=False)
+        clean[LOCAL_VOLUME_COLUMN] = clean['VOLUMN']
+        clean['VOLUMN'] = clean['VOLUMN'].to_numpy(dtype='float64') * rates[valid]
+    counts = np.bincount(reason, minlength=len(QUARANTINE_REASONS) + 1)[1:]
+    report = {
+        'rows': int(n),
+        'valid_rows': int(valid.sum()),
+        'quarantined': {r: int(c) for r, c in zip(QUARANTINE_REASONS, counts) if c},
+        'coercion_failures': {col: c for col, c in coercion.items() if c},
+        'duplicate_rows': int(pd.Series(hashes).duplicated().sum()),
+        'bad_created_month': bad_created,
+        'missing_optional': [c for c in OPTIONAL_COLUMNS if c not in frame.columns],
+        'currency': None if fx is None else {'base': fx.base, 'fx_table': fx.digest},
+    }
+    return clean, quarantine, report, hashes
+
+
+def cross_file_duplicates(hashes_by_file):
+    """파일별로, 다른 파일에도 똑같이 있는 행 수"""
+    names = list(hashes_by_file)
+    if len(names) < 2:
+        return {name: 0 for name in names}
+    hashes = np.concatenate([hashes_by_file[name] for name in names])
+    owner = np.repeat(np.arange(len(names)), [len(hashes_by_file[name]) for name in names])
+    pairs = pd.DataFrame({'h': hashes, 'f': owner}).drop_duplicates()
+    file_counts = pairs['h'].value_counts()
+    shared = file_counts.index[file_counts > 1].to_numpy()
+    return {name: int(np.isin(hashes_by_file[name], shared).sum()) for name in names}
+
+
+def quality_table(reports, duplicates=None):
+    """파일별 품질 리포트 -> 표 (화면 표시용)"""
+    rows = []
+    for name, report in reports.items():
+        row = {
+            '파일': name,
+            '전체 행': report['rows'],
+            '정상 행': report['valid_rows'],
+            '격리 행': report['rows'] - report['valid_rows'],
+        }
+        for r in QUARANTINE_REASONS:
+            row[r] = report['quarantined'].get(r, 0)
+        row['파일 내 중복'] = report['duplicate_rows']
+        if duplicates is not None:
+            row['다른 파일과 중복'] = duplicates.get(name, 0)
+        row['가입월 형식 오류'] = report['bad_created_month']
+        row['없는 선택 컬럼'] = ", ".join(report['missing_optional'])
+        rows.append(row)
+    return pd.DataFrame(rows)